@@ -128,6 +128,10 @@ assign read_flag  =  cen_fell & !CEN &  GWEN;
 reg cen_flag_dly;
 always @(cen_flag) cen_flag_dly = #100 cen_flag;
 
+`ifdef VERILATOR
+// Specify blocks are ignored under Verilator, keep the delay used below
+localparam Tdly = 100;
+`else
 specify
   specparam Tcyc = 55600 : 55600 : 55600;
   specparam Tckh = 25000 : 25000 : 25000;
@@ -297,6 +301,7 @@ if ((CEN == 1'b0) && (GWEN == 1'b1)) (posedge CLK => (Q[5]  : 1'bx)) = (ta, ta);
 if ((CEN == 1'b0) && (GWEN == 1'b1)) (posedge CLK => (Q[6]  : 1'bx)) = (ta, ta);
 if ((CEN == 1'b0) && (GWEN == 1'b1)) (posedge CLK => (Q[7]  : 1'bx)) = (ta, ta);
 endspecify
+`endif
 
 assign no_st_viol = ~(|{ntf_tcs, ntf_tas, ntf_tds, ntf_tws, ntf_twis});
 assign no_hd_viol = ~(|{ntf_tch, ntf_tah, ntf_tdh, ntf_twh, ntf_twih});
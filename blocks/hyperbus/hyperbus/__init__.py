@@ -14,6 +14,8 @@ from hyperbus.common import *
 from hyperbus.crossbar import HyperBusCrossbar
 from hyperbus.core.master import HyperBusMaster
 from hyperbus.core.mmap import HyperBusMMAP
+from hyperbus.frontend.axi import HyperBusAXI
+from hyperbus.frontend.stream import HyperBusStream
 
 
 class HyperBusCore(Module):
@@ -36,10 +38,12 @@ class HyperBus(Module, AutoCSR, AutoDoc):
         Module or object that contains PHY stream interfaces and a cs signal to connect the ``HyperBusCore`` to.
 
     clk_freq : int
-        Frequency of a clock connected to HyperBus.
+        Frequency of ``clock_domain``, needed by ``HyperBusStream`` to split bursts at tCSM.
 
     clock_domain : str
-        Name of HyperBus clock domain.
+        Name of HyperBus clock domain, the PHY must run in it too. ``HyperBusMMAP`` and ``HyperBusMaster``
+        count PHY cycles, so they run in this domain as well and the clock domain crossing is on
+        ``bus`` and the CSRs, which stay in ``sys``.
 
     with_mmap : bool
         Enables memory-mapped SPI flash controller.
@@ -50,24 +54,63 @@ class HyperBus(Module, AutoCSR, AutoDoc):
     mmap_endianness : string
         If endianness is set to ``small`` then byte order of each 32-bit word comming MMAP core will be reversed.
 
+    mmap_wrap_bytes : int
+        Wishbone wrapping bursts of this size become HyperRAM wrapped bursts, must match the CR0 burst
+        length.
+
+    with_stream : bool
+        Enables ``HyperBusStream``, the stream frontend for sequential buffers, as ``stream``. Its
+        interfaces are in ``clock_domain``.
+
+    with_axi : bool
+        Enables ``HyperBusAXI`` in front of the MMAP Wishbone bus, needs ``with_mmap``. The MMAP is
+        then accessed through ``axi`` and ``bus`` isn't exposed.
+
     Attributes
     ----------
     bus : Interface(), out
-        Wishbone interface for memory-mapped flash access.
+        Wishbone interface for memory-mapped flash access, without ``with_axi``.
+
+    axi : AXIInterface(), out
+        AXI4 interface for memory-mapped access, in ``sys``, with ``with_axi``.
+
+    reg_bus : Interface(), out
+        Wishbone window on the HyperRAM registers (ID0, ID1, CR0, CR1), with ``with_mmap``.
+
+    master_bus : Interface(), out
+        Wishbone window on the ``HyperBusMaster`` TX/RX FIFOs, with ``with_master``.
+
+    ev : EventManager
+        ``HyperBusMaster`` events, with ``with_master``. Here for the SoC IRQ map, its CSRs are the
+        master's.
     """
 
-    def __init__(self, phy, clock_domain="sys",
-        with_mmap=True, mmap_endianness="big",
+    def __init__(self, phy, clock_domain="sys", clk_freq=None,
+        with_mmap=True, mmap_endianness="big", mmap_wrap_bytes=32,
         with_master=True, master_tx_fifo_depth=1, master_rx_fifo_depth=1,
+        with_stream=False, stream_fifo_depth=16,
+        with_axi=False, axi_id_width=1, axi_max_outstanding=4,
         with_csr=True):
 
-        self.submodules.crossbar = crossbar = HyperBusCrossbar(clock_domain)
+        self.submodules.crossbar = crossbar = ClockDomainsRenamer(clock_domain)(HyperBusCrossbar("sys"))
         self.comb += phy.cs.eq(crossbar.cs)
 
+        assert with_mmap or not with_axi
         if with_mmap:
-            self.submodules.mmap = mmap = HyperBusMMAP(endianness=mmap_endianness)
+            self.submodules.mmap = mmap = HyperBusMMAP(endianness=mmap_endianness,
+                clock_domain  = clock_domain,
+                burst_timeout = 5 if clock_domain == "sys" else 16,
+                wrap_bytes    = mmap_wrap_bytes)
             port_mmap = crossbar.get_port(mmap.cs)
-            self.bus = mmap.bus
+            self.reg_bus = mmap.reg_bus
+            if with_axi:
+                self.submodules.axi_frontend = axi_frontend = HyperBusAXI(
+                    id_width        = axi_id_width,
+                    max_outstanding = axi_max_outstanding)
+                self.axi = axi_frontend.bus
+                self.comb += axi_frontend.wishbone.connect(mmap.bus)
+            else:
+                self.bus = mmap.bus
             self.comb += [
                 port_mmap.source.connect(mmap.sink),
                 mmap.source.connect(port_mmap.sink),
@@ -77,20 +120,30 @@ class HyperBus(Module, AutoCSR, AutoDoc):
         if with_master:
             self.submodules.master = master = HyperBusMaster(
                 tx_fifo_depth = master_tx_fifo_depth,
-                rx_fifo_depth = master_rx_fifo_depth)
+                rx_fifo_depth = master_rx_fifo_depth,
+                clock_domain  = clock_domain)
             port_master = crossbar.get_port(master.cs)
+            self.master_bus = master.bus
+            self.ev = master.ev
+            self.autocsr_exclude = {"ev"}
             self.comb += [
                 port_master.source.connect(master.sink),
                 master.source.connect(port_master.sink),
             ]
-
-        if clock_domain != "sys":
+        if with_stream:
+            assert clk_freq is not None
+            self.submodules.stream = streamer = ClockDomainsRenamer(clock_domain)(HyperBusStream(clk_freq,
+                endianness = mmap_endianness,
+                fifo_depth = stream_fifo_depth))
+            port_stream = crossbar.get_port(streamer.cs)
             self.comb += [
-                crossbar.tx_cdc.source.connect(phy.sink),
-                phy.source.connect(crossbar.rx_cdc.sink),
-            ]
-        else:
-            self.comb += [
-                crossbar.master.source.connect(phy.sink),
-                phy.source.connect(crossbar.master.sink),
+                port_stream.source.connect(streamer.sink),
+                streamer.source.connect(port_stream.sink),
             ]
+            if with_mmap:
+                self.comb += streamer.latency_cycles.eq(mmap.latency_cycles)
+
+        self.comb += [
+            crossbar.master.source.connect(phy.sink),
+            phy.source.connect(crossbar.master.sink),
+        ]
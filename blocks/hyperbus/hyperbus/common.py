@@ -5,7 +5,9 @@
 # SPDX-License-Identifier: BSD-2-Clause
 
 from migen import *
-from migen.genlib.cdc import MultiReg
+from migen.genlib.cdc import MultiReg, PulseSynchronizer
+
+from litex.soc.interconnect import wishbone
 
 # Core <-> PHY Layouts -----------------------------------------------------------------------------
 
@@ -44,3 +46,99 @@ class ResyncReg(Module):
             self.comb += dst.eq(src)
         else:
             self.specials += MultiReg(src, dst, clock_domain)
+
+
+class ResyncFields(Module):
+    """Fields of a ``CSRStorage`` in ``clock_domain``.
+
+    Each field is an attribute of the same name. Pulse fields go through a ``PulseSynchronizer``, the
+    others through ``ResyncReg``, so they must be written a few cycles before a pulse field that
+    acts on them.
+    """
+    def __init__(self, csr, clock_domain):
+        for field in csr.fields.fields:
+            src = getattr(csr.fields, field.name)
+            dst = Signal(field.size, name=field.name)
+            setattr(self, field.name, dst)
+            if field.pulse and clock_domain != "sys":
+                ps = PulseSynchronizer("sys", clock_domain)
+                self.submodules += ps
+                self.comb += [ps.i.eq(src), dst.eq(ps.o)]
+            else:
+                self.submodules += ResyncReg(src, dst, clock_domain)
+
+
+class WishboneCDC(Module):
+    """Wishbone crossing from ``sys`` to ``clock_domain``, one access at a time.
+
+    The access is registered in ``sys`` and handed over with a ``PulseSynchronizer``, the response
+    comes back the same way. Costs a few cycles of each domain per access.
+
+    Attributes
+    ----------
+    slave : Interface(), in
+        ``sys`` side.
+
+    master : Interface(), out
+        ``clock_domain`` side.
+    """
+    def __init__(self, clock_domain):
+        self.slave  = slave  = wishbone.Interface()
+        self.master = master = wishbone.Interface()
+
+        if clock_domain == "sys":
+            self.comb += slave.connect(master)
+            return
+
+        self.submodules.req = req = PulseSynchronizer("sys", clock_domain)
+        self.submodules.ack = ack = PulseSynchronizer(clock_domain, "sys")
+
+        adr     = Signal.like(slave.adr)
+        dat_w   = Signal.like(slave.dat_w)
+        sel     = Signal.like(slave.sel)
+        we      = Signal()
+        cti     = Signal.like(slave.cti)
+        bte     = Signal.like(slave.bte)
+        dat_r   = Signal.like(master.dat_r)
+        pending = Signal()
+        active  = Signal()
+
+        # sys: register the access, wait for its response.
+        self.comb += req.i.eq(slave.cyc & slave.stb & ~pending)
+        self.sync += [
+            If(req.i,
+                adr.eq(slave.adr),
+                dat_w.eq(slave.dat_w),
+                sel.eq(slave.sel),
+                we.eq(slave.we),
+                cti.eq(slave.cti),
+                bte.eq(slave.bte),
+                pending.eq(1),
+            ),
+            If(ack.o, pending.eq(0)),
+        ]
+        self.comb += [
+            slave.ack.eq(ack.o),
+            slave.dat_r.eq(dat_r),
+        ]
+
+        # clock_domain: run it, the registered access is stable until the response is back.
+        sync = getattr(self.sync, clock_domain)
+        self.comb += [
+            master.cyc.eq(active),
+            master.stb.eq(active),
+            master.adr.eq(adr),
+            master.dat_w.eq(dat_w),
+            master.sel.eq(sel),
+            master.we.eq(we),
+            master.cti.eq(cti),
+            master.bte.eq(bte),
+            ack.i.eq(active & master.ack),
+        ]
+        sync += [
+            If(req.o, active.eq(1)),
+            If(ack.i,
+                active.eq(0),
+                dat_r.eq(master.dat_r),
+            ),
+        ]
@@ -6,9 +6,11 @@
 
 from migen import *
 from migen.genlib.fsm import FSM, NextState
+from migen.genlib.cdc import PulseSynchronizer
 
-from litex.soc.interconnect import stream
+from litex.soc.interconnect import stream, wishbone
 from litex.soc.interconnect.csr import *
+from litex.soc.interconnect.csr_eventmanager import *
 
 from hyperbus.common import *
 
@@ -18,6 +20,17 @@ class HyperBusMaster(Module, AutoCSR):
 
     The ``HyperBusMaster`` class provides a DDR Hyperbus master that can be controlled using CSRs.
 
+    The TX/RX FIFOs are also a Wishbone window, ``bus``: a store to any address in it pushes to the TX
+    FIFO like a ``rxtx`` write, a load pops the RX FIFO like a ``rxtx`` read. Bulk transfers then use
+    plain loads and stores instead of CSR accesses. An access to a full TX or empty RX FIFO waits for
+    it, check ``status`` first as with ``rxtx``.
+
+    Completion and the FIFO levels are events of ``ev``, so firmware can take an interrupt instead of
+    polling ``hyperbus_status``: ``done`` when a transaction ends, ``rx`` while the RX FIFO holds at
+    least ``fifo_threshold.rx`` words, ``tx`` while the TX FIFO holds at most ``fifo_threshold.tx``
+    words. The FIFOs are in ``sys``, with another ``clock_domain`` the crossings to the PHY side hold
+    up to another FIFO depth of words that the levels don't count.
+
     It supports multiple access modes with help of ``width`` and ``mask`` registers which can be used to configure the PHY into any supported SDR mode (single/dual/quad/octal).
 
     Parameters
@@ -28,6 +41,10 @@ class HyperBusMaster(Module, AutoCSR):
     cs_width : int
         Number of CS lines to support.
 
+    clock_domain : str
+        Clock domain of the PHY. The master counts PHY cycles, so it runs in the same domain, the CSRs
+        stay in ``sys``.
+
     Attributes
     ----------
     source : Endpoint(spi_phy2core_layout), out
@@ -39,12 +56,18 @@ class HyperBusMaster(Module, AutoCSR):
     cs : Signal(), out
         Slave CS signal.
 
+    bus : Interface(), in
+        Wishbone window on the TX/RX FIFOs, in ``sys``.
+
+    ev : EventManager
+        ``done``, ``rx`` and ``tx`` events.
     """
 
-    def __init__(self, cs_width=1, tx_fifo_depth=1, rx_fifo_depth=1):
+    def __init__(self, cs_width=1, tx_fifo_depth=1, rx_fifo_depth=1, clock_domain="sys"):
         self.sink = stream.Endpoint(spi_phy2core_layout)
         self.source = stream.Endpoint(spi_core2phy_layout)
         self.cs = Signal(cs_width)
+        self.bus = bus = wishbone.Interface()
         assert self.sink.data.nbits == self.source.data.nbits
 
         self._cs = CSRStorage(cs_width)
@@ -175,22 +198,67 @@ class HyperBusMaster(Module, AutoCSR):
             ]
         )
 
+        self._fifo_threshold = CSRStorage(
+            fields=[
+                CSRField(
+                    "rx", size=8, offset=0, reset=1, description="``rx`` event while the RX FIFO holds at least this many words."
+                ),
+                CSRField(
+                    "tx", size=8, offset=8, reset=0, description="``tx`` event while the TX FIFO holds at most this many words."
+                ),
+            ],
+            description="FIFO event thresholds.",
+        )
+
+        self.submodules.ev = EventManager()
+        self.ev.done = EventSourcePulse(description="Transaction done, the master is back in IDLE.")
+        self.ev.rx   = EventSourceLevel(description="RX FIFO at or above ``fifo_threshold.rx``.")
+        self.ev.tx   = EventSourceLevel(description="TX FIFO at or below ``fifo_threshold.tx``.")
+        self.ev.finalize()
+
         # # #
 
-        # FIFOs.
+        # FIFOs in sys next to the CSRs, so their levels are there for the events. The crossings
+        # buffer a burst at the PHY rate, the FSM works on their clock_domain ends.
         tx_fifo = stream.SyncFIFO(spi_core2phy_layout, depth=tx_fifo_depth)
         rx_fifo = stream.SyncFIFO(spi_phy2core_layout, depth=rx_fifo_depth)
-        self.submodules += tx_fifo, rx_fifo
-        
+        tx_cdc  = stream.ClockDomainCrossing(spi_core2phy_layout, cd_from="sys", cd_to=clock_domain,
+            depth=max(4, 2**log2_int(tx_fifo_depth, False)))
+        rx_cdc  = stream.ClockDomainCrossing(spi_phy2core_layout, cd_from=clock_domain, cd_to="sys",
+            depth=max(4, 2**log2_int(rx_fifo_depth, False)))
+        self.submodules += tx_fifo, rx_fifo, tx_cdc, rx_cdc
+        self.comb += [
+            tx_fifo.source.connect(tx_cdc.sink),
+            rx_cdc.source.connect(rx_fifo.sink),
+        ]
+        tx = tx_cdc.source
+
+        # CSRs used in clock_domain.
+        self.submodules.cmd  = cmd  = ResyncFields(self._hyperbus_cmd,  clock_domain)
+        self.submodules.adr  = adr  = ResyncFields(self._hyperbus_adr,  clock_domain)
+        self.submodules.ctrl = ctrl = ResyncFields(self._hyperbus_ctrl, clock_domain)
+
 
         # # SPI CS.
         # self.comb += self.cs.eq(self._cs.storage)
 
+        # FIFO window, push/pop on the access then ack with registered data like a SRAM.
+        bus_write = Signal()
+        bus_read  = Signal()
+        self.comb += [
+            bus_write.eq(bus.cyc & bus.stb & ~bus.ack &  bus.we),
+            bus_read.eq( bus.cyc & bus.stb & ~bus.ack & ~bus.we),
+        ]
+        self.sync += [
+            bus.ack.eq((bus_write & tx_fifo.sink.ready) | (bus_read & rx_fifo.source.valid)),
+            If(bus_read, bus.dat_r.eq(rx_fifo.source.data)),
+        ]
+
         # # SPI TX (MOSI).
         self.comb += [
-            tx_fifo.sink.valid.eq(self._rxtx.re),
+            tx_fifo.sink.valid.eq(self._rxtx.re | bus_write),
             self._status.fields.tx_ready.eq(tx_fifo.sink.ready),
-            tx_fifo.sink.data.eq(self._rxtx.r),
+            tx_fifo.sink.data.eq(Mux(bus_write, bus.dat_w, self._rxtx.r)),
             tx_fifo.sink.rwds.eq(0x0),
             tx_fifo.sink.rwds_en.eq(0x3),
             tx_fifo.sink.len.eq(16 << self._hyperbus_cfg.fields.data_size),
@@ -201,14 +269,44 @@ class HyperBusMaster(Module, AutoCSR):
 
 
         # Hyperbus
-        self.submodules.fsm = fsm = FSM(reset_state="IDLE")
+        self.submodules.fsm = fsm = ClockDomainsRenamer(clock_domain)(FSM(reset_state="IDLE"))
         self.comb += [
         ]
 
         # Status
+        fsm_r = Signal(reset=1)
+        sync  = getattr(self.sync, clock_domain)
+        sync += fsm_r.eq(fsm.ongoing("IDLE"))
+        if clock_domain == "sys":
+            self.comb += [
+                self._hyperbus_status.fields.idle.eq(fsm.ongoing("IDLE")),
+                self._hyperbus_status.fields.busy.eq(~fsm.ongoing("IDLE")),
+                self.ev.done.trigger.eq(fsm.ongoing("IDLE") & ~fsm_r),
+            ]
+        else:
+            # Busy from the start write until the FSM is back in IDLE, firmware polling right after
+            # the start must not see the FSM before the start reached it.
+            busy  = Signal()
+            done  = PulseSynchronizer(clock_domain, "sys")
+            self.submodules += done
+            self.comb += done.i.eq(fsm.ongoing("IDLE") & ~fsm_r)
+            self.sync += If(self._hyperbus_ctrl.fields.start,
+                busy.eq(1)
+            ).Elif(done.o,
+                busy.eq(0)
+            )
+            self.comb += [
+                self._hyperbus_status.fields.idle.eq(~busy),
+                self._hyperbus_status.fields.busy.eq(busy),
+                self.ev.done.trigger.eq(done.o),
+            ]
+
+        # FIFO events.
+        rx_level = rx_fifo.level if rx_fifo_depth >= 2 else rx_fifo.source.valid
+        tx_level = tx_fifo.level if tx_fifo_depth >= 2 else tx_fifo.source.valid
         self.comb += [
-            self._hyperbus_status.fields.idle.eq(fsm.ongoing("IDLE")),
-            self._hyperbus_status.fields.busy.eq(~fsm.ongoing("IDLE")),
+            self.ev.rx.trigger.eq(rx_level >= self._fifo_threshold.fields.rx),
+            self.ev.tx.trigger.eq(tx_level <= self._fifo_threshold.fields.tx),
         ]
 
         _latency_cnt = Signal(4)
@@ -224,9 +322,9 @@ class HyperBusMaster(Module, AutoCSR):
             self.source.width.eq(0),
             self.source.mask.eq(0),
             # Wait for start from CSR
-            If(self._hyperbus_ctrl.fields.start,
-                If(self._hyperbus_ctrl.fields.data_write_phase,
-                    If(tx_fifo.source.valid, 
+            If(ctrl.start,
+                If(ctrl.data_write_phase,
+                    If(tx.valid, 
                        NextState("CMD_PHASE")
                     ).Else(
                         NextState("TX_DATA_WAIT"),
@@ -246,7 +344,7 @@ class HyperBusMaster(Module, AutoCSR):
             self.source.mask.eq(0),
             # Wait for data in tx_fifo from CSR
             If(
-                self._rxtx.re | tx_fifo.source.valid,
+                tx.valid | (self._rxtx.re if clock_domain == "sys" else 0),
                 NextState("CMD_PHASE"),
             ),
         )
@@ -254,13 +352,13 @@ class HyperBusMaster(Module, AutoCSR):
         fsm.act(
             "CMD_PHASE",
             self.source.valid.eq(True),
-            self.source.data.eq(self._hyperbus_cmd.fields.command),
+            self.source.data.eq(cmd.command),
             self.source.len.eq(16),
             self.source.width.eq(8),
             self.source.mask.eq(0xFF),
             If(self.source.ready,
                 If(
-                    self._hyperbus_ctrl.fields.adr_phase,
+                    ctrl.adr_phase,
                     NextState("ADR_PHASE"),
                 ).Else(
                     NextState("IDLE"),
@@ -271,29 +369,29 @@ class HyperBusMaster(Module, AutoCSR):
         fsm.act(
             "ADR_PHASE",
             self.source.valid.eq(True),
-            self.source.data.eq(self._hyperbus_adr.fields.address),
+            self.source.data.eq(adr.address),
             self.source.len.eq(32),
             self.source.width.eq(8),
             self.source.mask.eq(0xFF),
             If(
                 self.source.ready,
                 If(
-                    self._hyperbus_ctrl.fields.latency_phase,
+                    ctrl.latency_phase,
                     NextState("LATENCY"),
                     NextValue(_latency_flag, 0),
                     If(
-                        self._hyperbus_ctrl.fields.data_read_phase,
+                        ctrl.data_read_phase,
                         NextValue(_latency_cnt, 7 - 2),
                     ).Else(
                         NextValue(_latency_cnt, 7 - 3),
                     ),
                 )
                 .Elif(
-                    self._hyperbus_ctrl.fields.data_read_phase,
+                    ctrl.data_read_phase,
                     NextState("READ_DATA"),
                 )
                 .Elif(
-                    self._hyperbus_ctrl.fields.data_write_phase,
+                    ctrl.data_write_phase,
                     NextState("WRITE_DATA"),
                 )
                 .Else(
@@ -315,10 +413,10 @@ class HyperBusMaster(Module, AutoCSR):
                 If(
                     ~_latency_flag,
                     If(
-                        self._hyperbus_ctrl.fields.data_read_phase,
+                        ctrl.data_read_phase,
                         NextState("READ_DATA"),
                     ).Elif(
-                        self._hyperbus_ctrl.fields.data_write_phase,
+                        ctrl.data_write_phase,
                         NextState("WRITE_DATA"),
                     ),
                 ).Else(
@@ -340,11 +438,11 @@ class HyperBusMaster(Module, AutoCSR):
             If(
                 _latency_cnt == 0,
                 If(
-                    self._hyperbus_ctrl.fields.data_read_phase,
+                    ctrl.data_read_phase,
                     NextState("READ_DATA"),
                 )
                 .Elif(
-                    self._hyperbus_ctrl.fields.data_write_phase,
+                    ctrl.data_write_phase,
                     NextState("WRITE_DATA"),
                 )
                 .Else(
@@ -372,9 +470,9 @@ class HyperBusMaster(Module, AutoCSR):
 
         fsm.act(
             "WRITE_DATA",
-            tx_fifo.source.connect(self.source),
+            tx.connect(self.source),
             If(
-                ~tx_fifo.source.valid,
+                ~tx.valid,
                 NextValue(delay_cnt, 1),
                 NextState("FIN"),
             ),
@@ -399,12 +497,12 @@ class HyperBusMaster(Module, AutoCSR):
         # SPI RX (MISO).
         self.comb += [
             If(fsm.ongoing("READ_DATA") | fsm.ongoing("FIN"),
-               self.sink.connect(rx_fifo.sink)
+               self.sink.connect(rx_cdc.sink)
             ).Else(
                 self.sink.ready.eq(1),
             ),
 
-            rx_fifo.source.ready.eq(self._rxtx.we),
+            rx_fifo.source.ready.eq(self._rxtx.we | bus_read),
             self._status.fields.rx_ready.eq(rx_fifo.source.valid),
             self._rxtx.w.eq(rx_fifo.source.data),
         ]
@@ -22,11 +22,31 @@ class HyperBusMMAP(Module, AutoCSR):
 
     It supports sequential accesses so that command and address is only sent when necessary.
 
+    Wishbone wrapping bursts of ``wrap_bytes`` (``bte``) are issued as HyperRAM wrapped bursts: the
+    requested word comes first and the burst wraps within the group like the bus does, so a cache
+    line refill starting at the critical word is a single burst.
+
+    The HyperRAM registers are a second Wishbone window, ``reg_bus``, one 32-bit word each with the
+    16-bit value in the low half: ID0, ID1, CR0, CR1. A store to CR0 also sets ``latency_cycles`` from
+    its latency code, so a single store retunes the device and the controller. The burst length is not
+    followed: firmware must keep the CR0 burst length bits at ``wrap_bytes``.
+
     Parameters
     ----------
     endianness : string
         If endianness is set to ``little`` then byte order of each 32-bit word coming from flash will be reversed.
 
+    clock_domain : str
+        Clock domain of the PHY. The controller counts PHY cycles, so it runs in the same domain, ``bus``
+        and the CSRs stay in ``sys``.
+
+    burst_timeout : int
+        Idle cycles after an access before the burst is closed.
+
+    wrap_bytes : int
+        Wrapped burst length, must match the burst length in CR0 (32 bytes after power-on), ``None``
+        only issues linear bursts. Other Wishbone wrap sizes use linear bursts.
+
     Attributes
     ----------
     source : Endpoint(spi_core2phy_layout), out
@@ -36,49 +56,103 @@ class HyperBusMMAP(Module, AutoCSR):
         PHY data interface.
 
     bus : Interface(), out
-        Wishbone interface for memory-mapped flash access.
+        Wishbone interface for memory-mapped flash access, in ``sys``.
+
+    reg_bus : Interface(), out
+        Wishbone window on the HyperRAM registers, in ``sys``.
 
     cs : Signal(), out
         CS signal for the flash chip, should be connected to cs signal of the PHY.
 
     dummy_bits : CSRStorage
         Register which hold a number of dummy bits to send during transmission.
+
+    latency_cycles : Signal(8), out
+        Initial latency from the ``latency_cycles`` CSR, in ``clock_domain``.
     """
-    def __init__(self, endianness="big"):
+    def __init__(self, endianness="big", clock_domain="sys", burst_timeout=5, wrap_bytes=32):
         self.source = source = stream.Endpoint(spi_core2phy_layout)
         self.sink   = sink   = stream.Endpoint(spi_phy2core_layout)
-        self.bus    = bus    = wishbone.Interface()
         self.cs     = cs     = Signal()
 
+        self.submodules.bus_cdc = WishboneCDC(clock_domain)
+        self.bus = self.bus_cdc.slave
+        bus      = self.bus_cdc.master
+
+        self.submodules.reg_bus_cdc = WishboneCDC(clock_domain)
+        self.reg_bus = self.reg_bus_cdc.slave
+        reg_bus      = self.reg_bus_cdc.master
+
         # Burst Control.
         burst_cs      = Signal()
         burst_we      = Signal()
         burst_adr     = Signal(len(bus.adr), reset_less=True)
-        burst_timeout = WaitTimer(5) # TODO Fix this
+        burst_wrap    = Signal()
+        burst_timeout = ClockDomainsRenamer(clock_domain)(WaitTimer(burst_timeout))
         self.submodules += burst_timeout
 
         cmd_bits  = 8
         data_bits = 32
 
-        self._latency_cycles = CSRStorage(8, reset=6)
-        _latency_cycles = self._latency_cycles.storage
+        self._latency_cycles = CSRStorage(8, reset=6, write_from_dev=True)
+        self.latency_cycles = _latency_cycles = Signal(8)
+        self.submodules += ResyncReg(self._latency_cycles.storage, _latency_cycles, clock_domain)
         _extra_latency_flag = Signal()
 
+        # Wrapped Bursts.
+        bus_wrap       = Signal()
+        burst_adr_next = Signal(len(bus.adr))
+        if wrap_bytes is None:
+            self.comb += burst_adr_next.eq(burst_adr + 1)
+        else:
+            wrap_bits = log2_int(wrap_bytes // 4)
+            self.comb += [
+                bus_wrap.eq((bus.cti == wishbone.CTI_BURST_INCREMENTING) &
+                            (bus.bte == {16: 0b01, 32: 0b10, 64: 0b11}[wrap_bytes])),
+                burst_adr_next.eq(burst_adr + 1),
+                If(burst_wrap,
+                    burst_adr_next[wrap_bits:].eq(burst_adr[wrap_bits:]),
+                ),
+            ]
+
+        # Register Accesses.
+        reg_active = Signal()
+        reg_adr    = Signal(12)
+        self.comb += Case(reg_bus.adr[0:2], {
+            0: reg_adr.eq(0x000), # ID0
+            1: reg_adr.eq(0x001), # ID1
+            2: reg_adr.eq(0x800), # CR0
+            3: reg_adr.eq(0x801), # CR1
+        })
+        # CR0 latency code to clock count, latched before the write reaches the device.
+        self.comb += If(self.reg_bus.cyc & self.reg_bus.stb & self.reg_bus.we & (self.reg_bus.adr[0:2] == 2),
+            self._latency_cycles.we.eq(1),
+            self._latency_cycles.dat_w.eq((self.reg_bus.dat_w[4:8] + 5)[0:4]),
+        )
+
+        we = Signal()
+        self.comb += we.eq(Mux(reg_active, reg_bus.we, bus.we))
+
         addr = Signal(24)
         ca_bits = Signal(48)
         self.comb += [
-            ca_bits[47].eq(~bus.we), # read = 1 / write = 0
-            ca_bits[46].eq(0), # Memory Space
-            ca_bits[45].eq(1), # Linear bursts
-            ca_bits[16:45].eq(addr[2:24]), # Upper column address
+            ca_bits[47].eq(~we), # read = 1 / write = 0
+            ca_bits[46].eq(reg_active), # Memory or Register Space
+            ca_bits[45].eq(~bus_wrap | reg_active), # Linear or wrapped bursts
+            If(reg_active,
+                ca_bits[16:45].eq(reg_adr[3:]), # Upper column address
+                ca_bits[0:3].eq(reg_adr[0:3]), # Lower column address
+            ).Else(
+                ca_bits[16:45].eq(addr[2:24]), # Upper column address
+                ca_bits[0:3].eq(Cat(Constant(0, 1), addr[0:2])), # Lower column address
+            ),
             ca_bits[3:16].eq(0), # Reserved
-            ca_bits[0:3].eq(Cat(Constant(0, 1), addr[0:2])), # Lower column address
         ]
 
         latency_cnt = Signal(5)
 
         # FSM.
-        self.submodules.fsm = fsm = FSM(reset_state="IDLE")
+        self.submodules.fsm = fsm = ClockDomainsRenamer(clock_domain)(FSM(reset_state="IDLE"))
         fsm.act("IDLE",
             # Keep CS active after Burst for Timeout.
             burst_timeout.wait.eq(1),
@@ -100,11 +174,17 @@ class HyperBusMMAP(Module, AutoCSR):
                     cs.eq(0),
                     NextState("BURST-CMD")
                 )
+            # On Register access, close the Burst and send it on its own.
+            ).Elif(reg_bus.cyc & reg_bus.stb,
+                cs.eq(0),
+                NextValue(burst_cs, 0),
+                NextValue(reg_active, 1),
+                NextState("BURST-CMD")
             )
         )
 
-        # TODO handle variable latency
-        # TODO handle configurable latency
+        # Both latency phases count latency_cycles, a CR0 store through reg_bus updates it. The CR0
+        # burst length is not followed, wrapped bursts always use wrap_bytes.
 
         fsm.act("BURST-CMD",
             cs.eq(1),
@@ -116,6 +196,7 @@ class HyperBusMMAP(Module, AutoCSR):
             If(source.ready,
                 NextValue(burst_adr, bus.adr),
                 NextValue(burst_we, bus.we),
+                NextValue(burst_wrap, bus_wrap),
                 NextState("BURST-ADDR"),
             )
         )
@@ -127,10 +208,30 @@ class HyperBusMMAP(Module, AutoCSR):
             source.data.eq(ca_bits[0:32]),
             source.len.eq(32),    
             source.mask.eq(0xFF),
-            NextValue(burst_cs, 1),
+            NextValue(burst_cs, ~reg_active),
             NextValue(latency_cnt, _latency_cycles-1), # Latency count starts in the CA bits
             NextValue(_extra_latency_flag, 0),
-            NextState("INITIAL-LATENCY"),
+            # Register writes have no latency.
+            If(reg_active & reg_bus.we,
+                NextState("REG-WR"),
+            ).Else(
+                NextState("INITIAL-LATENCY"),
+            )
+        )
+
+        fsm.act("REG-WR",
+            cs.eq(1),
+            source.valid.eq(1),
+            source.data.eq(reg_bus.dat_w[0:16]),
+            source.len.eq(16),
+            source.mask.eq(0xFF),
+            source.rwds_en.eq(1),
+            source.last.eq(1),
+            If(source.ready,
+                reg_bus.ack.eq(1),
+                NextValue(reg_active, 0),
+                NextState("IDLE"),
+            )
         )
 
         fsm.act("INITIAL-LATENCY",
@@ -150,13 +251,13 @@ class HyperBusMMAP(Module, AutoCSR):
 
                 # Extra Latency Cycle
                 ).Else(
-                    If(bus.we,
+                    If(we,
                         source.mask.eq(0xFF),
                         source.rwds_en.eq(1),
                         NextState("BURST-WR"),
                     ).Else(
-                        NextValue(latency_cnt, 4),
-                        NextState("WAIT"),
+                        NextValue(latency_cnt, 1),
+                        NextState("BURST-RD"),
                     )
                 )
             )
@@ -168,11 +269,11 @@ class HyperBusMMAP(Module, AutoCSR):
             source.mask.eq(0),
             source.len.eq(16),
             NextValue(latency_cnt, latency_cnt - 1),
-            If((latency_cnt == 0) & bus.we,
+            If((latency_cnt == 0) & we,
                 source.mask.eq(0xFF),
                 source.rwds_en.eq(1),
                 NextState("BURST-WR"),
-            ).Elif((latency_cnt == 1) & ~bus.we,
+            ).Elif((latency_cnt == 1) & ~we,
                 NextValue(latency_cnt, 2),
                 NextState("BURST-RD"),
             )
@@ -186,10 +287,11 @@ class HyperBusMMAP(Module, AutoCSR):
             source.mask.eq(0xFF),
             source.len.eq(32),
             source.rwds_en.eq(1),
-            source.rwds.eq(0x0),
+            # RWDS masks the bytes not selected, first byte on the bus in the MSB.
+            source.rwds.eq({"big": ~bus.sel, "little": ~Cat(bus.sel[3], bus.sel[2], bus.sel[1], bus.sel[0])}[endianness]),
             If(source.ready,
                 bus.ack.eq(1),
-                NextValue(burst_adr, burst_adr + 1),
+                NextValue(burst_adr, burst_adr_next),
                 NextState("IDLE"),
             )
         )
@@ -217,9 +319,15 @@ class HyperBusMMAP(Module, AutoCSR):
         fsm.act("BURST-DAT",
             cs.eq(1),
             sink.ready.eq(1),
-            bus.dat_r.eq({"big": sink.data, "little": reverse_bytes(sink.data)}[endianness]),
-
-            bus.ack.eq(1),
-            NextValue(burst_adr, burst_adr + 1),
+            If(reg_active,
+                # Register value in the first 16 bits.
+                reg_bus.dat_r.eq(sink.data[16:32]),
+                reg_bus.ack.eq(1),
+                NextValue(reg_active, 0),
+            ).Else(
+                bus.dat_r.eq({"big": sink.data, "little": reverse_bytes(sink.data)}[endianness]),
+                bus.ack.eq(1),
+                NextValue(burst_adr, burst_adr_next),
+            ),
             NextState("IDLE"),
         )
@@ -0,0 +1,142 @@
+#
+# This file is part of HyperBus
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+from migen import *
+
+from litex.soc.interconnect import wishbone, stream
+from litex.soc.interconnect.axi import *
+
+
+class HyperBusAXI(Module):
+    """AXI4 frontend for ``HyperBusMMAP``.
+
+    The ``HyperBusAXI`` class provides an AXI4 slave in front of the Wishbone interface of the memory-mapped
+    core::
+
+        axi = HyperBusAXI()
+        self.comb += axi.wishbone.connect(hyperbus.bus)
+
+    ``HyperBus(phy, with_axi=True)`` does this and exposes ``bus`` as its ``axi``.
+
+    Up to ``max_outstanding`` read and ``max_outstanding`` write bursts are accepted ahead of the one being
+    served, so the next burst is decoded while the current one moves data and starts right after it. A burst
+    that continues the previous one's addresses continues the open HyperRAM burst, without a new
+    Command/Address phase. Bursts are served in order per direction, reads and writes alternate when both
+    are waiting. INCR and WRAP bursts of 32-bit beats are supported, WRAP bursts of the MMAP ``wrap_bytes``
+    become HyperRAM wrapped bursts.
+
+    Parameters
+    ----------
+    id_width : int
+        AXI ID width.
+
+    max_outstanding : int
+        Read and write bursts accepted ahead of the current one.
+
+    Attributes
+    ----------
+    bus : AXIInterface(), in
+        AXI4 slave, byte addresses relative to the start of the HyperRAM.
+
+    wishbone : Interface(), out
+        Wishbone master, connect to ``HyperBusMMAP.bus``.
+    """
+    def __init__(self, id_width=1, max_outstanding=4):
+        self.bus      = bus = AXIInterface(data_width=32, address_width=32, id_width=id_width)
+        self.wishbone = wb  = wishbone.Interface()
+
+        # Request queues.
+        ar_queue = stream.SyncFIFO(bus.ar.description, max_outstanding)
+        aw_queue = stream.SyncFIFO(bus.aw.description, max_outstanding)
+        w_queue  = stream.SyncFIFO(bus.w.description,  max_outstanding)
+        self.submodules += ar_queue, aw_queue, w_queue
+        self.comb += [
+            bus.ar.connect(ar_queue.sink),
+            bus.aw.connect(aw_queue.sink),
+            bus.w.connect(w_queue.sink),
+        ]
+
+        # Response queues, a Wishbone access is only started when its response has room.
+        r_queue = stream.SyncFIFO(bus.r.description, 2, buffered=True)
+        b_queue = stream.SyncFIFO(bus.b.description, max_outstanding)
+        self.submodules += r_queue, b_queue
+        self.comb += [
+            r_queue.source.connect(bus.r),
+            b_queue.source.connect(bus.b),
+        ]
+
+        # Burst to beats, shared by reads and writes.
+        ax_burst = AXIStreamInterface(layout=ax_description(32), id_width=id_width)
+        ax_beat  = AXIStreamInterface(layout=ax_description(32), id_width=id_width)
+        self.submodules.burst2beat = AXIBurst2Beat(ax_burst, ax_beat)
+
+        # Wishbone.
+        cti  = Signal(3)
+        bte  = Signal(2)
+        self.comb += [
+            cti.eq(Mux(ax_beat.last, wishbone.CTI_BURST_END, wishbone.CTI_BURST_INCREMENTING)),
+            If(ax_burst.burst == BURST_WRAP,
+                Case(ax_burst.len, {
+                    3:  bte.eq(0b01),
+                    7:  bte.eq(0b10),
+                    15: bte.eq(0b11),
+                }),
+            ),
+            wb.adr.eq(ax_beat.addr[2:]),
+            wb.cti.eq(cti),
+            wb.bte.eq(bte),
+        ]
+
+        # FSM.
+        last_read = Signal()
+        self.submodules.fsm = fsm = FSM(reset_state="IDLE")
+        fsm.act("IDLE",
+            If(ar_queue.source.valid & (~last_read | ~aw_queue.source.valid | ~b_queue.sink.ready),
+                NextValue(last_read, 1),
+                NextState("READ"),
+            ).Elif(aw_queue.source.valid & b_queue.sink.ready,
+                NextValue(last_read, 0),
+                NextState("WRITE"),
+            )
+        )
+        fsm.act("READ",
+            ar_queue.source.connect(ax_burst),
+            wb.cyc.eq(ax_beat.valid & r_queue.sink.ready),
+            wb.stb.eq(ax_beat.valid & r_queue.sink.ready),
+            wb.we.eq(0),
+            wb.sel.eq(0b1111),
+            r_queue.sink.valid.eq(wb.ack),
+            r_queue.sink.data.eq(wb.dat_r),
+            r_queue.sink.resp.eq(RESP_OKAY),
+            r_queue.sink.id.eq(ax_burst.id),
+            r_queue.sink.last.eq(ax_beat.last),
+            If(wb.ack,
+                ax_beat.ready.eq(1),
+                If(ax_beat.last,
+                    NextState("IDLE"),
+                )
+            )
+        )
+        fsm.act("WRITE",
+            aw_queue.source.connect(ax_burst),
+            wb.cyc.eq(ax_beat.valid & w_queue.source.valid),
+            wb.stb.eq(ax_beat.valid & w_queue.source.valid),
+            wb.we.eq(1),
+            wb.sel.eq(w_queue.source.strb),
+            wb.dat_w.eq(w_queue.source.data),
+            If(wb.ack,
+                ax_beat.ready.eq(1),
+                w_queue.source.ready.eq(1),
+                If(ax_beat.last,
+                    b_queue.sink.valid.eq(1),
+                    NextState("IDLE"),
+                )
+            )
+        )
+        self.comb += [
+            b_queue.sink.resp.eq(RESP_OKAY),
+            b_queue.sink.id.eq(ax_burst.id),
+        ]
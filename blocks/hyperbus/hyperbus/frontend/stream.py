@@ -0,0 +1,282 @@
+#
+# This file is part of HyperBus
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+from migen import *
+
+from litex.soc.interconnect import stream
+from litex.gen.common import reverse_bytes
+
+from hyperbus.common import *
+
+# HyperRAM maximum CS# low time, the device refreshes while CS# is high.
+TCSM = 4e-6
+
+# Cycles from a read beat accepted by the PHY to its 32-bit word on sink.data.
+READ_DATA_CYCLES = 5
+
+stream_cmd_layout  = [("adr", 32), ("length", 32)]
+stream_data_layout = [("data", 32)]
+
+
+class HyperBusStream(Module):
+    """Stream frontend for sequential HyperRAM buffers.
+
+    The ``HyperBusStream`` class moves data between LiteX streams and the HyperRAM with as few bursts
+    as possible, for capture and playback buffers that don't involve the CPU::
+
+        self.comb += [
+            hyperbus.stream.wr_cmd.adr.eq(0x100000),  # byte address
+            hyperbus.stream.wr_cmd.length.eq(0x4000), # bytes
+            hyperbus.stream.wr_cmd.valid.eq(start),
+            capture.source.connect(hyperbus.stream.wr_sink),
+        ]
+
+    A write command takes ``length`` bytes from ``wr_sink``, a read command sends ``length`` bytes to
+    ``rd_source`` with ``last`` on the final word. Each command is one linear burst, split when it would
+    hold CS# low longer than tCSM; the crossbar can serve other ports between the parts. A write burst
+    starts once half of ``fifo_depth`` words (or the whole command) are buffered, reads only run ahead
+    of ``rd_source`` by ``fifo_depth`` words, the clock is stopped while either waits. Commands are
+    acknowledged (``ready``) once their data was transferred, writes go first when both are pending.
+
+    Parameters
+    ----------
+    clk_freq : int
+        Frequency of the clock domain of the frontend, the one of the ``HyperBus`` core.
+
+    endianness : string
+        If endianness is set to ``little`` then byte order of each 32-bit word is reversed, like
+        ``HyperBusMMAP``.
+
+    fifo_depth : int
+        Words buffered in each direction.
+
+    Attributes
+    ----------
+    source : Endpoint(spi_core2phy_layout), out
+        PHY control interface.
+
+    sink : Endpoint(spi_phy2core_layout), in
+        PHY data interface.
+
+    cs : Signal(), out
+        CS signal for the HyperRAM.
+
+    latency_cycles : Signal(8), in
+        Initial latency, connect to ``HyperBusMMAP.latency_cycles``.
+
+    wr_cmd : Endpoint(stream_cmd_layout), in
+        Write command, 32-bit aligned byte address and length.
+
+    wr_sink : Endpoint(stream_data_layout), in
+        Data to write.
+
+    rd_cmd : Endpoint(stream_cmd_layout), in
+        Read command, 32-bit aligned byte address and length.
+
+    rd_source : Endpoint(stream_data_layout), out
+        Data read.
+    """
+    def __init__(self, clk_freq, endianness="big", fifo_depth=16):
+        self.source    = source = stream.Endpoint(spi_core2phy_layout)
+        self.sink      = sink   = stream.Endpoint(spi_phy2core_layout)
+        self.cs        = cs     = Signal()
+        self.wr_cmd    = wr_cmd = stream.Endpoint(stream_cmd_layout)
+        self.wr_sink   = stream.Endpoint(stream_data_layout)
+        self.rd_cmd    = rd_cmd = stream.Endpoint(stream_cmd_layout)
+        self.rd_source = stream.Endpoint(stream_data_layout)
+
+        self.latency_cycles = latency_cycles = Signal(8, reset=6)
+
+        # Burst length, leave room for the last beat and the read data still in flight.
+        cs_cycles     = Signal(16)
+        cs_max_cycles = int(TCSM * clk_freq) - (READ_DATA_CYCLES + 8)
+        assert cs_max_cycles > 64, "clk_freq too low to fit a HyperRAM burst in tCSM"
+        cs_wait       = Signal() # CS not on the bus yet, waiting for the crossbar
+        cs_timeout    = Signal()
+        self.sync += If(~cs | cs_wait, cs_cycles.eq(0)).Else(cs_cycles.eq(cs_cycles + 1))
+        self.comb += cs_timeout.eq(cs_cycles >= cs_max_cycles)
+
+        # FIFOs.
+        self.submodules.wr_fifo = wr_fifo = stream.SyncFIFO(stream_data_layout, fifo_depth, buffered=True)
+        self.submodules.rd_fifo = rd_fifo = stream.SyncFIFO(stream_data_layout, fifo_depth)
+        self.comb += [
+            self.wr_sink.connect(wr_fifo.sink),
+            rd_fifo.source.connect(self.rd_source),
+        ]
+
+        # Current command.
+        we        = Signal()
+        adr       = Signal(30)
+        remaining = Signal(30)
+        self.comb += sink.ready.eq(1)
+
+        # Read data, sampled READ_DATA_CYCLES after its beat.
+        rd_beat    = Signal()
+        rd_sample  = Signal()
+        rd_pending = Signal(max=READ_DATA_CYCLES + 2)
+        rd_left    = Signal(30)
+        rd_delay   = Signal(READ_DATA_CYCLES)
+        self.sync += rd_delay.eq(Cat(rd_beat, rd_delay))
+        self.comb += [
+            rd_sample.eq(rd_delay[-1]),
+            rd_fifo.sink.valid.eq(rd_sample),
+            rd_fifo.sink.data.eq({"big": sink.data, "little": reverse_bytes(sink.data)}[endianness]),
+            rd_fifo.sink.last.eq(rd_left == 1),
+        ]
+        self.sync += [
+            rd_pending.eq(rd_pending + rd_beat - rd_sample),
+            If(rd_sample, rd_left.eq(rd_left - 1)),
+        ]
+
+        ca_bits = Signal(48)
+        self.comb += [
+            ca_bits[47].eq(~we), # read = 1 / write = 0
+            ca_bits[46].eq(0), # Memory Space
+            ca_bits[45].eq(1), # Linear burst
+            ca_bits[16:45].eq(adr[2:]), # Upper column address
+            ca_bits[3:16].eq(0), # Reserved
+            ca_bits[0:3].eq(Cat(Constant(0, 1), adr[0:2])), # Lower column address
+        ]
+
+        latency_cnt        = Signal(8)
+        extra_latency_flag = Signal()
+
+        # FSM.
+        self.submodules.fsm = fsm = FSM(reset_state="IDLE")
+        fsm.act("IDLE",
+            If(remaining != 0,
+                # Continue the command after a tCSM split, once enough is buffered for a write.
+                If(~we | (wr_fifo.level >= Mux(remaining < fifo_depth//2, remaining, fifo_depth//2)),
+                    NextState("BURST-CMD")
+                )
+            ).Elif(wr_cmd.valid,
+                NextValue(we, 1),
+                NextValue(adr, wr_cmd.adr[2:]),
+                NextValue(remaining, wr_cmd.length[2:]),
+                If(wr_cmd.length[2:] == 0, wr_cmd.ready.eq(1)),
+            ).Elif(rd_cmd.valid,
+                NextValue(we, 0),
+                NextValue(adr, rd_cmd.adr[2:]),
+                NextValue(remaining, rd_cmd.length[2:]),
+                NextValue(rd_left, rd_cmd.length[2:]),
+                If(rd_cmd.length[2:] == 0, rd_cmd.ready.eq(1)),
+            )
+        )
+
+        fsm.act("BURST-CMD",
+            cs.eq(1),
+            source.valid.eq(1),
+            source.data.eq(ca_bits[32:48]),
+            source.len.eq(16),
+            source.mask.eq(0xFF),
+            cs_wait.eq(~source.ready),
+            If(source.ready,
+                NextState("BURST-ADDR"),
+            )
+        )
+
+        fsm.act("BURST-ADDR",
+            cs.eq(1),
+            source.valid.eq(1),
+            source.data.eq(ca_bits[0:32]),
+            source.len.eq(32),
+            source.mask.eq(0xFF),
+            If(source.ready,
+                NextValue(latency_cnt, latency_cycles-1), # Latency count starts in the CA bits
+                NextValue(extra_latency_flag, 0),
+                NextState("INITIAL-LATENCY"),
+            )
+        )
+
+        fsm.act("INITIAL-LATENCY",
+            cs.eq(1),
+            source.valid.eq(1),
+            source.mask.eq(0),
+            source.len.eq(16),
+            NextValue(extra_latency_flag, extra_latency_flag | sink.rwds_bypass),
+            NextValue(latency_cnt, latency_cnt - 1),
+            If(latency_cnt == 0,
+                If(extra_latency_flag | sink.rwds_bypass,
+                    NextValue(latency_cnt, latency_cycles-1),
+                    NextState("SECOND-LATENCY"),
+                ).Else(
+                    source.mask.eq(Replicate(we, 8)),
+                    source.rwds_en.eq(we),
+                    If(we,
+                        NextState("BURST-WR"),
+                    ).Else(
+                        NextState("BURST-RD"),
+                    )
+                )
+            )
+        )
+
+        fsm.act("SECOND-LATENCY",
+            cs.eq(1),
+            source.valid.eq(1),
+            source.mask.eq(0),
+            source.len.eq(16),
+            NextValue(latency_cnt, latency_cnt - 1),
+            If(latency_cnt == 0,
+                source.mask.eq(Replicate(we, 8)),
+                source.rwds_en.eq(we),
+                If(we,
+                    NextState("BURST-WR"),
+                ).Else(
+                    NextState("BURST-RD"),
+                )
+            )
+        )
+
+        fsm.act("BURST-WR",
+            cs.eq(1),
+            source.valid.eq(wr_fifo.source.valid & ~cs_timeout),
+            source.data.eq({"big": wr_fifo.source.data, "little": reverse_bytes(wr_fifo.source.data)}[endianness]),
+            source.mask.eq(0xFF),
+            source.len.eq(32),
+            source.rwds_en.eq(1),
+            source.last.eq(remaining == 1),
+            wr_fifo.source.ready.eq(source.ready),
+            If(source.ready,
+                NextValue(adr, adr + 1),
+                NextValue(remaining, remaining - 1),
+                If(remaining == 1,
+                    wr_cmd.ready.eq(1),
+                    NextState("IDLE"),
+                )
+            ).Elif(cs_timeout,
+                NextState("IDLE"),
+            )
+        )
+
+        fsm.act("BURST-RD",
+            cs.eq(1),
+            source.valid.eq((rd_fifo.level + rd_pending < fifo_depth) & ~cs_timeout),
+            source.mask.eq(0),
+            source.len.eq(32),
+            source.last.eq(remaining == 1),
+            If(source.ready,
+                rd_beat.eq(1),
+                NextValue(adr, adr + 1),
+                NextValue(remaining, remaining - 1),
+                If(remaining == 1,
+                    NextState("BURST-RD-END"),
+                )
+            ).Elif(cs_timeout,
+                NextState("BURST-RD-END"),
+            )
+        )
+
+        # Keep CS until the last word is sampled.
+        fsm.act("BURST-RD-END",
+            cs.eq(1),
+            If(rd_pending == rd_sample,
+                If(remaining == 0,
+                    rd_cmd.ready.eq(1),
+                ),
+                NextState("IDLE"),
+            )
+        )
@@ -66,7 +66,6 @@ class HyperBusDDRPHYCore(Module, AutoCSR, AutoDoc):
         cs_enable = Signal()
         self.submodules += cs_timer
         self.comb += cs_timer.wait.eq(self.cs)
-        self.comb += cs_enable.eq(cs_timer.done)
 
         # I/Os.
         dq_o  = Array([Signal(len(pads.dq)) for _ in range(2)])
@@ -195,8 +194,8 @@ class HyperBusDDRPHYCore(Module, AutoCSR, AutoDoc):
             NextValue(sr_cnt, sr_cnt - 8*2),
             # End XFer.
             If(sr_cnt == 0,
-                # No more data?
-                If(last | ~sink.valid,
+                # No more data or CS released?
+                If(last | ~sink.valid | ~cs_timer.done,
 
                     # Stop Clk.
                     NextValue(clk_en, 0),
@@ -240,5 +239,9 @@ class HyperBusDDRPHYCore(Module, AutoCSR, AutoDoc):
             ),
         )
 
+        # Keep CS active until the current XFer is shifted out, the Core can release it as soon as
+        # the last data is loaded.
+        self.comb += cs_enable.eq(cs_timer.done | fsm.ongoing("XFER"))
+
         self.comb += source.data.eq(sr_in)
 
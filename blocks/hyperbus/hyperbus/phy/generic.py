@@ -30,6 +30,9 @@ class HyperBusPHY(Module, AutoCSR, AutoDoc):
     pads : Object
         HyperBus pads description.
 
+    clock_domain : str
+        Clock domain of the PHY, the same as the ``HyperBus`` core's.
+
     Attributes
     ----------
     source : Endpoint(spi_phy2core_layout), out
@@ -42,9 +45,11 @@ class HyperBusPHY(Module, AutoCSR, AutoDoc):
         Flash CS signal from ``HyperBusPHYCore``.
     """
 
-    def __init__(self, pads, cs_delay=10, extra_latency=0):
+    def __init__(self, pads, cs_delay=10, extra_latency=0, clock_domain="sys"):
 
         self.phy = HyperBusDDRPHYCore(pads, cs_delay, extra_latency)
+        if clock_domain != "sys":
+            self.phy = ClockDomainsRenamer(clock_domain)(self.phy)
 
         self.source = self.phy.source
         self.sink   = self.phy.sink
@@ -0,0 +1,217 @@
+#
+# This file is part of HyperBus
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+from migen import *
+from litex.gen.sim import passive
+
+
+class HyperRAMModel:
+    """Cycle level model of ``hyperbus_io`` (rtl/ecp5_hyperram_io.v) with a HyperRAM behind it.
+
+    Replaces the ``hyperbus_io`` Instance of ``HyperBusDDRPHYCore`` so the PHY, MMAP and Master
+    cores can be simulated with ``run_simulation`` and no Verilog tooling::
+
+        model = HyperRAMModel()
+        run_simulation(dut, [..., model.generator()], special_overrides={Instance: model})
+
+    The I/O block registers its outputs once: CK, CS#, DQ and RWDS driven by the PHY in cycle N are
+    on the pads in cycle N + 1, data0/rwds0 with CK high and data1/rwds1 with CK low. Read data
+    captured in pad cycle N is on q0/q1 in cycle N + 1, RWDS reaches rwds_bypass in cycle N + 2.
+
+    The memory side follows verif/rtl/models/hyperram_model.v: CA on CK edges 1-6, RWDS high
+    during CA for 2x latency, first data edge at 2 * latency + 5 (1x) or 4 * latency + 5 (2x),
+    register writes without latency, wrapped bursts (CA[45] low) wrap within the CR0 burst length.
+    Unlike the Verilog models, which return CR0 for every register read, registers are decoded by
+    address like on the device: ID0 (0x000), ID1 (0x001), CR0 (0x800) and CR1 (0x801), writes to
+    the ID registers are ignored.
+
+    Parameters
+    ----------
+    cr0 : int
+        Power-on value of CR0, fixed 6 clock latency by default.
+
+    cr1 : int
+        Power-on value of CR1.
+
+    id0, id1 : int
+        Identification registers, S27KL0641 values by default.
+
+    collision_every : int
+        In variable latency mode every n-th memory access collides with a refresh and gets 2x
+        latency. 0 never collides.
+
+    clock_domain : str
+        Clock domain of the PHY, ``generator()`` must run in it.
+
+    Attributes
+    ----------
+    mem : dict
+        16-bit word address -> data. Unwritten words read as 0xFFFF.
+
+    stats : dict
+        Bus cycle and word counters.
+
+    reg_adrs : list
+        Word address of each register access, in order.
+    """
+    def __init__(self, cr0=0x8F1F, cr1=0xFFC1, id0=0x0C81, id1=0x0001, collision_every=0, clock_domain="sys"):
+        self.cr0             = cr0
+        self.cr1             = cr1
+        self.id0             = id0
+        self.id1             = id1
+        self.collision_every = collision_every
+        self.clock_domain    = clock_domain
+        self.mem             = {}
+        self.stats           = dict(reads=0, writes=0, reg_reads=0, reg_writes=0, wrapped=0,
+                                    words_read=0, words_written=0, double_latency=0)
+
+        # Pads, one cycle after the PHY drives them.
+        self.ck      = Signal()
+        self.cs      = Signal()
+        self.dq      = Signal(16) # data0 (CK high) in the upper byte
+        self.rwds    = Signal(2)  # rwds0 (CK high) in the upper bit
+        self.rwds_oe = Signal()
+
+        # Memory outputs, driven by generator().
+        self.q           = Signal(16)
+        self.rwds_i      = Signal()
+        self.rwds_bypass = Signal()
+
+        self.reg_adrs       = []
+        self._collision_cnt = 0
+
+    # Special override -----------------------------------------------------------------------------
+
+    def lower(self, instance):
+        if instance.of != "hyperbus_io":
+            return None
+        ports = {item.name: item.expr for item in instance.items if hasattr(item, "expr")}
+
+        m = Module()
+        m.sync += [
+            self.ck.eq(ports["clk_en"]),
+            self.cs.eq(ports["cs_en"]),
+            self.dq.eq(Cat(ports["data1"], ports["data0"])),
+            self.rwds.eq(Cat(ports["rwds1"], ports["rwds0"])),
+            self.rwds_oe.eq(ports["rwds_oe"][0]),
+            self.rwds_bypass.eq(self.rwds_i),
+        ]
+        m.comb += [
+            ports["q0"].eq(self.q[8:]),
+            ports["q1"].eq(self.q[:8]),
+            ports["rwds_bypass"].eq(self.rwds_bypass),
+            ports["cs_n"].eq(~self.cs),
+            ports["clk_p_pad"].eq(self.ck),
+            ports["clk_n_pad"].eq(~self.ck),
+            ports["reset_n"].eq(1),
+        ]
+        return ClockDomainsRenamer(self.clock_domain)(m)
+
+    # Memory ---------------------------------------------------------------------------------------
+
+    def read_word(self, adr):
+        return self.mem.get(adr, 0xFFFF)
+
+    def write_word(self, adr, data, mask_hi=0, mask_lo=0):
+        word = self.read_word(adr)
+        if not mask_hi:
+            word = (word & 0x00FF) | (data & 0xFF00)
+        if not mask_lo:
+            word = (word & 0xFF00) | (data & 0x00FF)
+        self.mem[adr] = word
+
+    # Registers ------------------------------------------------------------------------------------
+
+    def read_reg(self, adr):
+        return {0x000: self.id0, 0x001: self.id1, 0x800: self.cr0, 0x801: self.cr1}.get(adr, 0xFFFF)
+
+    def write_reg(self, adr, data):
+        if adr == 0x800:
+            self.cr0 = data
+        elif adr == 0x801:
+            self.cr1 = data
+
+    def latency_clocks(self):
+        return {0b0000: 5, 0b0001: 6, 0b0010: 7, 0b1110: 3, 0b1111: 4}.get((self.cr0 >> 4) & 0xF, 6)
+
+    def burst_words(self):
+        return {0b00: 64, 0b01: 32, 0b10: 8, 0b11: 16}[self.cr0 & 0b11]
+
+    def next_adr(self, adr, linear):
+        if linear:
+            return adr + 1
+        words = self.burst_words()
+        return (adr & ~(words - 1)) | ((adr + 1) & (words - 1))
+
+    def _double_latency(self, reg):
+        # Fixed latency always reports a collision, register accesses never collide
+        if self.cr0 & (1 << 3):
+            return True
+        if reg or not self.collision_every:
+            return False
+        self._collision_cnt += 1
+        if self._collision_cnt >= self.collision_every:
+            self._collision_cnt = 0
+            return True
+        return False
+
+    # Bus ------------------------------------------------------------------------------------------
+
+    @passive
+    def generator(self):
+        edge = 0
+        ca   = 0
+        while True:
+            if not (yield self.cs):
+                edge = 0
+                yield self.rwds_i.eq(0)
+            elif (yield self.ck):
+                dq   = (yield self.dq)
+                rwds = (yield self.rwds)
+                for byte, rwds_bit in ((dq >> 8, rwds >> 1), (dq & 0xFF, rwds & 1)):
+                    edge += 1
+                    # Command/Address
+                    if edge <= 6:
+                        ca = (ca << 8 | byte) & (2**48 - 1)
+                        if edge == 1:
+                            read, reg = byte >> 7, (byte >> 6) & 1
+                            double    = self._double_latency(reg)
+                            yield self.rwds_i.eq(double)
+                        elif edge == 5:
+                            yield self.rwds_i.eq(0)
+                        elif edge == 6:
+                            adr    = (((ca >> 16) & (2**29 - 1)) << 3) | (ca & 0x7)
+                            linear = (ca >> 45) & 1
+                            if reg:
+                                self.reg_adrs.append(adr)
+                            if reg and not read:
+                                data_edge = 7
+                                self.stats["reg_writes"] += 1
+                            else:
+                                latency   = self.latency_clocks() * (2 if double else 1)
+                                data_edge = 2 * latency + 5
+                                self.stats["double_latency"] += double
+                                self.stats["reg_reads" if reg else ("reads" if read else "writes")] += 1
+                                self.stats["wrapped"] += not (reg or linear)
+                    # Data, upper byte with CK high
+                    elif edge >= data_edge:
+                        if edge % 2:
+                            if read:
+                                yield self.q.eq(self.read_reg(adr) if reg else self.read_word(adr))
+                                self.stats["words_read"] += not reg
+                            else:
+                                wdata, mask_hi = byte << 8, rwds_bit
+                        else:
+                            if not read:
+                                wdata |= byte
+                                if reg:
+                                    if edge == data_edge + 1:
+                                        self.write_reg(adr, wdata)
+                                else:
+                                    self.write_word(adr, wdata, mask_hi, rwds_bit)
+                                    self.stats["words_written"] += 1
+                            adr = self.next_adr(adr, linear)
+            yield
@@ -0,0 +1,148 @@
+#
+# This file is part of HyperBus
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+import unittest
+import random
+
+from common import *
+
+from litex.soc.interconnect.axi import BURST_INCR, BURST_WRAP
+
+
+def wrap_addrs(addr, beats):
+    """Beat addresses of a WRAP burst of 32-bit beats."""
+    size = 4 * beats
+    base = addr & ~(size - 1)
+    return [base + (addr - base + 4*i) % size for i in range(beats)]
+
+
+class TestHyperBusAXI(unittest.TestCase):
+    def setUp(self):
+        seed_random(self)
+
+    def run_axi(self, generators, **model_args):
+        dut   = HyperBusDUT(endianness="little", with_axi=True, axi_id_width=4)
+        model = HyperRAMModel(**model_args)
+        run(dut, model, [generator(dut, model) for generator in generators])
+        return model
+
+    # AXI master ------------------------------------------------------------------------------------
+
+    def ax(self, channel, addr, beats, id, burst=BURST_INCR):
+        yield channel.valid.eq(1)
+        yield channel.addr.eq(addr)
+        yield channel.len.eq(beats - 1)
+        yield channel.size.eq(2)
+        yield channel.burst.eq(burst)
+        yield channel.id.eq(id)
+        yield
+        while not (yield channel.ready):
+            yield
+        yield channel.valid.eq(0)
+
+    def w(self, channel, data, strb=0b1111):
+        for i, value in enumerate(data):
+            yield channel.valid.eq(1)
+            yield channel.data.eq(value)
+            yield channel.strb.eq(strb)
+            yield channel.last.eq(i == len(data) - 1)
+            yield
+            while not (yield channel.ready):
+                yield
+        yield channel.valid.eq(0)
+
+    def collect(self, channel, n, fields, stall=0.0, beats=None):
+        """Return the first n handshakes of channel, ready randomly low with probability stall."""
+        beats = [] if beats is None else beats
+        while len(beats) < n:
+            ready = random.random() >= stall
+            yield channel.ready.eq(ready)
+            yield
+            if ready and (yield channel.valid):
+                beat = []
+                for f in fields:
+                    beat.append((yield getattr(channel, f)))
+                beats.append(tuple(beat))
+        yield channel.ready.eq(0)
+        return beats
+
+    def idle(self, cycles=32):
+        for _ in range(cycles):
+            yield
+
+    # Tests -----------------------------------------------------------------------------------------
+
+    def test_read_outstanding(self):
+        # Four contiguous bursts issued back to back: all are accepted before the first data and
+        # they share a single HyperRAM burst
+        bursts = [(0x1000 + 32*i, 8, i) for i in range(4)]
+        data   = []
+        def master(dut, model):
+            for adr in range(0x800, 0x800 + 2*8*len(bursts)):
+                model.mem[adr] = random.randrange(2**16)
+            yield from self.idle()
+            for addr, beats, id in bursts:
+                yield from self.ax(dut.core.axi.ar, addr, beats, id)
+            self.assertFalse(data, "bursts were not accepted ahead of the data")
+        def slave(dut, model):
+            yield from self.idle()
+            yield from self.collect(dut.core.axi.r, 32, ["id", "data", "last", "resp"], beats=data)
+        model = self.run_axi([master, slave])
+        self.assertEqual(model.stats["reads"], 1)
+        for n, (id, value, last, resp) in enumerate(data):
+            addr   = 0x1000 + 4*n
+            hw     = model.read_word(addr // 2) << 16 | model.read_word(addr // 2 + 1)
+            self.assertEqual(value, int.from_bytes(hw.to_bytes(4, "big"), "little"), f"beat {n}")
+            self.assertEqual(id, n // 8)
+            self.assertEqual(last, n % 8 == 7)
+            self.assertEqual(resp, 0)
+
+    def test_write_read(self):
+        bursts = [(0x2000, 4, 1), (0x2010, 8, 2), (0x3004, 1, 3)]
+        values = {addr + 4*i: random.randrange(2**32) for addr, beats, _ in bursts for i in range(beats)}
+        result = {}
+        def master(dut, model):
+            yield from self.idle()
+            for addr, beats, id in bursts:
+                yield from self.ax(dut.core.axi.aw, addr, beats, id)
+            # Partial write over the first word
+            yield from self.ax(dut.core.axi.aw, 0x2000, 1, 4)
+            while len(result.get("b", [])) < len(bursts) + 1:
+                yield
+            for addr, beats, id in bursts:
+                yield from self.ax(dut.core.axi.ar, addr, beats, id)
+        def wdata(dut, model):
+            yield from self.idle()
+            for addr, beats, _ in bursts:
+                yield from self.w(dut.core.axi.w, [values[addr + 4*i] for i in range(beats)])
+            yield from self.w(dut.core.axi.w, [0xa5a5a5a5], strb=0b0110)
+        def responses(dut, model):
+            result["b"] = yield from self.collect(dut.core.axi.b, len(bursts) + 1, ["id", "resp"], stall=0.5)
+            result["r"] = yield from self.collect(dut.core.axi.r, len(values), ["data"], stall=0.5)
+        self.run_axi([master, wdata, responses])
+        self.assertEqual(result["b"], [(1, 0), (2, 0), (3, 0), (4, 0)])
+        values[0x2000] = (values[0x2000] & 0xff0000ff) | 0x00a5a500
+        self.assertEqual([data for data, in result["r"]], list(values.values()))
+
+    def test_wrap(self):
+        # An 8-beat WRAP burst matches the MMAP wrap size, critical word first in one wrapped burst
+        addr   = 0x4014
+        result = {}
+        def master(dut, model):
+            yield from self.idle()
+            yield from self.ax(dut.core.axi.aw, addr, 8, 0, burst=BURST_WRAP)
+            yield from self.w(dut.core.axi.w, wrap_addrs(addr, 8))
+            yield from self.ax(dut.core.axi.ar, addr, 8, 0, burst=BURST_WRAP)
+        def responses(dut, model):
+            yield from self.collect(dut.core.axi.b, 1, ["id"])
+            result["r"] = yield from self.collect(dut.core.axi.r, 8, ["data"])
+        model = self.run_axi([master, responses])
+        self.assertEqual([data for data, in result["r"]], wrap_addrs(addr, 8))
+        self.assertEqual(model.stats["wrapped"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
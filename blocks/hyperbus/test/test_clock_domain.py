@@ -0,0 +1,126 @@
+#
+# This file is part of HyperBus
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+import unittest
+import random
+
+from common import *
+
+from test_master import CMD_READ, CMD_WRITE, AREA_MEM, AREA_REG, ADR_PHASE, LATENCY_PHASE, READ_PHASE, WRITE_PHASE
+
+# sys and hyperbus clock periods: a faster and a slower HyperBus clock, both unrelated to sys.
+CLOCKS = [
+    {"sys": 10, "hyperbus": 4},
+    {"sys": 6,  "hyperbus": 10},
+]
+
+
+class TestHyperBusClockDomain(unittest.TestCase):
+    def setUp(self):
+        seed_random(self)
+
+    def run_clocks(self, generator, **model_args):
+        for clocks in CLOCKS:
+            with self.subTest(clocks=clocks):
+                dut   = HyperBusDUT(clock_domain="hyperbus")
+                model = HyperRAMModel(clock_domain="hyperbus", **model_args)
+                run(dut, model, generator(dut, model), clocks=clocks)
+
+    def idle(self, cycles=32):
+        for _ in range(cycles):
+            yield
+
+    def test_mmap(self):
+        data = {adr: random.randrange(2**32) for adr in list(range(16)) + [0x7ff, 0x800, 0x12345]}
+        def generator(dut, model):
+            yield from self.idle()
+            for adr, value in data.items():
+                yield from dut.core.bus.write(adr, value)
+            yield from self.idle()
+            for adr, value in data.items():
+                self.assertEqual(model.read_word(2*adr) << 16 | model.read_word(2*adr + 1), value)
+            for adr, value in data.items():
+                self.assertEqual((yield from dut.core.bus.read(adr)), value, f"word {adr:#x}")
+            # Latency reconfigured through the resynchronized CSR
+            model.cr0 = 0x8F0F # 5 clocks
+            yield from dut.core.mmap._latency_cycles.write(5)
+            yield from self.idle()
+            for adr, value in data.items():
+                self.assertEqual((yield from dut.core.bus.read(adr)), value, f"word {adr:#x}")
+        self.run_clocks(generator)
+
+    def test_mmap_burst(self):
+        # Sequential accesses come slower through the crossing, they must still continue the burst
+        n = 32
+        def generator(dut, model):
+            yield from self.idle()
+            for adr in range(0x400, 0x400 + n):
+                yield from dut.core.bus.write(adr, adr)
+            yield from self.idle()
+            for adr in range(0x400, 0x400 + n):
+                self.assertEqual((yield from dut.core.bus.read(adr)), adr)
+            self.assertEqual(model.stats["writes"], 1)
+            self.assertEqual(model.stats["reads"],  1)
+        self.run_clocks(generator)
+
+    def test_master(self):
+        def generator(dut, model):
+            master = dut.core.master
+            yield from self.idle()
+            for cmd, adr, ctrl, data in [
+                (CMD_WRITE | AREA_MEM, 0x00000003, ADR_PHASE | LATENCY_PHASE | WRITE_PHASE, 0xdeadbeef),
+                (CMD_WRITE | AREA_REG, 0x01000000, ADR_PHASE | WRITE_PHASE, 0x8F17),
+                (CMD_READ  | AREA_REG, 0x01000000, ADR_PHASE | LATENCY_PHASE | READ_PHASE, 0x8F17)]:
+                data_size = 0 if cmd & AREA_REG else 1
+                yield from master._hyperbus_cfg.write(1 | (data_size << 8) | (7 << 16))
+                yield from master._hyperbus_cmd.write(cmd)
+                yield from master._hyperbus_adr.write(adr)
+                if ctrl & WRITE_PHASE:
+                    yield from master._rxtx.write(data)
+                yield from master._hyperbus_ctrl.write(ctrl | 1)
+                yield
+                # Busy as soon as the start is written, like in sys
+                self.assertTrue((yield master._hyperbus_status.fields.busy))
+                while (yield master._hyperbus_status.fields.busy):
+                    yield
+                if ctrl & READ_PHASE:
+                    while not (yield master._status.fields.rx_ready):
+                        yield
+                    value = yield from master._rxtx.read()
+                    self.assertEqual(value & 0xFFFF, data)
+            self.assertEqual(model.cr0, 0x8F17)
+            self.assertEqual(model.read_word(0x3) << 16 | model.read_word(0x4), 0xdeadbeef)
+        self.run_clocks(generator)
+
+    def test_fifo_threshold(self):
+        # The FIFO levels are in sys, the rx event counts words read in the hyperbus domain
+        def generator(dut, model):
+            master = dut.core.master
+            yield from master._fifo_threshold.write(3)
+            yield from self.idle()
+            for n in range(1, 4):
+                yield from master._hyperbus_cfg.write(1 | (7 << 16))
+                yield from master._hyperbus_cmd.write(CMD_READ | AREA_REG)
+                yield from master._hyperbus_adr.write(0)
+                yield from master._hyperbus_ctrl.write(ADR_PHASE | LATENCY_PHASE | READ_PHASE | 1)
+                yield
+                while (yield master._hyperbus_status.fields.busy):
+                    yield
+                yield from self.idle(8)
+                self.assertEqual((yield master.ev.rx.trigger), n == 3, f"{n} words")
+            for _ in range(3):
+                self.assertEqual((yield from master._rxtx.read()) >> 16, 0x0C81)
+            yield
+            self.assertEqual((yield master.ev.rx.trigger), 0)
+        for clocks in CLOCKS:
+            with self.subTest(clocks=clocks):
+                dut   = HyperBusDUT(clock_domain="hyperbus", master_rx_fifo_depth=4)
+                model = HyperRAMModel(clock_domain="hyperbus")
+                run(dut, model, generator(dut, model), clocks=clocks)
+
+
+if __name__ == "__main__":
+    unittest.main()
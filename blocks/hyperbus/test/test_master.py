@@ -0,0 +1,166 @@
+#
+# This file is part of HyperBus
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+import unittest
+
+from common import *
+
+# Cycles from ctrl.start to status.busy clearing, measured with latency_count=7.
+REG_READ_CYCLES  = 27
+REG_WRITE_CYCLES = 13
+MEM_READ_CYCLES  = 26 # 32-bit, data_size=1
+MEM_WRITE_CYCLES = 24
+
+CMD_READ  = 0x8000
+CMD_WRITE = 0x0000
+AREA_MEM  = 0x0000
+AREA_REG  = 0x4000
+
+ADR_PHASE     = 1 << 8
+LATENCY_PHASE = 1 << 9
+READ_PHASE    = 1 << 10
+WRITE_PHASE   = 1 << 11
+
+
+class TestHyperBusMaster(unittest.TestCase):
+    def run_master(self, generator, **model_args):
+        dut   = HyperBusDUT()
+        model = HyperRAMModel(**model_args)
+        run(dut, model, generator(dut, dut.core.master, model))
+        return model
+
+    def transaction(self, dut, master, cmd, adr, ctrl, data=None, data_size=0):
+        """Same register sequence as the firmware, returns (rxtx, cycles)."""
+        yield from master._hyperbus_cfg.write(1 | (data_size << 8) | (7 << 16))
+        yield from master._hyperbus_cmd.write(cmd)
+        yield from master._hyperbus_adr.write(adr)
+        if data is not None:
+            yield from master._rxtx.write(data)
+        start = (yield dut.cycles)
+        yield from master._hyperbus_ctrl.write(ctrl | 1)
+        yield
+        while (yield master._hyperbus_status.fields.busy):
+            yield
+        cycles = (yield dut.cycles) - start
+        value  = None
+        if ctrl & READ_PHASE:
+            while not (yield master._status.fields.rx_ready):
+                yield
+            value = yield from master._rxtx.read()
+        return value, cycles
+
+    def test_register_read(self):
+        # With fixed latency rxtx holds two words, the register in the upper half and the next one below
+        def generator(dut, master, model):
+            for adr, value in [(0x00000000, 0x0C81), (0x00000001, 0x0001), (0x01000000, 0x8F1F), (0x01000001, 0xFFC1)]:
+                rdata, cycles = yield from self.transaction(dut, master,
+                    CMD_READ | AREA_REG, adr, ADR_PHASE | LATENCY_PHASE | READ_PHASE)
+                self.assertEqual(rdata >> 16, value, f"register {adr:#x}")
+                self.assertLessEqual(cycles, REG_READ_CYCLES)
+        model = self.run_master(generator)
+        self.assertEqual(model.stats["reg_reads"], 4)
+
+    def test_register_write(self):
+        def generator(dut, master, model):
+            _, cycles = yield from self.transaction(dut, master,
+                CMD_WRITE | AREA_REG, 0x01000000, ADR_PHASE | WRITE_PHASE, data=0x8F17)
+            self.assertLessEqual(cycles, REG_WRITE_CYCLES)
+            value, _ = yield from self.transaction(dut, master,
+                CMD_READ | AREA_REG, 0x01000000, ADR_PHASE | LATENCY_PHASE | READ_PHASE)
+            self.assertEqual(value & 0xFFFF, 0x8F17)
+        model = self.run_master(generator)
+        self.assertEqual(model.cr0, 0x8F17)
+
+    def test_memory_write_read(self):
+        data = {0x00000000: 0x1234abcf, 0x00000003: 0xdeadbeef, 0x00120005: 0x0badf00d}
+        def generator(dut, master, model):
+            for adr, value in data.items():
+                _, cycles = yield from self.transaction(dut, master,
+                    CMD_WRITE | AREA_MEM, adr, ADR_PHASE | LATENCY_PHASE | WRITE_PHASE, data=value, data_size=1)
+                self.assertLessEqual(cycles, MEM_WRITE_CYCLES)
+                # adr is CA[31:0], the word address is CA[44:16] and CA[2:0]
+                word = ((adr >> 16) << 3) | (adr & 0x7)
+                self.assertEqual(model.read_word(word) << 16 | model.read_word(word + 1), value)
+            for adr, value in data.items():
+                rdata, cycles = yield from self.transaction(dut, master,
+                    CMD_READ | AREA_MEM, adr, ADR_PHASE | LATENCY_PHASE | READ_PHASE, data_size=1)
+                self.assertEqual(rdata, value)
+                self.assertLessEqual(cycles, MEM_READ_CYCLES)
+        model = self.run_master(generator)
+        self.assertEqual(model.stats["words_written"], 2*len(data))
+
+    def test_fifo_window(self):
+        # Words pushed through the Wishbone window go out in one write, reads come back through it
+        data = [0x1234abcf, 0xdeadbeef, 0x0badf00d, 0x55aa55aa]
+        def generator(dut, master, model):
+            yield from master._hyperbus_cfg.write(1 | (1 << 8) | (7 << 16))
+            yield from master._hyperbus_cmd.write(CMD_WRITE | AREA_MEM)
+            yield from master._hyperbus_adr.write(0x00100000)
+            for i, value in enumerate(data):
+                yield from master.bus.write(i, value)
+            yield from master._hyperbus_ctrl.write(ADR_PHASE | LATENCY_PHASE | WRITE_PHASE | 1)
+            yield
+            while (yield master._hyperbus_status.fields.busy):
+                yield
+            for i, value in enumerate(data):
+                self.assertEqual(model.read_word(0x80 + 2*i) << 16 | model.read_word(0x80 + 2*i + 1), value)
+            for i in range(len(data)):
+                yield from master._hyperbus_adr.write(0x00100000 + 2*i)
+                yield from master._hyperbus_cmd.write(CMD_READ | AREA_MEM)
+                yield from master._hyperbus_ctrl.write(ADR_PHASE | LATENCY_PHASE | READ_PHASE | 1)
+                yield
+                while (yield master._hyperbus_status.fields.busy):
+                    yield
+                self.assertEqual((yield from master.bus.read(0)), data[i])
+        dut   = HyperBusDUT(master_tx_fifo_depth=len(data))
+        model = HyperRAMModel()
+        run(dut, model, generator(dut, dut.core.master, model))
+        self.assertEqual(model.stats["writes"], 1)
+
+    def test_events(self):
+        EV_DONE, EV_RX, EV_TX = 0b001, 0b010, 0b100
+        def clear(ev, events):
+            yield ev.pending.r.eq(events)
+            yield ev.pending.re.eq(1)
+            yield
+            yield ev.pending.re.eq(0)
+            yield
+        def generator(dut, master, model):
+            ev = master.ev
+            yield from ev.enable.write(EV_DONE | EV_RX)
+            yield
+            self.assertEqual((yield ev.irq), 0)
+
+            # Done and one word in the RX FIFO
+            yield from master._hyperbus_cfg.write(1 | (7 << 16))
+            yield from master._hyperbus_cmd.write(CMD_READ | AREA_REG)
+            yield from master._hyperbus_adr.write(0)
+            yield from master._hyperbus_ctrl.write(ADR_PHASE | LATENCY_PHASE | READ_PHASE | 1)
+            while not (yield ev.irq):
+                yield
+            while (yield master._hyperbus_status.fields.busy):
+                yield
+            yield
+            # Level events are pending regardless of enable, tx too with the TX FIFO empty
+            self.assertEqual((yield ev.pending.status), EV_DONE | EV_RX | EV_TX)
+            yield from clear(ev, EV_DONE)
+            self.assertEqual((yield ev.pending.status), EV_RX | EV_TX)
+            self.assertEqual((yield from master._rxtx.read()) >> 16, 0x0C81)
+            yield
+            self.assertEqual((yield ev.irq), 0)
+
+            # TX below the threshold until a word is queued
+            yield from ev.enable.write(EV_TX)
+            yield
+            self.assertEqual((yield ev.irq), 1)
+            yield from master._rxtx.write(0x8F1F)
+            yield
+            self.assertEqual((yield ev.irq), 0)
+        self.run_master(generator)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,240 @@
+#
+# This file is part of HyperBus
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+import unittest
+import random
+
+from common import *
+
+from litex.soc.interconnect import wishbone
+
+# Cycles from Wishbone cyc/stb to ack, measured with the default 6 clock latency. Lower is better,
+# update them when the cores get faster.
+SINGLE_READ_CYCLES           = 26 # New burst, 2x latency
+SINGLE_WRITE_CYCLES          = 19
+SINGLE_READ_CYCLES_1X        = 20 # Variable latency, no refresh collision
+SINGLE_WRITE_CYCLES_1X       = 13
+SEQUENTIAL_READ_CYCLES_WORD  = 9  # Per 32-bit word once a burst is running
+SEQUENTIAL_WRITE_CYCLES_WORD = 2
+
+
+class TestHyperBusMMAP(unittest.TestCase):
+    def setUp(self):
+        seed_random(self)
+
+    def run_mmap(self, generator, endianness="big", **model_args):
+        dut   = HyperBusDUT(endianness=endianness)
+        model = HyperRAMModel(**model_args)
+        run(dut, model, generator(dut, model))
+        return model
+
+    def idle(self, cycles=16):
+        # Longer than the MMAP burst timeout, the next access starts a new burst
+        for _ in range(cycles):
+            yield
+
+    def timed(self, dut, access):
+        start = (yield dut.cycles)
+        value = yield from access
+        return value, (yield dut.cycles) - start
+
+    # Data integrity -------------------------------------------------------------------------------
+
+    def check_read(self, endianness):
+        words = {adr: random.randrange(2**16) for adr in range(256)}
+        def generator(dut, model):
+            model.mem.update(words)
+            yield from self.idle()
+            for adr in [0, 1, 2, 17, 100, 127, 64, 3]:
+                value    = yield from dut.core.bus.read(adr)
+                expected = words[2*adr] << 16 | words[2*adr + 1]
+                if endianness == "little":
+                    expected = int.from_bytes(expected.to_bytes(4, "big"), "little")
+                self.assertEqual(value, expected, f"word {adr:#x}")
+                yield from self.idle()
+        self.run_mmap(generator, endianness)
+
+    def test_read_big_endian(self):
+        self.check_read("big")
+
+    def test_read_little_endian(self):
+        self.check_read("little")
+
+    def test_write_read(self):
+        data = {adr: random.randrange(2**32) for adr in list(range(8)) + [0x7fe, 0x7ff, 0x800, 0x12345]}
+        def generator(dut, model):
+            yield from self.idle()
+            for adr, value in data.items():
+                yield from dut.core.bus.write(adr, value)
+            yield from self.idle()
+            # The model holds 16-bit words, most significant first
+            for adr, value in data.items():
+                self.assertEqual(model.read_word(2*adr),     value >> 16)
+                self.assertEqual(model.read_word(2*adr + 1), value & 0xFFFF)
+            for adr, value in reversed(data.items()):
+                self.assertEqual((yield from dut.core.bus.read(adr)), value, f"word {adr:#x}")
+        self.run_mmap(generator)
+
+    def test_back_to_back(self):
+        # Each access starts a new burst right after the previous one was acked, the PHY must still
+        # shift out the whole previous write
+        data = [(0x10, 0x01234567), (0x20, 0x89abcdef), (0x10, None), (0x30, 0x55aa55aa), (0x20, None)]
+        def generator(dut, model):
+            yield from self.idle()
+            written = {}
+            for adr, value in data:
+                if value is None:
+                    self.assertEqual((yield from dut.core.bus.read(adr)), written[adr])
+                else:
+                    yield from dut.core.bus.write(adr, value)
+                    written[adr] = value
+            yield from self.idle()
+            for adr, value in written.items():
+                self.assertEqual(model.read_word(2*adr) << 16 | model.read_word(2*adr + 1), value)
+        self.run_mmap(generator)
+
+    def test_variable_latency(self):
+        data = {adr: random.randrange(2**32) for adr in range(0x3f0, 0x410)}
+        def generator(dut, model):
+            yield from self.idle()
+            for adr, value in data.items():
+                yield from dut.core.bus.write(adr, value)
+                yield from self.idle()
+            for adr, value in data.items():
+                self.assertEqual((yield from dut.core.bus.read(adr)), value, f"word {adr:#x}")
+                yield from self.idle()
+        model = self.run_mmap(generator, cr0=0x8F17, collision_every=3)
+        self.assertGreater(model.stats["double_latency"], 0)
+        self.assertLess(model.stats["double_latency"], model.stats["reads"] + model.stats["writes"])
+
+    def line_fill(self, dut, first, words, bte, we=False):
+        """Wishbone wrapping burst over the words-aligned line of first, starting at first."""
+        base   = first & ~(words - 1)
+        values = []
+        for i in range(words):
+            adr = base + (first + i) % words
+            cti = wishbone.CTI_BURST_END if i == words - 1 else wishbone.CTI_BURST_INCREMENTING
+            if we:
+                yield from dut.core.bus.write(adr, adr, cti=cti, bte=bte)
+            else:
+                values.append((adr, (yield from dut.core.bus.read(adr, cti=cti, bte=bte))))
+        yield dut.core.bus.cti.eq(0)
+        yield dut.core.bus.bte.eq(0)
+        return values
+
+    def test_wrapped_burst(self):
+        # 8-beat wraps match the 32 byte CR0 burst length: one wrapped HyperRAM burst per line,
+        # whichever word comes first
+        starts = [0x100, 0x105, 0x10f, 0x117]
+        def generator(dut, model):
+            for first in starts:
+                yield from self.idle()
+                yield from self.line_fill(dut, first, 8, 0b10, we=True)
+            for first in starts:
+                yield from self.idle()
+                for adr, value in (yield from self.line_fill(dut, first, 8, 0b10)):
+                    self.assertEqual(value, adr, f"word {adr:#x}")
+        model = self.run_mmap(generator)
+        self.assertEqual(model.stats["wrapped"], 2*len(starts))
+        self.assertEqual(model.stats["reads"] + model.stats["writes"], 2*len(starts))
+
+    def test_wrapped_burst_other_size(self):
+        # 4-beat wraps don't match CR0, they are split into linear bursts
+        def generator(dut, model):
+            yield from self.idle()
+            yield from self.line_fill(dut, 0x206, 4, 0b01, we=True)
+            yield from self.idle()
+            for adr, value in (yield from self.line_fill(dut, 0x206, 4, 0b01)):
+                self.assertEqual(value, adr, f"word {adr:#x}")
+        model = self.run_mmap(generator)
+        self.assertEqual(model.stats["wrapped"], 0)
+        self.assertEqual(model.stats["words_written"], 2*4)
+
+    def test_register_window(self):
+        # Registers are single-word bursts of their own, the memory burst around them is closed
+        def generator(dut, model):
+            yield from self.idle()
+            # Window words ID0, ID1, CR0, CR1
+            for word, adr, value in [(2, 0x800, 0x8F1F), (0, 0x000, 0x0C81), (1, 0x001, 0x0001), (3, 0x801, 0xFFC1)]:
+                self.assertEqual((yield from dut.core.reg_bus.read(word)), value, f"register {adr:#x}")
+                self.assertEqual(model.reg_adrs[-1], adr)
+            yield from dut.core.bus.write(0x40, 0x01234567)
+            # Latency code 0 is 5 clocks, the controller follows the store. The burst length is not
+            # followed: it must stay the 32 bytes of wrap_bytes.
+            yield from dut.core.reg_bus.write(2, 0x8F0F)
+            yield from self.idle()
+            self.assertEqual(model.cr0, 0x8F0F)
+            self.assertEqual((yield dut.core.mmap._latency_cycles.storage), 5)
+            self.assertEqual(2*model.burst_words(), 32)
+            yield from dut.core.bus.write(0x41, 0x89abcdef)
+            self.assertEqual((yield from dut.core.bus.read(0x40)), 0x01234567)
+            self.assertEqual((yield from dut.core.bus.read(0x41)), 0x89abcdef)
+        model = self.run_mmap(generator)
+        self.assertEqual(model.reg_adrs, [0x800, 0x000, 0x001, 0x801, 0x800])
+        self.assertEqual(model.stats["reg_reads"],  4)
+        self.assertEqual(model.stats["reg_writes"], 1)
+
+    # Throughput -----------------------------------------------------------------------------------
+
+    def check_single(self, cr0, read_cycles, write_cycles):
+        def generator(dut, model):
+            for adr in [0x100, 0x340, 0x20, 0x777]:
+                yield from self.idle()
+                _, cycles = yield from self.timed(dut, dut.core.bus.read(adr))
+                self.assertLessEqual(cycles, read_cycles, "single read")
+                yield from self.idle()
+                _, cycles = yield from self.timed(dut, dut.core.bus.write(adr, adr))
+                self.assertLessEqual(cycles, write_cycles, "single write")
+        model = self.run_mmap(generator, cr0=cr0)
+        self.assertEqual(model.stats["reads"],  4)
+        self.assertEqual(model.stats["writes"], 4)
+
+    def test_single_throughput(self):
+        self.check_single(0x8F1F, SINGLE_READ_CYCLES, SINGLE_WRITE_CYCLES)
+
+    def test_single_throughput_variable_latency(self):
+        self.check_single(0x8F17, SINGLE_READ_CYCLES_1X, SINGLE_WRITE_CYCLES_1X)
+
+    def test_wrapped_throughput(self):
+        # Critical word first: the requested word costs a single read, the rest of the line the
+        # sequential rate
+        def generator(dut, model):
+            yield from self.idle()
+            first = 0x305
+            start = (yield dut.cycles)
+            yield from dut.core.bus.read(first, cti=wishbone.CTI_BURST_INCREMENTING, bte=0b10)
+            self.assertLessEqual((yield dut.cycles) - start, SINGLE_READ_CYCLES, "critical word")
+            start = (yield dut.cycles)
+            for i in range(1, 8):
+                adr = 0x300 + (first + i) % 8
+                yield from dut.core.bus.read(adr, cti=wishbone.CTI_BURST_END if i == 7 else wishbone.CTI_BURST_INCREMENTING, bte=0b10)
+            self.assertLessEqual((yield dut.cycles) - start, SEQUENTIAL_READ_CYCLES_WORD * 7, "line")
+        model = self.run_mmap(generator)
+        self.assertEqual(model.stats["reads"], 1)
+
+    def test_sequential_throughput(self):
+        n = 32
+        def generator(dut, model):
+            for access, limit in [
+                (lambda adr: dut.core.bus.write(adr, adr), SEQUENTIAL_WRITE_CYCLES_WORD),
+                (lambda adr: dut.core.bus.read(adr),       SEQUENTIAL_READ_CYCLES_WORD)]:
+                yield from self.idle()
+                cycles = []
+                for adr in range(0x400, 0x400 + n):
+                    value, c = yield from self.timed(dut, access(adr))
+                    cycles.append(c)
+                    if value is not None:
+                        self.assertEqual(value, adr)
+                # The first access opens the burst, the others must continue it
+                self.assertLessEqual(sum(cycles[1:]), limit * (n - 1))
+        model = self.run_mmap(generator)
+        self.assertEqual(model.stats["reads"],  1)
+        self.assertEqual(model.stats["writes"], 1)
+        self.assertEqual(model.stats["words_written"], 2*n)
+
+
+if __name__ == "__main__":
+    unittest.main()
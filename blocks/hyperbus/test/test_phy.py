@@ -0,0 +1,120 @@
+#
+# This file is part of HyperBus
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+import unittest
+import random
+
+from common import *
+
+# The PHY clocks 16 bits per cycle, a 32-bit word takes 2 cycles in a running burst.
+BURST_CYCLES_WORD = 2
+
+# Latency beats between CA and data: the model's fixed 2x 6 clock latency puts the first data
+# word on CK 15, CA takes CK 1-3.
+LATENCY_BEATS = 11
+
+# A read word is complete in source.data this many cycles after its beat was accepted: 2 cycles
+# of shifting plus the I/O block output and input registers.
+READ_DATA_CYCLES = 5
+
+
+class TestHyperBusPHY(unittest.TestCase):
+    def setUp(self):
+        seed_random(self)
+
+    def run_phy(self, *generators, **model_args):
+        dut   = HyperBusPHYDUT()
+        model = HyperRAMModel(**model_args)
+        run(dut, model, [generator(dut, dut.phy, model) for generator in generators])
+        return model
+
+    def beat(self, phy, data=0, len=16, mask=0, rwds_en=0, last=0):
+        """Send one Core->PHY beat, returns once the PHY accepted it."""
+        sink = phy.sink
+        yield sink.valid.eq(1)
+        yield sink.data.eq(data)
+        yield sink.len.eq(len)
+        yield sink.width.eq(8)
+        yield sink.mask.eq(mask)
+        yield sink.rwds.eq(0)
+        yield sink.rwds_en.eq(rwds_en)
+        yield sink.last.eq(last)
+        yield
+        while not (yield sink.ready):
+            yield
+
+    def transaction(self, phy, ca, latency=True):
+        yield phy.cs.eq(1)
+        yield from self.beat(phy, ca >> 32,         len=16, mask=0xFF)
+        yield from self.beat(phy, ca & 0xFFFFFFFF, len=32, mask=0xFF)
+        if latency:
+            for _ in range(LATENCY_BEATS):
+                yield from self.beat(phy)
+
+    def end(self, phy):
+        yield phy.sink.valid.eq(0)
+        yield phy.cs.eq(0)
+        for _ in range(8):
+            yield
+
+    def test_register(self):
+        def generator(dut, phy, model):
+            # CR0 write, no latency
+            yield from self.transaction(phy, ca_bits(0x01000000 >> 13, read=False, reg=True), latency=False)
+            yield from self.beat(phy, 0x8F17, len=16, mask=0xFF, last=1)
+            yield from self.end(phy)
+            self.assertEqual(model.cr0, 0x8F17)
+
+            # CR0 read, back to fixed latency for the following tests
+            model.cr0 = 0x8F1F
+            yield from self.transaction(phy, ca_bits(0x01000000 >> 13, reg=True))
+            yield from self.beat(phy, len=16, last=1)
+            yield phy.sink.valid.eq(0)
+            while not (yield phy.source.valid):
+                yield
+            self.assertEqual((yield phy.source.data) & 0xFFFF, 0x8F1F)
+            yield from self.end(phy)
+        self.run_phy(generator)
+
+    def test_burst(self):
+        n    = 32
+        base = 0x1234
+        data = [random.randrange(2**32) for _ in range(n)]
+        samples = {}
+        @passive
+        def monitor(dut, phy, model):
+            while True:
+                samples[(yield dut.cycles)] = (yield phy.source.data)
+                yield
+        def generator(dut, phy, model):
+            # Write burst
+            yield from self.transaction(phy, ca_bits(base, read=False))
+            start = (yield dut.cycles)
+            for i, word in enumerate(data):
+                yield from self.beat(phy, word, len=32, mask=0xFF, rwds_en=1, last=(i == n - 1))
+            cycles = (yield dut.cycles) - start
+            yield from self.end(phy)
+            self.assertLessEqual(cycles, BURST_CYCLES_WORD * n)
+            for i, word in enumerate(data):
+                self.assertEqual(model.read_word(base + 2*i) << 16 | model.read_word(base + 2*i + 1), word)
+
+            # Read burst
+            yield from self.transaction(phy, ca_bits(base))
+            accepted = []
+            for i in range(n):
+                yield from self.beat(phy, len=32, last=(i == n - 1))
+                accepted.append((yield dut.cycles))
+            yield from self.end(phy)
+            self.assertLessEqual(accepted[-1] - accepted[0], BURST_CYCLES_WORD * (n - 1))
+            for i, word in enumerate(data):
+                self.assertEqual(samples[accepted[i] + READ_DATA_CYCLES], word, f"word {i}")
+        model = self.run_phy(generator, monitor)
+        self.assertEqual(model.stats["words_written"], 2*n)
+        self.assertEqual(model.stats["reads"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+#
+# This file is part of HyperBus
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+import unittest
+import random
+
+from common import *
+
+from hyperbus.frontend.stream import TCSM
+
+# Cycles per 32-bit word of a long transfer, CA and latency included. Lower is better, update them
+# when the cores get faster.
+STREAM_WRITE_CYCLES_WORD = 2.2
+STREAM_READ_CYCLES_WORD  = 2.2
+
+CLK_FREQ = 100e6
+
+
+class TestHyperBusStream(unittest.TestCase):
+    def setUp(self):
+        seed_random(self)
+
+    def run_stream(self, generators, clk_freq=CLK_FREQ, **model_args):
+        dut   = HyperBusDUT(with_stream=True, clk_freq=clk_freq)
+        model = HyperRAMModel(**model_args)
+        run(dut, model, [generator(dut, dut.core.stream, model) for generator in generators])
+        return model
+
+    def idle(self, cycles=16):
+        for _ in range(cycles):
+            yield
+
+    def command(self, cmd, adr, length):
+        """Issue a command, returns once it was acknowledged."""
+        yield cmd.valid.eq(1)
+        yield cmd.adr.eq(adr)
+        yield cmd.length.eq(length)
+        yield
+        while not (yield cmd.ready):
+            yield
+        yield cmd.valid.eq(0)
+
+    def send(self, sink, data, stall=0.0):
+        for value in data:
+            while random.random() < stall:
+                yield sink.valid.eq(0)
+                yield
+            yield sink.valid.eq(1)
+            yield sink.data.eq(value)
+            yield
+            while not (yield sink.ready):
+                yield
+        yield sink.valid.eq(0)
+
+    def receive(self, source, n, data, stall=0.0):
+        while len(data) < n:
+            ready = random.random() >= stall
+            yield source.ready.eq(ready)
+            yield
+            if ready and (yield source.valid):
+                data.append(((yield source.data), (yield source.last)))
+        yield source.ready.eq(0)
+
+    def check_memory(self, model, adr, data):
+        for i, value in enumerate(data):
+            word = adr//2 + 2*i
+            self.assertEqual(model.read_word(word) << 16 | model.read_word(word + 1), value, f"word {i}")
+
+    def cs_monitor(self, cs_low):
+        """Passive generator collecting how long each CS# low period on the pads lasted."""
+        @passive
+        def monitor(dut, streamer, model):
+            cycles = 0
+            while True:
+                if (yield model.cs):
+                    cycles += 1
+                elif cycles:
+                    cs_low.append(cycles)
+                    cycles = 0
+                yield
+        return monitor
+
+    # Tests -----------------------------------------------------------------------------------------
+
+    def test_write_read(self):
+        # 128 words fit in one burst at 100MHz
+        adr  = 0x2000
+        data = [random.randrange(2**32) for _ in range(128)]
+        rx   = []
+        cycles = {}
+        def writer(dut, streamer, model):
+            yield from self.idle()
+            start = (yield dut.cycles)
+            yield from self.command(streamer.wr_cmd, adr, 4*len(data))
+            cycles["write"] = (yield dut.cycles) - start
+            yield from self.idle()
+            self.check_memory(model, adr, data)
+            start = (yield dut.cycles)
+            yield from self.command(streamer.rd_cmd, adr, 4*len(data))
+            cycles["read"] = (yield dut.cycles) - start
+        def data_in(dut, streamer, model):
+            yield from self.send(streamer.wr_sink, data)
+        def data_out(dut, streamer, model):
+            yield from self.receive(streamer.rd_source, len(data), rx)
+        model = self.run_stream([writer, data_in, data_out])
+        self.assertEqual(rx, [(value, i == len(data) - 1) for i, value in enumerate(data)])
+        self.assertEqual(model.stats["writes"], 1)
+        self.assertEqual(model.stats["reads"], 1)
+        self.assertLessEqual(cycles["write"], STREAM_WRITE_CYCLES_WORD * len(data))
+        self.assertLessEqual(cycles["read"],  STREAM_READ_CYCLES_WORD  * len(data))
+
+    def test_stalls(self):
+        # Both streams stall randomly, the clock is stopped while waiting
+        adr  = 0x10000
+        data = [random.randrange(2**32) for _ in range(100)]
+        rx   = []
+        def writer(dut, streamer, model):
+            yield from self.idle()
+            yield from self.command(streamer.wr_cmd, adr, 4*len(data))
+            yield from self.command(streamer.rd_cmd, adr, 4*len(data))
+        def data_in(dut, streamer, model):
+            yield from self.send(streamer.wr_sink, data, stall=0.3)
+        def data_out(dut, streamer, model):
+            yield from self.receive(streamer.rd_source, len(data), rx, stall=0.5)
+        self.run_stream([writer, data_in, data_out])
+        self.assertEqual([value for value, _ in rx], data)
+
+    def test_tcsm(self):
+        # At 24MHz a burst holds CS# for at most 96 cycles, long transfers are split
+        clk_freq = 24e6
+        adr  = 0x4000
+        data = [random.randrange(2**32) for _ in range(300)]
+        rx     = []
+        cs_low = []
+        def writer(dut, streamer, model):
+            yield from self.idle()
+            yield from self.command(streamer.wr_cmd, adr, 4*len(data))
+            yield from self.command(streamer.rd_cmd, adr, 4*len(data))
+        def data_in(dut, streamer, model):
+            yield from self.send(streamer.wr_sink, data)
+        def data_out(dut, streamer, model):
+            yield from self.receive(streamer.rd_source, len(data), rx)
+        model = self.run_stream([writer, data_in, data_out, self.cs_monitor(cs_low)], clk_freq=clk_freq)
+        self.check_memory(model, adr, data)
+        self.assertEqual([value for value, _ in rx], data)
+        self.assertGreater(model.stats["writes"], 1)
+        self.assertGreater(model.stats["reads"], 1)
+        self.assertLessEqual(max(cs_low), TCSM * clk_freq)
+
+    def test_mmap_between_bursts(self):
+        # The MMAP gets the PHY between the parts of a split transfer
+        data = [random.randrange(2**32) for _ in range(300)]
+        done = {}
+        def writer(dut, streamer, model):
+            yield from self.idle()
+            yield from self.command(streamer.wr_cmd, 0, 4*len(data))
+            done["stream"] = (yield dut.cycles)
+            yield from self.idle()
+        def data_in(dut, streamer, model):
+            yield from self.send(streamer.wr_sink, data)
+        def mmap(dut, streamer, model):
+            yield from self.idle(64)
+            yield from dut.core.bus.write(0x10000, 0x12345678)
+            done["mmap"] = (yield dut.cycles)
+        model = self.run_stream([writer, data_in, mmap], clk_freq=24e6)
+        self.assertLess(done["mmap"], done["stream"])
+        self.assertEqual(model.read_word(0x20000) << 16 | model.read_word(0x20001), 0x12345678)
+        self.check_memory(model, 0, data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+#
+# This file is part of frosty-ferret-soc
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Prebuilt VexRiscv variants with the DFFRF_2R1W register file.
+
+Takes one of the netlists that pythondata-cpu-vexriscv ships (generated by its Makefile with
+``GenCoreDefault``) and replaces the register file memory with a DFFRF_2R1W instance, the same
+change as in VexRiscv_Min_rf.v and VexRiscv_Lite_rf.v. The original memory and its always blocks
+are left commented out. The result goes to ``rtl/VexRiscv_<Variant>_rf.v``::
+
+    python3 rf_netlist.py VexRiscv standard
+
+Only netlists whose register file reads are always enabled are converted, DFFRF_2R1W has no read
+enables.
+"""
+
+import argparse
+import importlib.metadata
+import os
+import re
+import sys
+
+RTL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rtl")
+
+REGFILE_DECL = re.compile(r"^(\s*)(\(\*.*\*\) )?reg \[31:0\] RegFilePlugin_regFile \[0:31\].*$", re.M)
+REGFILE_READ = re.compile(
+    r"^  always @\(posedge clk\) begin\n"
+    r"    if\((?P<enable>\w+)\) begin\n"
+    r"      (?P<data>\w+) <= RegFilePlugin_regFile\[(?P<adr>\w+)\];\n"
+    r"    end\n"
+    r"  end\n", re.M)
+REGFILE_WRITE = re.compile(
+    r"^  always @\(posedge clk\) begin\n"
+    r"    if\((?P<enable>\w+)\) begin\n"
+    r"      RegFilePlugin_regFile\[(?P<adr>\w+)\] <= (?P<data>\w+);\n"
+    r"    end\n"
+    r"  end\n", re.M)
+
+RF_INSTANCE = """  DFFRF_2R1W u_rf (
+    .CLK(clk),
+    .WE({we}),
+    .DA({da}),
+    .DB({db}),
+    .DW({dw}),
+    .RA({ra}),
+    .RB({rb}),
+    .RW({rw})
+  );
+
+"""
+
+
+def comment_out(text: str) -> str:
+    return "".join(f"  //{line}" if line.strip() else "  //\n" for line in text.splitlines(keepends=True))
+
+
+def convert(netlist: str, source: str) -> str:
+    """Replace the RegFilePlugin memory of a VexRiscv netlist with DFFRF_2R1W
+
+    Args:
+        netlist: Verilog of the VexRiscv module and its caches
+        source: where the netlist comes from, for the header
+
+    Returns:
+        str: the converted netlist
+    """
+    reads = list(REGFILE_READ.finditer(netlist))
+    writes = list(REGFILE_WRITE.finditer(netlist))
+    if len(reads) != 2 or len(writes) != 1 or len(REGFILE_DECL.findall(netlist)) != 1:
+        raise ValueError("no RegFilePlugin register file with 2 read and 1 write port")
+    for read in reads:
+        if not re.search(rf"assign {read['enable']} = 1'b1;", netlist):
+            raise ValueError(f"register file read enable {read['enable']} is not constant")
+
+    blocks = reads + writes
+    start = min(block.start() for block in blocks)
+    end = max(block.end() for block in blocks)
+    if netlist[start:end].count("always @") != 3:
+        raise ValueError("register file always blocks are not next to each other")
+
+    instance = RF_INSTANCE.format(we=writes[0]["enable"], dw=writes[0]["data"], rw=writes[0]["adr"],
+        da=reads[0]["data"], ra=reads[0]["adr"], db=reads[1]["data"], rb=reads[1]["adr"])
+    netlist = netlist[:start] + instance + comment_out(netlist[start:end]) + netlist[end:]
+    netlist = REGFILE_DECL.sub(lambda m: f"{m[1]}//{m[0][len(m[1]):]}", netlist)
+    return f"// DFFRF_2R1W register file, converted by blocks/vexriscv/rf_netlist.py from {source}\n" + netlist
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("netlist", help="pythondata-cpu-vexriscv netlist, e.g. VexRiscv or VexRiscv_Full")
+    parser.add_argument("variant", help="variant name, the output is rtl/VexRiscv_<Variant>_rf.v")
+    args = parser.parse_args()
+
+    import pythondata_cpu_vexriscv
+    version = importlib.metadata.version("pythondata-cpu-vexriscv")
+    path = os.path.join(pythondata_cpu_vexriscv.data_location, args.netlist + ".v")
+    with open(path) as f:
+        netlist = f.read()
+    try:
+        netlist = convert(netlist, f"pythondata-cpu-vexriscv {version} {args.netlist}.v")
+    except ValueError as e:
+        print(f"{path}: {e}", file=sys.stderr)
+        return 1
+
+    output = os.path.join(RTL_PATH, f"VexRiscv_{args.variant.capitalize()}_rf.v")
+    with open(output, "w") as f:
+        f.write(netlist)
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,8 +17,15 @@ import lxbuildenv
 import litex.soc.doc as lxsocdoc
 from pathlib import Path
 import subprocess
+import hashlib
+import importlib.metadata
+import glob
+import json
+import shlex
+import shutil
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from random import SystemRandom
 import argparse
@@ -37,7 +44,8 @@ from litex.soc.integration.doc import AutoDoc, ModuleDoc
 from litex.soc.integration.soc import SoCRegion
 
 
-from rtl.sram import GF180_RAM
+from rtl.sram import GF180_RAM, GF180_TCM
+from rtl.sim_console import SimConsole
 from rtl.platform.icebreaker_ppp import Platform as FPGAPlatform
 from rtl.platform.sim import Platform as SimPlatform
 
@@ -53,6 +61,15 @@ SPI_FLASH_SIZE = 32 * 1024 * 1024
 SRAM_EXT_SIZE  = 0x1000000
 prefix = ""  # sometimes 'soc_', sometimes '' prefix Litex is attaching to net names
 
+# Prebuilt VexRiscv variants with the DFFRF_2R1W register file: --cpu-variant -> Verilog. The sim
+# Makefile finds the same file from its CPU_VARIANT, as blocks/vexriscv/rtl/VexRiscv_<Variant>_rf.v.
+# blocks/vexriscv/rf_netlist.py converts other pythondata-cpu-vexriscv netlists.
+CPU_VARIANTS = {
+    "min":      "blocks/vexriscv/rtl/VexRiscv_Min_rf.v",      # No caches, iterative shifter
+    "lite":     "blocks/vexriscv/rtl/VexRiscv_Lite_rf.v",     # 2KB direct mapped I$, iterative shifter and mul/div
+    "standard": "blocks/vexriscv/rtl/VexRiscv_Standard_rf.v", # 4KB I$ and D$, barrel shifter, single cycle mul
+}
+
 # FrostyFerretSoc -------------------------------------------------------------------------------------
 
 class FrostyFerretSoc(SoCCore, AutoDoc):
@@ -60,13 +77,18 @@ class FrostyFerretSoc(SoCCore, AutoDoc):
     SoCCore.mem_map = {
         "rom":             0x80000000, # uncached
         "sram":            0x10000000,
+        "itcm":            0x11000000, # --with-itcm, on the CPU instruction port
+        "dtcm":            0x12000000, # --with-dtcm, on the CPU data port
         "spiflash":        0x20000000,
         "hyperbus0":       0x30000000,
+        "hyperbus0_fifo":  0xe0000000, # uncached, HyperBusMaster TX/RX FIFO window
+        "hyperbus0_reg":   0xe0001000, # uncached, HyperRAM ID0/ID1/CR0/CR1 window
         "vexriscv_debug":  0xefff0000, # this doesn't "stick", LiteX overrides it, so if you use it, you will have to hard code it. Also, search & replace for changes.
         "csr":             0xf0000000,
     }
 
-    def __init__(self, platform, sys_clk_freq=int(48e6),
+    def __init__(self, platform, sys_clk_freq=int(48e6), hyperbus_clk_freq=None,
+                 cpu_variant="lite", with_itcm=False, with_dtcm=False,
                  **kwargs):
 
         reset_address = self.mem_map["spiflash"]
@@ -93,7 +115,7 @@ class FrostyFerretSoc(SoCCore, AutoDoc):
         if self.mem_map["rom"] == 0:
             self.mem_map["rom"] += 0x80000000
 
-        self.cpu.use_external_variant("blocks/vexriscv/rtl/VexRiscv_Lite_rf.v")
+        self.cpu.use_external_variant(CPU_VARIANTS[cpu_variant])
         self.platform.add_source("blocks/DFFRF_2R1W/DFFRF_2R1W.v")
 
         #GF180_RAM
@@ -106,6 +128,18 @@ class FrostyFerretSoc(SoCCore, AutoDoc):
         self.platform.add_source("blocks/GF180_RAM/gf180_ram_512x8_wrapper.v")
         self.platform.add_source("blocks/GF180_RAM/gf180mcu_fd_ip_sram__sram512x8m8wm1.v")
 
+        # Tightly coupled memories: GF180_RAMs on the CPU ports themselves, ahead of the interconnect.
+        # The CPU never waits for the other port or a DMA master to reach them, the interconnect
+        # still sees them so the data port can load the ITCM.
+        for name, enabled, port in [("itcm", with_itcm, "cpu_bus0"), ("dtcm", with_dtcm, "cpu_bus1")]:
+            if not enabled:
+                continue
+            tcm = GF180_TCM(origin=self.mem_map[name], size=sram_size)
+            self.add_module(name=name, module=tcm)
+            self.comb += self.bus.masters[port].connect(tcm.cpu_bus)
+            self.bus.masters[port] = tcm.bus
+            self.bus.add_slave(name, tcm.slave, SoCRegion(origin=self.mem_map[name], size=sram_size))
+
 
         # Fix the location of CSRs and IRQs so we can do firmware updates between generations of the SoC
         self.csr.locs = {
@@ -120,19 +154,25 @@ class FrostyFerretSoc(SoCCore, AutoDoc):
             # 'hyperbus0_core': 8,
             # 'hyperbus0_phy': 9,
             # 'leds': 10,
+            'sim_console': 15, # Sim builds only, last page so the others are where they are on the FPGA
         }
 
         self.irq.locs = {
             'timer0': 0,
             'gpio': 1,
+            'hyperbus0_core': 2,
         }
 
-        self.submodules.crg = platform.crg(platform, sys_clk_freq)
+        self.submodules.crg = platform.crg(platform, sys_clk_freq, hyperbus_clk_freq)
 
         self.leds = LedChaser(
             pads         = platform.request_all("user_led"),
             sys_clk_freq = sys_clk_freq)
 
+        # printf and profiling markers for verif/sim, decoded by SoCTestHarness without a UART
+        if isinstance(platform, SimPlatform):
+            self.sim_console = SimConsole()
+
         self.add_spi_flash(mode="4x", module=W25Q32DW(Codes.READ_1_1_1), with_master=True)
 
 
@@ -141,16 +181,235 @@ class FrostyFerretSoc(SoCCore, AutoDoc):
         # PHY
         from hyperbus.phy.generic import HyperBusPHY
         from hyperbus import HyperBus
-        self.hyperbus0_phy = HyperBusPHY(self.platform.request("hyperbus0"))
+        # Own clock domain when it's clocked differently, CSRs and Wishbone are crossed in the core
+        hyperbus_cd = "hyperbus" if hyperbus_clk_freq else "sys"
+        self.hyperbus0_phy = HyperBusPHY(self.platform.request("hyperbus0"), clock_domain=hyperbus_cd)
         # Core
-        hyperbus0_core = HyperBus(self.hyperbus0_phy, mmap_endianness=self.cpu.endianness, **kwargs)
+        hyperbus0_core = HyperBus(self.hyperbus0_phy, mmap_endianness=self.cpu.endianness, clock_domain=hyperbus_cd, **kwargs)
         self.add_module(name=f"hyperbus0_core", module=hyperbus0_core)
         spiflash_region = SoCRegion(origin=self.mem_map.get("hyperbus0", None), size=0x10000000)
         self.bus.add_slave("hyperbus0", slave=hyperbus0_core.bus, region=spiflash_region)
+        fifo_region = SoCRegion(origin=self.mem_map["hyperbus0_fifo"], size=0x1000, cached=False)
+        self.bus.add_slave("hyperbus0_fifo", slave=hyperbus0_core.master_bus, region=fifo_region)
+        reg_region = SoCRegion(origin=self.mem_map["hyperbus0_reg"], size=0x1000, cached=False)
+        self.bus.add_slave("hyperbus0_reg", slave=hyperbus0_core.reg_bus, region=reg_region)
 
 
         self.do_finalize()
 
+# CSR signal map -----------------------------------------------------------------------------------
+
+def write_csr_signals(soc, vns, filename):
+    """Write the Verilog signal behind each CSR and its fields, for backdoor access from the testbench.
+
+    csr_signal,<csr name>,<signal in dut.v>,<width>
+    csr_field,<csr name>,<field name>,<offset>,<size>
+    csr_strobe,<csr name>,<write strobe in dut.v>
+    sim_signal,<name>,<signal in dut.v>
+
+    CSRs without a storage/status signal (e.g. uart_rxtx) are not listed. The sim_signal rows are
+    the CPU reset vector and the POR counter, SoCTestHarness.boot() sets them to restore a checkpoint.
+    """
+    import csv
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f)
+        for region_name, region in soc.csr.regions.items():
+            if not isinstance(region.obj, list):
+                continue
+            for csr in region.obj:
+                if isinstance(csr, CSRStorage):
+                    signal = csr.storage
+                elif isinstance(csr, CSRStatus):
+                    signal = csr.status
+                else:
+                    continue
+                name = f"{region_name}_{csr.name}"
+                writer.writerow(["csr_signal", name, vns.get_name(signal), len(signal)])
+                if isinstance(csr, CSRStorage):
+                    writer.writerow(["csr_strobe", name, vns.get_name(csr.re)])
+                if hasattr(csr, "fields"):
+                    for field in csr.fields.fields:
+                        writer.writerow(["csr_field", name, field.name, field.offset, field.size])
+        sim_signals = {
+            "reset_vector": soc.cpu.cpu_params.get("i_externalResetVector"),
+            "por_count":    getattr(soc.crg, "por_count", None),
+        }
+        for name, signal in sim_signals.items():
+            if signal is not None:
+                writer.writerow(["sim_signal", name, vns.get_name(signal)])
+
+# Gateware cache -----------------------------------------------------------------------------------
+
+# Python sources that shape the elaborated SoC, relative to this script
+GATEWARE_INPUTS = [
+    "frostyferret_soc.py",
+    "rtl/**/*.py",
+    "blocks/hyperbus/hyperbus/**/*.py",
+]
+
+# Packages the elaboration imports, their versions and locations are hashed too
+GATEWARE_PACKAGES = ["litex", "migen", "litespi"]
+
+def gateware_hash(argv):
+    """Hash everything the --sim elaboration depends on.
+
+    Covers the command line, the deps/ submodule commits, the versions of the LiteX packages actually
+    imported (installed ones when deps/ isn't populated) and the Python sources in GATEWARE_INPUTS.
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.sha256("\0".join(argv).encode())
+
+    # "+" marks a submodule checked out at another commit than the one recorded
+    try:
+        h.update(subprocess.run(["git", "submodule", "status"], cwd=root, capture_output=True).stdout)
+    except FileNotFoundError:
+        pass
+
+    for package in GATEWARE_PACKAGES:
+        try:
+            version = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            version = "unknown"
+        module = sys.modules.get(package)
+        h.update(f"{package}={version}@{getattr(module, '__file__', None)}".encode())
+
+    paths = set()
+    for pattern in GATEWARE_INPUTS:
+        paths.update(glob.glob(os.path.join(root, pattern), recursive=True))
+    for path in sorted(paths):
+        h.update(os.path.relpath(path, root).encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+def gateware_outputs(output_dir):
+    return [
+        os.path.join(output_dir, "gateware", "dut.v"),
+        os.path.join(output_dir, "csr.csv"),
+        os.path.join(output_dir, "csr_signals.csv"),
+        os.path.join(output_dir, "software", "include", "generated", "csr.h"),
+    ]
+
+def gateware_up_to_date(output_dir, digest):
+    hash_filename = os.path.join(output_dir, "gateware", "dut.hash")
+    if not all(os.path.isfile(path) for path in gateware_outputs(output_dir)):
+        return False
+    if not os.path.isfile(hash_filename):
+        return False
+    with open(hash_filename) as f:
+        return f.read().strip() == digest
+
+# Documentation ------------------------------------------------------------------------------------
+
+def build_docs(soc, doc_dir, background=False):
+    """Generate the SoC documentation and build the HTML with Sphinx.
+
+    lxsocdoc rewrites every source, which would make Sphinx rebuild everything. Instead the sources
+    are hashed and Sphinx only runs when they differ from the last successful build. With background
+    set Sphinx is started without waiting for it, its output goes to <doc_dir>/_build/sphinx.log.
+    """
+    lxsocdoc.generate_docs(soc, doc_dir, note_pulses=True, quiet=True, sphinx_extensions=['sphinx_verilog_domain'])
+
+    build_dir = os.path.join(doc_dir, "_build")
+    h = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(doc_dir, "**", "*"), recursive=True)):
+        if os.path.isfile(path) and os.path.commonpath([path, build_dir]) != build_dir:
+            h.update(os.path.relpath(path, doc_dir).encode())
+            with open(path, "rb") as f:
+                h.update(f.read())
+    digest = h.hexdigest()
+
+    hash_filename = os.path.join(build_dir, "sources.hash")
+    if os.path.isfile(hash_filename):
+        with open(hash_filename) as f:
+            if f.read().strip() == digest:
+                print("Documentation up to date")
+                return
+
+    os.makedirs(build_dir, exist_ok=True)
+    cmd = f"sphinx-build -M html {doc_dir} {build_dir} && echo {digest} > {hash_filename}"
+    if background:
+        log = open(os.path.join(build_dir, "sphinx.log"), "w")
+        subprocess.Popen(cmd, shell=True, stdout=log, stderr=subprocess.STDOUT, start_new_session=True)
+        print(f"Building documentation in the background, see {log.name}")
+    else:
+        os.system(cmd)
+
+# Multi-seed place and route -----------------------------------------------------------------------
+
+def run_pnr_seeds(builder, seeds, jobs=None):
+    """Place and route with several nextpnr seeds in parallel and pack the best one.
+
+    Runs the commands of the build_<build_name>.sh script LiteX writes to the gateware directory,
+    Yosys once and then its nextpnr call once per seed with its own <build_name>_seed<n>.config/.log/
+    .json report, then the packer. The seed whose worst clock has the highest achieved/constrained
+    Fmax wins, the lowest seed on a tie, so a build is reproducible. Per seed timing is printed and
+    saved to <build_name>_seeds.json.
+    """
+    build_name = builder.soc.get_build_name()
+    cwd        = builder.gateware_dir
+
+    def run(cmd, log=None):
+        if log is None:
+            return subprocess.run(cmd, shell=True, cwd=cwd).returncode
+        with open(os.path.join(cwd, log), "w") as f:
+            return subprocess.run(cmd, shell=True, cwd=cwd, stdout=f, stderr=subprocess.STDOUT).returncode
+
+    # Yosys, nextpnr, then the packer commands, one per line.
+    script = os.path.join(cwd, f"build_{build_name}.sh")
+    with open(script) as f:
+        cmds = [line.strip() for line in f if line.strip() and not line.startswith("#") and line.strip() != "set -e"]
+    pnr_index = next((i for i, cmd in enumerate(cmds) if shlex.split(cmd)[0].startswith("nextpnr")), None)
+    if pnr_index is None:
+        raise OSError(f"No nextpnr call in {script}.")
+    pnr_args = shlex.split(cmds[pnr_index])
+    for arg in [f"{build_name}.config", "--seed"]:
+        if arg not in pnr_args:
+            raise OSError(f"No {arg} in the nextpnr call of {script}: {cmds[pnr_index]}")
+
+    for cmd in cmds[:pnr_index]:
+        if run(cmd) != 0:
+            raise OSError(f"Error occured during the execution of: {cmd}")
+
+    def pnr(seed):
+        name = f"{build_name}_seed{seed}"
+        args = [f"{name}.config" if arg == f"{build_name}.config" else arg for arg in pnr_args]
+        args[args.index("--seed") + 1] = str(seed)
+        cmd  = shlex.join(args + ["--report", f"{name}.json"])
+        result = {"seed": seed, "ok": run(cmd, log=f"{name}.log") == 0, "fmax": {}, "score": None}
+        if result["ok"] and os.path.isfile(os.path.join(cwd, f"{name}.json")):
+            with open(os.path.join(cwd, f"{name}.json")) as f:
+                result["fmax"] = json.load(f).get("fmax", {})
+            ratios = [c["achieved"] / c["constraint"] for c in result["fmax"].values() if c.get("constraint")]
+            result["score"] = min(ratios) if ratios else 0.0
+        return result
+
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        results = list(pool.map(pnr, seeds))
+
+    placed = [r for r in results if r["score"] is not None]
+    best   = max(placed, key=lambda r: (r["score"], -r["seed"])) if placed else None
+
+    print(f"{'SEED':>6} {'STATUS':>8}  TIMING (achieved/constraint MHz)")
+    for r in results:
+        status = "BEST" if r is best else ("OK" if r["ok"] else "FAILED")
+        timing = ", ".join(f"{clk}: {c['achieved']:.2f}/{c['constraint']:.2f}" for clk, c in sorted(r["fmax"].items()))
+        print(f"{r['seed']:>6} {status:>8}  {timing or 'see ' + build_name + '_seed' + str(r['seed']) + '.log'}")
+    with open(os.path.join(cwd, f"{build_name}_seeds.json"), "w") as f:
+        json.dump({"best": best and best["seed"], "seeds": results}, f, indent=2)
+
+    if best is None:
+        raise OSError("Error occured during Nextpnr's execution, no seed placed and routed.")
+    if builder.soc.platform.toolchain.timingstrict and best["score"] < 1:
+        raise OSError(f"No seed met timing, best is seed {best['seed']}.")
+
+    shutil.copyfile(os.path.join(cwd, f"{build_name}_seed{best['seed']}.config"),
+                    os.path.join(cwd, f"{build_name}.config"))
+    for cmd in cmds[pnr_index + 1:]:
+        if run(cmd) != 0:
+            raise OSError(f"Error occured during the execution of: {cmd}")
+    return best
+
 # Build --------------------------------------------------------------------------------------------
 
 def main():
@@ -158,8 +417,29 @@ def main():
     parser = LiteXArgumentParser(platform=FPGAPlatform, description="LiteX SoC")
     parser.add_target_argument("--flash",               action="store_true",      help="Flash Bitstream and BIOS.")
     parser.add_target_argument("--sim",               action="store_true",      help="Flash Bitstream and BIOS.")
+    parser.add_target_argument("--force",             action="store_true",      help="Elaborate even if the --sim outputs are up to date.")
+    parser.add_target_argument("--doc-background",    action="store_true",      help="Like --doc, but don't wait for Sphinx.")
+    parser.add_target_argument("--sys-clk-freq",      default=48e6, type=float, help="System clock frequency.")
+    parser.add_target_argument("--hyperbus-clk-freq", default=None, type=float, help="HyperBus clock frequency (default: --sys-clk-freq).")
+    parser.add_target_argument("--with-itcm",         action="store_true",      help="Add a 2KB GF180 SRAM on the CPU instruction port.")
+    parser.add_target_argument("--with-dtcm",         action="store_true",      help="Add a 2KB GF180 SRAM on the CPU data port.")
+    parser.add_target_argument("--seeds",             default=1, type=int,      help="Place and route with this many nextpnr seeds (from --nextpnr-seed) in parallel, keep the best.")
+    parser.add_target_argument("--seed-jobs",         default=None, type=int,   help="Parallel nextpnr runs for --seeds (default: CPU count).")
     args = parser.parse_args()
 
+    # --cpu-variant comes from the LiteX SoC arguments, it picks one of the prebuilt variants here
+    cpu_variant = args.cpu_variant or "lite"
+    if cpu_variant not in CPU_VARIANTS:
+        parser.error(f"--cpu-variant must be one of {', '.join(CPU_VARIANTS)}")
+
+    # Skip the elaboration when nothing it depends on changed, dut.v keeps its mtime so make
+    # doesn't rebuild the simulator either.
+    if args.sim:
+        digest = gateware_hash([arg for arg in sys.argv[1:] if arg != "--force"])
+        if not args.force and gateware_up_to_date("build", digest):
+            print("Gateware up to date, skipping elaboration (--force to rebuild)")
+            return 0
+
     if args.sim:
         platform = SimPlatform()
     else:
@@ -168,6 +448,11 @@ def main():
     ##### define the soc
     soc = FrostyFerretSoc(
         platform,
+        sys_clk_freq      = int(args.sys_clk_freq),
+        hyperbus_clk_freq = args.hyperbus_clk_freq and int(args.hyperbus_clk_freq),
+        cpu_variant       = cpu_variant,
+        with_itcm         = args.with_itcm,
+        with_dtcm         = args.with_dtcm,
     )
 
     ##### setup the builder and run it
@@ -178,18 +463,29 @@ def main():
 
     if args.sim:
         vns = builder.build(run=False)
+        write_csr_signals(soc, vns, "build/csr_signals.csv")
+        with open("build/gateware/dut.hash", "w") as f:
+            f.write(digest + "\n")
         return 0
     
-    vns = builder.build()
+    if args.build and args.seeds > 1:
+        vns = builder.build(run=False, **parser.toolchain_argdict)
+        seed = parser.toolchain_argdict.get("seed", 1)
+        run_pnr_seeds(builder, range(seed, seed + args.seeds), args.seed_jobs)
+    else:
+        vns = builder.build(**parser.toolchain_argdict)
     soc.do_exit(vns)
-    lxsocdoc.generate_docs(soc, "build/documentation", note_pulses=True, quiet=True, sphinx_extensions=['sphinx_verilog_domain'])
-    os.system("sphinx-build -M html build/documentation/ build/documentation/_build")
-        
-    
+
+    # Docs never hold up --load: started before it in the background, or built after it
+    if args.doc_background:
+        build_docs(soc, "build/documentation", background=True)
+
     if args.load:
         prog = soc.platform.create_programmer()
         prog.load_bitstream(builder.get_bitstream_filename(mode="sram", ext=".bit")) 
 
+    if args.doc and not args.doc_background:
+        build_docs(soc, "build/documentation")
 
     return 0
 
@@ -11,6 +11,8 @@ import argparse
 
 
 DEPS_DIR = "deps"
+CACHE_FILE = ".lxbuildenv_cache"
+CACHE_ENTRIES = 8
 
 DEFAULT_DEPS = {
     'migen':        'https://github.com/m-labs/migen.git',
@@ -320,6 +322,78 @@ def check_submodules(script_path, args):
             print("lxbuildenv: Submodule check: Submodules found")
 
 
+# Read the commit a git checkout is at without running git.  Returns None if
+# the checkout is missing.
+def read_git_head(path):
+    git_path = path + os.path.sep + '.git'
+    try:
+        # Submodules have a .git file pointing at the real git directory
+        if os.path.isfile(git_path):
+            with open(git_path, 'r') as f:
+                git_path = os.path.join(path, f.read().split(":", 1)[1].strip())
+        with open(git_path + os.path.sep + 'HEAD', 'r') as f:
+            head = f.read().strip()
+        if head.startswith("ref:"):
+            ref_path = git_path + os.path.sep + head[4:].strip()
+            if os.path.isfile(ref_path):
+                with open(ref_path, 'r') as f:
+                    head = f.read().strip()
+    except (OSError, IndexError):
+        return None
+    return head
+
+# Everything the dependency and submodule checks depend on: the interpreter,
+# the PATH and the mtime of each directory in it (tools being installed or
+# removed), the main script and the commit of every submodule.  Returns None
+# if a submodule is missing, so the checks run and can fetch it.
+def environment_key(script_path, args):
+    import hashlib
+    import json
+
+    def stat(path):
+        try:
+            st = os.stat(path)
+            return [st.st_mtime_ns, st.st_size]
+        except OSError:
+            return None
+
+    key = {
+        'python': [sys.executable, sys.version],
+        'path': [[p, stat(p)] for p in os.environ.get("PATH", "").split(os.pathsep)],
+        'main': [os.path.realpath(sys.argv[0]), stat(sys.argv[0])],
+        'lxbuildenv': stat(os.path.realpath(__file__)),
+        'args': [args.lx_ignore_deps, args.lx_ignore_git, args.lx_recursive_git],
+        'submodules': {},
+    }
+    if os.path.isfile(script_path + '.gitmodules'):
+        with open(script_path + '.gitmodules', 'r') as f:
+            for line in f:
+                parts = line.split("=", 2)
+                if parts[0].strip() == "path":
+                    path = parts[1].strip()
+                    head = read_git_head(script_path + path)
+                    if head is None:
+                        return None
+                    key['submodules'][path] = head
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+# The cache is a list of environment keys that passed all checks, most recent
+# first, so switching between a few environments stays fast.
+def read_cache(script_path):
+    try:
+        with open(script_path + CACHE_FILE, 'r') as f:
+            return f.read().split()
+    except OSError:
+        return []
+
+def write_cache(script_path, key):
+    keys = [key] + [k for k in read_cache(script_path) if k != key]
+    try:
+        with open(script_path + CACHE_FILE, 'w') as f:
+            f.write("\n".join(keys[:CACHE_ENTRIES]) + "\n")
+    except OSError:
+        pass
+
 def lx_git(cmd, *args):
     import subprocess
     git_cmd = ["git", cmd]
@@ -501,6 +575,50 @@ if __name__ == "__main__":
         return False
     return True
 
+# Run the main script again in a new interpreter with the lxbuildenv environment
+def relaunch(rest):
+    try:
+        sys.exit(subprocess.Popen(
+            [sys.executable] + [sys.argv[0]] + rest).wait())
+    except Exception as e:
+        print(e)
+        sys.exit(1)
+
+# Check dependencies and submodules, then re-launch the main script with the
+# lxbuildenv environment.  The checks are skipped if they already passed in
+# this exact environment.
+def lx_checks(args, rest):
+    use_cache = not (args.lx_fast or args.lx_no_cache or args.lx_check_deps or args.lx_check_git or args.lx_verbose)
+    key = environment_key(script_path, args) if use_cache else None
+    if args.lx_fast or (key is not None and key in read_cache(script_path)):
+        fixup_env(script_path, args)
+        relaunch(rest)
+
+    config = read_configuration(sys.argv[0], args)
+    deps = config['dependencies']
+
+    fixup_env(script_path, args)
+    check_dependencies(args, deps)
+    if args.lx_check_git:
+        check_submodules(script_path, args)
+    elif config['skip-git']:
+        if not args.lx_quiet:
+            print('lxbuildenv: Skipping git configuration because "skip-git" was found in LX_CONFIGURATION')
+            print('lxbuildenv: To fetch from git, run {} --lx-check-git'.format(" ".join(sys.argv)))
+    elif args.lx_ignore_git:
+        if not args.lx_quiet:
+            print('lxbuildenv: Skipping git configuration because "--lx-ignore-git" Was specified')
+    else:
+        check_submodules(script_path, args)
+
+    # All checks passed, submodules may have been updated so hash again
+    if use_cache:
+        key = environment_key(script_path, args)
+        if key is not None:
+            write_cache(script_path, key)
+
+    relaunch(rest)
+
 # For the main command, parse args and hand it off to main()
 def main():
     parser = argparse.ArgumentParser(
@@ -578,38 +696,32 @@ elif "LXBUILDENV_REEXEC" not in os.environ:
     parser.add_argument(
         "--lx-recursive-git", help="recursively check out submodules", action="store_true"
     )
+    parser.add_argument(
+        "--lx-no-cache", help="run the dependency and git checks even if they passed before in this environment", action="store_true"
+    )
+    parser.add_argument(
+        "--lx-fast", help="skip all checks, and don't re-launch Python if PYTHONHASHSEED is already 1", action="store_true"
+    )
     (args, rest) = parser.parse_known_args()
 
-    if not args.lx_quiet:
+    if not args.lx_quiet and not args.lx_fast:
         print("lxbuildenv: v{} (run {} --lx-help for help)".format(LXBUILDENV_VERSION, sys.argv[0]))
 
     if args.lx_print_deps:
         lx_print_deps()
         sys.exit(0)
 
-    config = read_configuration(sys.argv[0], args)
-    deps = config['dependencies']
-
-    fixup_env(script_path, args)
-    check_dependencies(args, deps)
-    if args.lx_check_git:
-        check_submodules(script_path, args)
-    elif config['skip-git']:
-        if not args.lx_quiet:
-            print('lxbuildenv: Skipping git configuration because "skip-git" was found in LX_CONFIGURATION')
-            print('lxbuildenv: To fetch from git, run {} --lx-check-git'.format(" ".join(sys.argv)))
-    elif args.lx_ignore_git:
-        if not args.lx_quiet:
-            print('lxbuildenv: Skipping git configuration because "--lx-ignore-git" Was specified')
+    # The re-launch is only needed to get a fixed PYTHONHASHSEED, which Python
+    # reads at startup.  With the right seed already set, set up the paths and
+    # carry on in this process.
+    if args.lx_fast and os.environ.get("PYTHONHASHSEED") == "1" and not args.lx_print_env:
+        fixup_env(script_path, args)
+        sys.argv = [sys.argv[0]] + rest
+        for path in get_python_path(script_path, None):
+            sys.path.insert(0, path)
     else:
-        check_submodules(script_path, args)
+        lx_checks(args, rest)
 
-    try:
-        sys.exit(subprocess.Popen(
-            [sys.executable] + [sys.argv[0]] + rest).wait())
-    except Exception as e:
-        print(e)
-        sys.exit(1)
 else:
     # Overwrite the deps directory.
     # Because we're running with a predefined PYTHONPATH, you'd think that
@@ -13,7 +13,7 @@ from litex.build.lattice import LatticeECP5Platform
 from litex.build.lattice.programmer import EcpprogProgrammer
 from litex.soc.interconnect.csr import *
 
-from migen.genlib.resetsync import AsyncResetSynchronizer
+from litex.soc.cores.clock import ECP5PLL
 
 # IOs ----------------------------------------------------------------------------------------------
 
@@ -69,26 +69,48 @@ _connectors = [
 # CRG ----------------------------------------------------------------------------------------------
 
 class CRG(Module, AutoCSR):
-    def __init__(self, platform, sys_clk_freq):
-        reset_combo = Signal()
-
-        self.clock_domains.cd_sys   = ClockDomain()
-        clk_in = platform.request("clk12")
-        self.comb += [
-            self.cd_sys.clk.eq(clk_in)
-        ]
-
-        self.comb += reset_combo.eq(0)
-
-        self.specials += [
-            AsyncResetSynchronizer(self.cd_sys, reset_combo),
-        ]
+    """ECP5PLL clocking from the 12 MHz oscillator.
+
+    Domains:
+
+    - ``sys`` at ``sys_clk_freq``.
+    - ``hyperbus`` at ``hyperbus_clk_freq``, only when one is given. Otherwise the HyperBus core
+      runs in ``sys``.
+    - ``por``, reset-less, on the oscillator.
+
+    All PLL domains are held in reset until the power-on counter expires and the PLL locked,
+    ``rst_n`` (active low button) and ``rst`` (e.g. from the SoC controller) reset them too.
+    """
+    def __init__(self, platform, sys_clk_freq, hyperbus_clk_freq=None):
+        self.rst = Signal()
+
+        self.clock_domains.cd_por = ClockDomain(reset_less=True)
+        self.clock_domains.cd_sys = ClockDomain()
+
+        clk12 = platform.request("clk12")
+        rst_n = platform.request("rst_n")
+
+        # Power on reset
+        por_count = Signal(16, reset=2**16-1)
+        por_done  = Signal()
+        self.comb += self.cd_por.clk.eq(clk12)
+        self.comb += por_done.eq(por_count == 0)
+        self.sync.por += If(~por_done, por_count.eq(por_count - 1))
+
+        # PLL
+        self.submodules.pll = pll = ECP5PLL()
+        self.comb += pll.reset.eq(~por_done | ~rst_n | self.rst)
+        pll.register_clkin(clk12, 12e6)
+        pll.create_clkout(self.cd_sys, sys_clk_freq)
+        if hyperbus_clk_freq:
+            self.clock_domains.cd_hyperbus = ClockDomain()
+            pll.create_clkout(self.cd_hyperbus, hyperbus_clk_freq)
 
 # Platform -----------------------------------------------------------------------------------------
 
 class Platform(LatticeECP5Platform):
-    default_clk_name   = "clk48"
-    default_clk_period = 1e9/48e6
+    default_clk_name   = "clk12"
+    default_clk_period = 1e9/12e6
     crg = CRG
 
     def __init__(self, device="12F", toolchain="trellis", **kwargs):
@@ -100,4 +122,4 @@ class Platform(LatticeECP5Platform):
 
     def do_finalize(self, fragment):
         LatticeECP5Platform.do_finalize(self, fragment)
-        self.add_period_constraint(self.lookup_request("clk48", loose=True), 1e9/48e6)
+        self.add_period_constraint(self.lookup_request("clk12", loose=True), 1e9/12e6)
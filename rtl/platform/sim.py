@@ -49,7 +49,7 @@ _connectors = [
 ]
 
 class _CRG(Module):
-    def __init__(self, platform, sys_clk_freq):
+    def __init__(self, platform, sys_clk_freq, hyperbus_clk_freq=None):
         clk = platform.request("clk")
         rst = platform.request("reset")
 
@@ -60,7 +60,7 @@ class _CRG(Module):
 
         # Power on reset
         self.clock_domains.cd_por     = ClockDomain()
-        por_count = Signal(7, reset=2**7-1)
+        self.por_count = por_count = Signal(7, reset=2**7-1)
         por_done  = Signal()
         self.comb += self.cd_por.clk.eq(clk)
         self.comb += por_done.eq(por_count == 0)
@@ -71,6 +71,14 @@ class _CRG(Module):
             ResetSignal("por").eq(rst),
         ]
 
+        # A separate HyperBus domain runs off the same clock, this still exercises the crossings
+        if hyperbus_clk_freq:
+            self.clock_domains.cd_hyperbus = ClockDomain()
+            self.comb += [
+                self.cd_hyperbus.clk.eq(clk),
+                self.cd_hyperbus.rst.eq(ResetSignal("sys")),
+            ]
+
 class Platform(SimPlatform):
     crg = _CRG
 
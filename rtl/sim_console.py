@@ -0,0 +1,19 @@
+from migen import *
+from litex.soc.interconnect.csr import *
+from litex.soc.integration.doc import ModuleDoc
+
+class SimConsole(Module, AutoCSR):
+    def __init__(self):
+        self.intro = ModuleDoc("""Simulation console mailbox
+
+        Sim builds only. ``SoCTestHarness`` in verif/sim watches the write strobes of these CSRs and
+        does the formatting itself, so a log line or a profiling marker costs the firmware a few CSR
+        stores instead of shifting characters out of the UART.
+
+        Firmware pushes 32-bit arguments to ``arg``, then writes either the address of a printf format
+        string to ``printf`` (the harness reads it, and ``%s`` arguments, from the firmware image) or
+        a marker id to ``marker`` (the harness records it with the cycle count and the arguments).
+        """)
+        self._arg    = CSRStorage(32, description="Next argument of ``printf``/``marker``.")
+        self._printf = CSRStorage(32, description="Format string address, prints with the arguments pushed since the last message.")
+        self._marker = CSRStorage(32, description="Marker id, recorded with the cycle count and the arguments pushed since the last message.")
@@ -52,3 +52,112 @@ class GF180_RAM(Module):
                                   )
 
         self.sync += self.bus.ack.eq(self.bus.stb & self.bus.cyc & ~self.bus.ack)
+
+
+class GF180_TCM(Module):
+    """GF180_RAM tightly coupled to a CPU bus port.
+
+    Sits between the CPU port and the SoC interconnect: accesses to [origin, origin + size) are
+    served by the RAM directly, without arbitration against the other CPU port or the DMA masters,
+    everything else is passed on to `bus`. `slave` makes the RAM visible on the interconnect too, so
+    the other port can load it. The CPU port has priority, but `slave` gets the RAM after waiting a
+    cycle and the CPU port stalls until its access is done, so it can't be starved: a `slave` access
+    is acked at most three cycles after it is requested.
+
+    The RAM is synchronous, so a read is acked in the cycle it is requested only when the RAM read
+    that address in the previous cycle. After each read the RAM reads the next word, so sequential
+    accesses (instruction fetches, cache refills, copies) take one cycle, other reads two. Writes
+    are acked in the cycle they are requested.
+    """
+    def __init__(self, origin, size=2 * kB):
+        self.cpu_bus = cpu_bus = wishbone.Interface(data_width=32, address_width=32, addressing="word")
+        self.bus     = bus     = wishbone.Interface(data_width=32, address_width=32, addressing="word")
+        self.slave   = slave   = wishbone.Interface(32)
+
+        # # #
+        assert origin % size == 0
+        self.submodules.ram = ram = GF180_RAM(size=size)
+
+        # CPU port decoding, the address is held for the whole access.
+        words   = log2_int(size // 4)
+        cpu_hit = Signal()
+        self.comb += cpu_hit.eq(cpu_bus.adr[words:] == (origin >> (words + 2)))
+
+        # Port using the RAM: the shared port gets it when the CPU port isn't using it, or after
+        # it has waited a cycle, and keeps it until its ack.
+        cpu_req    = Signal()
+        slave_req  = Signal()
+        slave_wait = Signal()
+        slave_sel  = Signal()
+        access     = Signal()
+        adr        = Signal(words)
+        we         = Signal()
+        ack        = Signal()
+        self.comb += [
+            cpu_req.eq(cpu_bus.cyc & cpu_bus.stb & cpu_hit),
+            slave_req.eq(slave.cyc & slave.stb),
+        ]
+        self.sync += [
+            slave_wait.eq(slave_req & ~slave_sel),
+            If(~slave_sel,
+                slave_sel.eq(slave_req & (~cpu_req | slave_wait)),
+            ).Elif(ack,
+                slave_sel.eq(0),
+            ),
+        ]
+        self.comb += If(slave_sel,
+            access.eq(slave.cyc & slave.stb),
+            adr.eq(slave.adr[:words]),
+            we.eq(slave.we),
+            ram.bus.dat_w.eq(slave.dat_w),
+            ram.bus.sel.eq(slave.sel),
+        ).Else(
+            access.eq(cpu_req),
+            adr.eq(cpu_bus.adr[:words]),
+            we.eq(cpu_bus.we),
+            ram.bus.dat_w.eq(cpu_bus.dat_w),
+            ram.bus.sel.eq(cpu_bus.sel),
+        )
+
+        # Word on the RAM output, read in the previous cycle.
+        rd_adr   = Signal(words)
+        rd_valid = Signal()
+        read_hit = Signal()
+        self.comb += [
+            read_hit.eq(access & ~we & rd_valid & (adr == rd_adr)),
+            ack.eq(read_hit | (access & we)),
+            # Next word after a read, the requested one on a miss, else keep the output.
+            If(read_hit,
+                ram.bus.adr.eq(adr + 1),
+            ).Elif(access,
+                ram.bus.adr.eq(adr),
+            ).Else(
+                ram.bus.adr.eq(rd_adr),
+            ),
+            ram.bus.cyc.eq(access),
+            ram.bus.stb.eq(access),
+            ram.bus.we.eq(we),
+        ]
+        self.sync += [
+            rd_adr.eq(ram.bus.adr),
+            rd_valid.eq(~(access & we)),
+        ]
+
+        self.comb += [
+            # Passthrough.
+            cpu_bus.connect(bus, omit={"cyc", "stb", "ack", "err", "dat_r"}),
+            bus.cyc.eq(cpu_bus.cyc & ~cpu_hit),
+            bus.stb.eq(cpu_bus.stb & ~cpu_hit),
+            If(cpu_hit,
+                cpu_bus.ack.eq(ack & ~slave_sel),
+                cpu_bus.dat_r.eq(ram.bus.dat_r),
+            ).Else(
+                cpu_bus.ack.eq(bus.ack),
+                cpu_bus.err.eq(bus.err),
+                cpu_bus.dat_r.eq(bus.dat_r),
+            ),
+
+            # Shared port.
+            slave.ack.eq(ack & slave_sel),
+            slave.dat_r.eq(ram.bus.dat_r),
+        ]
@@ -0,0 +1,138 @@
+#
+# This file is part of frosty-ferret-soc
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+import unittest
+import random
+
+from migen import *
+
+from litex.gen.sim import run_simulation, passive
+
+from rtl.sram import GF180_TCM, kB
+
+ORIGIN = 0x12000000
+WORDS  = 2 * kB // 4
+
+# Cycles a slave access is on the bus at most, however busy the CPU port: acked three cycles after
+# the request.
+MAX_CYCLES = 4
+
+
+class GF180RAMModel:
+    """Replaces the ``GF180_RAM_512x32`` Instance of ``GF180_RAM``: Q is registered, writes are byte
+    enabled, CEN/GWEN/WEN are active low. An Array, the simulator turns Memories into Arrays before
+    it lowers the Instances.
+    """
+    def lower(self, instance):
+        if instance.of != "GF180_RAM_512x32":
+            return None
+        ports = {item.name: item.expr for item in instance.items if hasattr(item, "expr")}
+        a, d, wen = ports["A"], ports["D"], ports["WEN"]
+
+        m   = Module()
+        mem = Array(Signal(32) for _ in range(WORDS))
+        m.sync += If(~ports["CEN"],
+            If(~ports["GWEN"],
+                mem[a].eq(Cat(*[Mux(wen[i], mem[a][8*i:8*(i + 1)], d[8*i:8*(i + 1)]) for i in range(4)])),
+            ),
+            ports["Q"].eq(mem[a]),
+        )
+        return m
+
+
+class TCMDUT(Module):
+    def __init__(self):
+        # GF180_RAM enables the RAM with the sys reset, the simulator's default sys has none.
+        self.clock_domains.cd_sys = ClockDomain()
+
+        self.submodules.tcm = GF180_TCM(ORIGIN)
+
+        self.cycles = Signal(32)
+        self.sync += self.cycles.eq(self.cycles + 1)
+
+
+def access(dut, bus, adr, data=None):
+    """Wishbone read or write, returns the read data and the cycles it was on the bus, the ack cycle
+    included.
+    """
+    start = (yield dut.cycles)
+    yield bus.adr.eq(adr)
+    yield bus.we.eq(data is not None)
+    yield bus.sel.eq(0xF)
+    if data is not None:
+        yield bus.dat_w.eq(data)
+    yield bus.cyc.eq(1)
+    yield bus.stb.eq(1)
+    yield
+    for _ in range(100):
+        if (yield bus.ack):
+            break
+        yield
+    value = (yield bus.dat_r)
+    cycles = (yield dut.cycles) - start
+    yield bus.cyc.eq(0)
+    yield bus.stb.eq(0)
+    yield bus.we.eq(0)
+    return value, cycles
+
+
+class TestGF180TCM(unittest.TestCase):
+    def setUp(self):
+        random.seed(self.id())
+
+    def test_slave_not_starved(self):
+        # The CPU port requests the RAM in every cycle, sequential and random reads and writes.
+        dut    = TCMDUT()
+        data   = {adr: random.randrange(2**32) for adr in random.sample(range(WORDS // 2), 32)}
+        cpu    = {"acks": 0, "adr": 0}
+        cycles = []
+
+        @passive
+        def cpu_generator():
+            while True:
+                # Only the upper half, the slave uses the lower one.
+                adr = cpu["adr"] if random.random() < 0.5 else random.randrange(WORDS)
+                adr = WORDS // 2 + adr % (WORDS // 2)
+                write = random.random() < 0.25
+                yield from access(dut, dut.tcm.cpu_bus, (ORIGIN >> 2) + adr,
+                    random.randrange(2**32) if write else None)
+                cpu["adr"]   = adr + 1
+                cpu["acks"] += 1
+
+        def slave_generator():
+            for _ in range(8):
+                yield
+            for adr, value in data.items():
+                _, n = yield from access(dut, dut.tcm.slave, adr, value)
+                self.assertLessEqual(n, MAX_CYCLES, f"write {adr:#x}")
+                cycles.append(n)
+            for adr, value in data.items():
+                read, n = yield from access(dut, dut.tcm.slave, adr)
+                self.assertLessEqual(n, MAX_CYCLES, f"read {adr:#x}")
+                self.assertEqual(read, value, f"word {adr:#x}")
+                cycles.append(n)
+            # The CPU port kept going between the slave accesses.
+            self.assertGreater(cpu["acks"], len(cycles) // 2)
+
+        run_simulation(dut, [cpu_generator(), slave_generator()], special_overrides={Instance: GF180RAMModel()})
+        self.assertEqual(len(cycles), 2 * len(data))
+
+    def test_cpu_read_after_slave_write(self):
+        dut = TCMDUT()
+        data = {adr: random.randrange(2**32) for adr in random.sample(range(WORDS), 16)}
+
+        def generator():
+            for adr, value in data.items():
+                yield from access(dut, dut.tcm.slave, adr, value)
+            for adr, value in data.items():
+                read, _ = yield from access(dut, dut.tcm.cpu_bus, (ORIGIN >> 2) + adr)
+                self.assertEqual(read, value, f"word {adr:#x}")
+
+        run_simulation(dut, generator(), special_overrides={Instance: GF180RAMModel()})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+#include <generated/csr.h>
+#include <frostyferret.h>
+
+/* Memory benchmarks. Each result is a cycle count measured with timer0, handed
+ * to the simulation through ctrl_scratch and a SIM_MARKER with the benchmark id.
+ * Ids and sizes must match BENCHMARKS in verif/sim/tests.py.
+ *
+ * The timed loops are inline assembly so the numbers do not depend on the
+ * compiler, only on the CPU, the bus and the memory controllers. */
+
+#define SRAM_BASE       ((uintptr_t)sram_buf)
+#define SPIFLASH_BASE   0x20000000
+#define HYPERRAM_BASE   0x30000000
+
+#define SRAM_WORDS      32
+#define EXT_WORDS       64
+
+/* Byte windows for the strided (random) accesses, stride 37 words */
+#define SRAM_MASK       (SRAM_WORDS * 4 - 4)
+#define SPIFLASH_MASK   0x3fc
+#define HYPERRAM_MASK   0xffc
+#define STRIDE          (37 * 4)
+
+/* ITCM_BASE/DTCM_BASE when the SoC has them, after the defines above so
+ * they win over the generated ones */
+#include <generated/mem.h>
+
+#define BENCH_CALIBRATION           0x100
+#define BENCH_SRAM_SEQ_READ         0x101
+#define BENCH_SRAM_SEQ_WRITE        0x102
+#define BENCH_SRAM_RAND_READ        0x103
+#define BENCH_SRAM_RAND_WRITE       0x104
+#define BENCH_SPIFLASH_SEQ_READ     0x111
+#define BENCH_SPIFLASH_RAND_READ    0x113
+#define BENCH_HYPERBUS0_SEQ_READ    0x121
+#define BENCH_HYPERBUS0_SEQ_WRITE   0x122
+#define BENCH_HYPERBUS0_RAND_READ   0x123
+#define BENCH_HYPERBUS0_RAND_WRITE  0x124
+#define BENCH_MEMCPY_HYPERBUS0      0x131
+#define BENCH_MEMCPY_SRAM_HYPERBUS0 0x132
+#define BENCH_MEMCPY_SPIFLASH_SRAM  0x133
+#define BENCH_EXEC_SRAM             0x141
+#define BENCH_EXEC_HYPERBUS0        0x142
+#define BENCH_EXEC_ITCM             0x143
+#define BENCH_DTCM_SEQ_READ         0x151
+#define BENCH_DTCM_SEQ_WRITE        0x152
+#define BENCH_DTCM_RAND_READ        0x153
+#define BENCH_DTCM_RAND_WRITE       0x154
+
+static uint32_t sram_buf[SRAM_WORDS];
+
+/* ---- Timer ---- */
+/* timer0 counts down from 0xffffffff once per sys clock. Out of line to keep
+ * the image small, the calibration result includes the calls */
+static void __attribute__((noinline)) timer_start(void){
+    timer0_en_write(0);
+    timer0_reload_write(0);
+    timer0_load_write(0xffffffff);
+    timer0_en_write(1);
+    /* Stores are posted, and code fetched from HyperRAM keeps the instruction
+     * bus granted, so wait for the enable to land before returning */
+    (void)timer0_en_read();
+}
+
+static uint32_t __attribute__((noinline)) timer_stop(void){
+    timer0_update_value_write(1);
+    return 0xffffffff - timer0_value_read();
+}
+
+/* Read back scratch so the write has landed before the marker retires */
+static void __attribute__((noinline)) report(uint32_t value){
+    ctrl_scratch_write(value);
+    (void)ctrl_scratch_read();
+}
+
+#define REPORT(id, value) do { \
+        report(value); \
+        SIM_MARKER(id); \
+    } while(0)
+
+static uint32_t overhead;
+
+#define BENCH(id, call) do { \
+        uint32_t cycles; \
+        timer_start(); \
+        call; \
+        cycles = timer_stop(); \
+        REPORT(id, cycles - overhead); \
+    } while(0)
+
+/* ---- Kernels ---- */
+static void __attribute__((noinline)) seq_read(uintptr_t addr, uint32_t n){
+    __asm__ volatile(
+        "1: lw   t0, 0(%0)\n"
+        "   addi %0, %0, 4\n"
+        "   addi %1, %1, -1\n"
+        "   bnez %1, 1b\n"
+        : "+r"(addr), "+r"(n) : : "t0", "memory");
+}
+
+static void __attribute__((noinline)) seq_write(uintptr_t addr, uint32_t n){
+    __asm__ volatile(
+        "1: sw   %1, 0(%0)\n"
+        "   addi %0, %0, 4\n"
+        "   addi %1, %1, -1\n"
+        "   bnez %1, 1b\n"
+        : "+r"(addr), "+r"(n) : : "memory");
+}
+
+static void __attribute__((noinline)) rand_read(uintptr_t base, uint32_t n, uint32_t mask){
+    uint32_t offset = 0;
+    __asm__ volatile(
+        "1: add  t0, %0, %1\n"
+        "   lw   t0, 0(t0)\n"
+        "   addi %1, %1, %4\n"
+        "   and  %1, %1, %3\n"
+        "   addi %2, %2, -1\n"
+        "   bnez %2, 1b\n"
+        : "+r"(base), "+r"(offset), "+r"(n) : "r"(mask), "i"(STRIDE) : "t0", "memory");
+}
+
+static void __attribute__((noinline)) rand_write(uintptr_t base, uint32_t n, uint32_t mask){
+    uint32_t offset = 0;
+    __asm__ volatile(
+        "1: add  t0, %0, %1\n"
+        "   sw   %2, 0(t0)\n"
+        "   addi %1, %1, %4\n"
+        "   and  %1, %1, %3\n"
+        "   addi %2, %2, -1\n"
+        "   bnez %2, 1b\n"
+        : "+r"(base), "+r"(offset), "+r"(n) : "r"(mask), "i"(STRIDE) : "t0", "memory");
+}
+
+static void __attribute__((noinline)) copy(uintptr_t dst, uintptr_t src, uint32_t n){
+    __asm__ volatile(
+        "1: lw   t0, 0(%1)\n"
+        "   sw   t0, 0(%0)\n"
+        "   addi %0, %0, 4\n"
+        "   addi %1, %1, 4\n"
+        "   addi %2, %2, -1\n"
+        "   bnez %2, 1b\n"
+        : "+r"(dst), "+r"(src), "+r"(n) : : "t0", "memory");
+}
+
+/* ALU loop, 64 iterations of 6 addi and the loop counter: 514 instructions with the li and ret.
+ * Position independent, it is also copied to and run from HyperRAM */
+__attribute__((used, naked, section(".hyperbus_mem")))
+void exec_kernel(void){
+    __asm__ volatile(
+        "   li   t0, 64\n"
+        "1: addi t1, t1, 1\n"
+        "   addi t1, t1, 1\n"
+        "   addi t1, t1, 1\n"
+        "   addi t1, t1, 1\n"
+        "   addi t1, t1, 1\n"
+        "   addi t1, t1, 1\n"
+        "   addi t0, t0, -1\n"
+        "   bnez t0, 1b\n"
+        "   ret\n");
+}
+
+static void run(uintptr_t addr){
+    ((void (*)(void))addr)();
+}
+
+// From linker
+extern uint32_t hyperbus_start;
+extern uint32_t hyperbus_end;
+
+/* ---- Main Function ---- */
+int main() {
+
+    /* Fixed 6 clock latency, the MMAP core and CR0 reset values */
+    HYPERBUS0_REG->cr0 = 0x8F1F;
+
+    /* Cost of the timer itself, subtracted from every result */
+    overhead = 0;
+    timer_start();
+    overhead = timer_stop();
+    REPORT(BENCH_CALIBRATION, overhead);
+
+    BENCH(BENCH_SRAM_SEQ_WRITE, seq_write(SRAM_BASE, SRAM_WORDS));
+    BENCH(BENCH_SRAM_SEQ_READ, seq_read(SRAM_BASE, SRAM_WORDS));
+    BENCH(BENCH_SRAM_RAND_WRITE, rand_write(SRAM_BASE, SRAM_WORDS, SRAM_MASK));
+    BENCH(BENCH_SRAM_RAND_READ, rand_read(SRAM_BASE, SRAM_WORDS, SRAM_MASK));
+
+    BENCH(BENCH_SPIFLASH_SEQ_READ, seq_read(SPIFLASH_BASE, EXT_WORDS));
+    BENCH(BENCH_SPIFLASH_RAND_READ, rand_read(SPIFLASH_BASE, EXT_WORDS, SPIFLASH_MASK));
+
+    BENCH(BENCH_HYPERBUS0_SEQ_WRITE, seq_write(HYPERRAM_BASE, EXT_WORDS));
+    BENCH(BENCH_HYPERBUS0_SEQ_READ, seq_read(HYPERRAM_BASE, EXT_WORDS));
+    BENCH(BENCH_HYPERBUS0_RAND_WRITE, rand_write(HYPERRAM_BASE, EXT_WORDS, HYPERRAM_MASK));
+    BENCH(BENCH_HYPERBUS0_RAND_READ, rand_read(HYPERRAM_BASE, EXT_WORDS, HYPERRAM_MASK));
+
+    BENCH(BENCH_MEMCPY_HYPERBUS0, copy(HYPERRAM_BASE + 0x1000, HYPERRAM_BASE, EXT_WORDS));
+    BENCH(BENCH_MEMCPY_SRAM_HYPERBUS0, copy(HYPERRAM_BASE, SRAM_BASE, SRAM_WORDS));
+    BENCH(BENCH_MEMCPY_SPIFLASH_SRAM, copy(SRAM_BASE, SPIFLASH_BASE, SRAM_WORDS));
+
+    /* Execute in place, then from a copy in HyperRAM */
+    uint32_t words = (uint32_t)(&hyperbus_end - &hyperbus_start);
+    copy(HYPERRAM_BASE + 0x2000, (uintptr_t)&hyperbus_start, words);
+    BENCH(BENCH_EXEC_SRAM, run((uintptr_t)exec_kernel));
+    BENCH(BENCH_EXEC_HYPERBUS0, run(HYPERRAM_BASE + 0x2000));
+
+#ifdef DTCM_BASE
+    BENCH(BENCH_DTCM_SEQ_WRITE, seq_write(DTCM_BASE, SRAM_WORDS));
+    BENCH(BENCH_DTCM_SEQ_READ, seq_read(DTCM_BASE, SRAM_WORDS));
+    BENCH(BENCH_DTCM_RAND_WRITE, rand_write(DTCM_BASE, SRAM_WORDS, SRAM_MASK));
+    BENCH(BENCH_DTCM_RAND_READ, rand_read(DTCM_BASE, SRAM_WORDS, SRAM_MASK));
+#endif
+
+#ifdef ITCM_BASE
+    /* Loaded through the data port */
+    copy(ITCM_BASE, (uintptr_t)&hyperbus_start, words);
+    BENCH(BENCH_EXEC_ITCM, run(ITCM_BASE));
+#endif
+
+    return 0;
+}
+
+/* ---- Helper Functions ---- */
+/* ISRs will cause the CPU to jump here */
+void isr() {
+
+}
@@ -42,8 +42,24 @@ typedef struct {
     volatile uint32_t adr;
     volatile hyperbusCtrl_t ctrl;
     volatile hyperbusStatus_t status;
+    volatile uint32_t fifo_threshold;
+    volatile uint32_t ev_status;
+    volatile uint32_t ev_pending;
+    volatile uint32_t ev_enable;
 } hyperbus_t;
 
+/* HyperRAM registers, 16-bit values in the low half. Storing cr0 also sets latency_cycles. */
+typedef struct {
+    volatile uint32_t id0;
+    volatile uint32_t id1;
+    volatile uint32_t cr0;
+    volatile uint32_t cr1;
+} hyperramRegs_t;
+
+#define HYPERBUS_EV_DONE (1 << 0)
+#define HYPERBUS_EV_RX   (1 << 1)
+#define HYPERBUS_EV_TX   (1 << 2)
+
 #define HYPERBUS_CMD_READ 0x8000
 #define HYPERBUS_CMD_WRITE 0x0000
 #define HYPERBUS_AREA_MEM 0x0000
@@ -51,5 +67,37 @@ typedef struct {
 
 
 #define HYPERBUS0 ((hyperbus_t*)(0xf0001000))
+#define HYPERBUS0_IRQ 2 /* FrostyFerretSoc.irq.locs */
+
+/* HyperBusMaster TX/RX FIFO window: a store pushes to TX, a load pops RX, at any address in it */
+#define HYPERBUS0_FIFO ((volatile uint32_t*)(0xe0000000))
+
+/* HyperRAM register window */
+#define HYPERBUS0_REG ((hyperramRegs_t*)(0xe0001000))
+
+/* Simulation marker, a no-op HINT instruction that tb.v decodes into marker/marker_id.
+ * SoCTestHarness.trace() can start and stop waveform dumps on these. id: 0..2047 */
+#define SIM_MARKER(id) __asm__ volatile ("slti x0, x0, %0" :: "i"(id))
+
+/* Simulation console (SimConsole, sim builds only), decoded by SoCTestHarness in zero time.
+ * Include generated/csr.h first, without the CSRs these are no-ops.
+ * SIM_PRINTF: C format string, the harness formats it from the firmware image. Arguments are
+ *   32-bit, cast %s pointers to uintptr_t.
+ * SIM_PERF: marker with the cycle count and a value, in SoCTestHarness.markers. */
+#ifdef CSR_SIM_CONSOLE_BASE
+#define SIM_PRINTF(fmt, ...) do { \
+        const uint32_t _sim_args[] = {0, ##__VA_ARGS__}; \
+        for (unsigned _i = 1; _i < sizeof(_sim_args) / sizeof(_sim_args[0]); _i++) \
+            sim_console_arg_write(_sim_args[_i]); \
+        sim_console_printf_write((uintptr_t)(fmt)); \
+    } while(0)
+#define SIM_PERF(id, value) do { \
+        sim_console_arg_write(value); \
+        sim_console_marker_write(id); \
+    } while(0)
+#else
+#define SIM_PRINTF(fmt, ...) do { } while(0)
+#define SIM_PERF(id, value) do { } while(0)
+#endif
 
 #endif
\ No newline at end of file
@@ -15,7 +15,8 @@ int hyperram_read_id(){
     };
     while(HYPERBUS0->status.busy);
 
-    return HYPERBUS0->rxtx;
+    /* Fixed latency reads two words, ID0 is the first, in the upper half */
+    return HYPERBUS0->rxtx >> 16;
 }
 
 int hyperram_write(uint32_t addr, uint32_t data){
@@ -50,6 +51,47 @@ uint32_t hyperram_read(uint32_t addr){
     return HYPERBUS0->rxtx;
 }
 
+/* Same transactions with the data through the FIFO window */
+void hyperram_write_fifo(uint32_t addr, uint32_t data){
+    HYPERBUS0->ctrl = (const hyperbusCtrl_t){.reset=1};
+    HYPERBUS0->config = (const hyperbusConfig_t){.hyperbus_enable=1,.latency_count=7,.latency_variable=false, .data_size=1};
+    HYPERBUS0->cmd = (HYPERBUS_CMD_WRITE | HYPERBUS_AREA_MEM);
+    HYPERBUS0->adr = addr;
+    *HYPERBUS0_FIFO = data;
+    HYPERBUS0->ctrl = (const hyperbusCtrl_t){
+        .adr_phase = true,
+        .latency_phase = true,
+        .write_phase = true,
+        .start = true
+    };
+    while(HYPERBUS0->status.busy);
+}
+
+uint32_t hyperram_read_fifo(uint32_t addr){
+    HYPERBUS0->ctrl = (const hyperbusCtrl_t){.reset=1};
+    HYPERBUS0->config = (const hyperbusConfig_t){.hyperbus_enable=1,.latency_count=7,.latency_variable=false, .data_size=1};
+    HYPERBUS0->cmd = (HYPERBUS_CMD_READ | HYPERBUS_AREA_MEM);
+    HYPERBUS0->adr = addr;
+    HYPERBUS0->ctrl = (const hyperbusCtrl_t){
+        .adr_phase = true,
+        .latency_phase = true,
+        .read_phase = true,
+        .start = true
+    };
+    while(HYPERBUS0->status.busy);
+
+    return *HYPERBUS0_FIFO;
+}
+
+/* Set by the ISR on the done interrupt, the IRQ is enabled in main */
+static volatile uint32_t hyperbus_done;
+
+/* Wait for the done interrupt instead of polling busy */
+void hyperbus_wait_done(void){
+    while(!hyperbus_done);
+    hyperbus_done = 0;
+}
+
 void hyperram_cfg(uint32_t cfg){
     HYPERBUS0->config = (const hyperbusConfig_t){.hyperbus_enable=1,.latency_count=7,.latency_variable=false, .data_size=0};
     HYPERBUS0->cmd = (HYPERBUS_CMD_WRITE | HYPERBUS_AREA_REG);
@@ -61,7 +103,7 @@ void hyperram_cfg(uint32_t cfg){
         .start = true
     };
 
-    while(HYPERBUS0->status.busy);
+    hyperbus_wait_done();
 }
 
 uint32_t rand(void)
@@ -79,6 +121,7 @@ uint32_t rand(void)
 int main() {
 
     uint16_t id = hyperram_read_id();
+    SIM_PRINTF("HyperRAM ID0 %04x\n", id);
 
     if(id != 0x8f1f)
         return 1;
@@ -116,6 +159,19 @@ int main() {
     if(*(volatile uint32_t*)0x3000004c != 0xabe5910d)
         return 8;
     
+    /* Master with the data through the FIFO window */
+    hyperram_write_fifo(0x00200000, 0x5a5aa5a5);
+    if(0x5a5aa5a5 != hyperram_read(0x00200000))
+        return 15;
+    if(0x1234abcf != hyperram_read_fifo(0x0))
+        return 16;
+
+    /* Done interrupt for the following register writes */
+    HYPERBUS0->ev_pending = HYPERBUS_EV_DONE;
+    HYPERBUS0->ev_enable = HYPERBUS_EV_DONE;
+    __asm__ volatile ("csrw 0xBC0, %0" :: "r"(1 << HYPERBUS0_IRQ));
+    __asm__ volatile ("csrs mstatus, %0" :: "r"(1 << 3)); /* MIE, MEIE is set in start.s */
+
     /* Test adjustable latency */
     // Model only supports 6-3 cycle latency
     // hyperram_cfg(0x8F0F | (((8) + 11) & 0xF) << 4); /* 8 cycle latency*/
@@ -134,14 +190,18 @@ int main() {
 
     hyperram_cfg(0x8F0F | (((6) + 11) & 0xF) << 4); /* 6 cycle latency*/
     HYPERBUS0->latency_cycles = 6;
+    SIM_PERF(6, HYPERBUS0->latency_cycles);
     
     uint32_t v = rand();
     *(volatile uint32_t*)0x30001008 = v;
     if(*(volatile uint32_t*)0x30001008 != v)
         return 11;
 
-    hyperram_cfg(0x8F0F | (((5) + 11) & 0xF) << 4); /* 5 cycle latency*/
-    HYPERBUS0->latency_cycles = 5;
+    /* Through the register window, the store sets latency_cycles too */
+    HYPERBUS0_REG->cr0 = 0x8F0F | (((5) + 11) & 0xF) << 4; /* 5 cycle latency*/
+    if(HYPERBUS0_REG->cr0 != (0x8F0F | (((5) + 11) & 0xF) << 4) || HYPERBUS0->latency_cycles != 5)
+        return 17;
+    SIM_PERF(5, HYPERBUS0->latency_cycles);
     
     v = rand();
     *(volatile uint32_t*)0x3000100c = v;
@@ -151,6 +211,7 @@ int main() {
 
     hyperram_cfg(0x8F0F | (((4) + 11) & 0xF) << 4); /* 4 cycle latency*/
     HYPERBUS0->latency_cycles = 4;
+    SIM_PERF(4, HYPERBUS0->latency_cycles);
     
     v = rand();
     *(volatile uint32_t*)0x30001010 = v;
@@ -176,5 +237,10 @@ int main() {
 /* ---- Helper Functions ---- */
 /* ISRs will cause the CPU to jump here */
 void isr() {
-
+    uint32_t pending;
+    __asm__ volatile ("csrr %0, 0xFC0" : "=r"(pending));
+    if(pending & (1 << HYPERBUS0_IRQ)){
+        HYPERBUS0->ev_pending = HYPERBUS_EV_DONE;
+        hyperbus_done = 1;
+    }
 }
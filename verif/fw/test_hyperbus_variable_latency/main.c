@@ -0,0 +1,87 @@
+#include <generated/csr.h>
+#include <frostyferret.h>
+
+#define HYPERRAM_BASE 0x30000000
+
+void hyperram_cfg(uint32_t cfg){
+    HYPERBUS0->config = (const hyperbusConfig_t){.hyperbus_enable=1,.latency_count=7,.latency_variable=false, .data_size=0};
+    HYPERBUS0->cmd = (HYPERBUS_CMD_WRITE | HYPERBUS_AREA_REG);
+    HYPERBUS0->adr = 0x01000000;
+    HYPERBUS0->rxtx = cfg;
+    HYPERBUS0->ctrl = (const hyperbusCtrl_t){
+        .adr_phase = true,
+        .write_phase = true,
+        .start = true
+    };
+
+    while(HYPERBUS0->status.busy);
+}
+
+uint32_t xorshift(uint32_t x)
+{
+    x ^= x <<17;
+    x ^= x >>7;
+    x ^= x <<5;
+    return x;
+}
+
+uint32_t rand(void)
+{
+    static uint32_t state = 1;
+    state = xorshift(state);
+    return state;
+}
+
+/* Write a random pattern over a range of HyperRAM words, then read it back */
+int check_range(uint32_t offset, uint32_t words){
+    volatile uint32_t* ptr = (volatile uint32_t*)(HYPERRAM_BASE + offset);
+
+    uint32_t seed = rand();
+    uint32_t v = seed;
+    for(uint32_t i = 0; i < words; i++){
+        ptr[i] = v;
+        v = xorshift(v);
+    }
+
+    v = seed;
+    for(uint32_t i = 0; i < words; i++){
+        if(ptr[i] != v)
+            return 1;
+        v = xorshift(v);
+    }
+    return 0;
+}
+
+/* ---- Main Function ---- */
+int main() {
+
+    /* Variable latency, 6 clocks. Every access that collides with a refresh
+     * doubles the latency, exercising the second latency path of the MMAP core */
+    hyperram_cfg(0x8F17);
+    HYPERBUS0->latency_cycles = 6;
+
+    /* Span a 2 KiB boundary */
+    if(check_range(0x7e0, 16))
+        return 1;
+
+    /* Far away from the first range */
+    if(check_range(0x100000, 16))
+        return 2;
+
+    /* Back to fixed latency, the test traces the HyperRAM between the markers */
+    SIM_MARKER(1);
+    hyperram_cfg(0x8F1F);
+
+    if(check_range(0x200, 8))
+        return 3;
+    SIM_MARKER(2);
+
+    /* Got to main, return 0 success */
+    return 0;
+}
+
+/* ---- Helper Functions ---- */
+/* ISRs will cause the CPU to jump here */
+void isr() {
+
+}
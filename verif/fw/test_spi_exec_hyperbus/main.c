@@ -14,7 +14,15 @@ int hyperbus_main() {
     return 0;
 }
 
+/* Set by the ISR on the done interrupt */
+static volatile uint32_t hyperbus_done;
+
 void hyperram_cfg(uint32_t cfg){
+    HYPERBUS0->ev_pending = HYPERBUS_EV_DONE;
+    HYPERBUS0->ev_enable = HYPERBUS_EV_DONE;
+    __asm__ volatile ("csrw 0xBC0, %0" :: "r"(1 << HYPERBUS0_IRQ));
+    __asm__ volatile ("csrs mstatus, %0" :: "r"(1 << 3)); /* MIE, MEIE is set in start.s */
+
     HYPERBUS0->config = (const hyperbusConfig_t){.hyperbus_enable=1,.latency_count=7,.latency_variable=false, .data_size=0};
     HYPERBUS0->cmd = (HYPERBUS_CMD_WRITE | HYPERBUS_AREA_REG);
     HYPERBUS0->adr = 0x01000000;    
@@ -25,7 +33,11 @@ void hyperram_cfg(uint32_t cfg){
         .start = true
     };
 
-    while(HYPERBUS0->status.busy);
+    /* Wait for the done interrupt instead of polling busy */
+    while(!hyperbus_done);
+
+    HYPERBUS0->ev_enable = 0;
+    __asm__ volatile ("csrc mstatus, %0" :: "r"(1 << 3));
 }
 
 
@@ -55,5 +67,10 @@ void main() {
 /* ---- Helper Functions ---- */
 /* ISRs will cause the CPU to jump here */
 void isr() {
-
+    uint32_t pending;
+    __asm__ volatile ("csrr %0, 0xFC0" : "=r"(pending));
+    if(pending & (1 << HYPERBUS0_IRQ)){
+        HYPERBUS0->ev_pending = HYPERBUS_EV_DONE;
+        hyperbus_done = 1;
+    }
 }
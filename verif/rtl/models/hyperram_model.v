@@ -0,0 +1,275 @@
+//
+// This file is part of frosty-ferret-soc
+//
+// Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+// SPDX-License-Identifier: BSD-2-Clause
+
+// Behavioural HyperRAM, a clock edge counting replacement for the s27ks0641
+// vendor model that builds under Verilator.
+//
+// Bus cycles follow the vendor model: CA is captured on the first 6 CK edges,
+// RWDS flags 2x latency during CA, and the first data word is on the rising
+// edge of CK (latency + 3) for 1x latency or (2 * latency + 3) for 2x latency,
+// counting the first CA clock as 1.
+// Register writes have no latency. Like the vendor model every register read
+// returns CR0 and every register write updates CR0.
+// tPO/tRFH timing is not modelled.
+//
+// CR0[3] selects fixed (always 2x) or variable latency. In variable latency
+// mode refresh collisions are injected instead of timed: with collision_every
+// set to N, every Nth memory access gets 2x latency. Tests can change it at
+// any time through the hierarchy (tb.hyerram.collision_every).
+//
+// Memory is stored sparsely: PAGE_WORDS sized pages are allocated from a pool
+// of POOL_PAGES on first write, unwritten memory reads as FFFF.
+//
+// The stat_* counters count bus cycles and data words since RESETNeg, except
+// stat_pages: like the vendor model, memory contents survive a reset.
+
+`default_nettype none
+`timescale 1ps / 1ps
+
+module hyperram_model (
+    inout  wire [7:0] DQ,
+    inout  wire       RWDS,
+    input  wire       CSNeg,
+    input  wire       CK,
+    input  wire       CKNeg,
+    input  wire       RESETNeg
+);
+
+parameter CR0_RESET = 16'h8F1F;  // Power-on value, same as the vendor model
+parameter ADDR_BITS = 22;        // Word (16-bit) address width, 64 Mbit
+parameter PAGE_BITS = 10;        // Sparse store page size, in words
+parameter POOL_PAGES = 256;      // Pages that can be allocated, 512 KiB
+parameter COLLISION_EVERY = 0;   // Reset value of collision_every, 0 = never
+
+localparam PAGE_WORDS = 1 << PAGE_BITS;
+localparam PAGES = 1 << (ADDR_BITS - PAGE_BITS);
+
+reg [15:0] cr0 = CR0_RESET;
+
+reg [7:0] dq_o    = 8'h00;
+reg       dq_oe   = 1'b0;
+reg       rwds_o  = 1'b0;
+reg       rwds_oe = 1'b0;
+
+assign DQ   = dq_oe   ? dq_o   : 8'hzz;
+assign RWDS = rwds_oe ? rwds_o : 1'bz;
+
+// Refresh collision injection
+integer collision_every = COLLISION_EVERY;
+integer collision_cnt = 0;
+
+// Access statistics
+integer stat_reads = 0;          // Memory read bus cycles
+integer stat_writes = 0;         // Memory write bus cycles
+integer stat_reg_reads = 0;      // Register read bus cycles
+integer stat_reg_writes = 0;     // Register write bus cycles
+integer stat_words_read = 0;     // 16-bit words read from memory
+integer stat_words_written = 0;  // 16-bit words written to memory
+integer stat_double_latency = 0; // Bus cycles with 2x latency
+integer stat_collisions = 0;     // Injected refresh collisions
+integer stat_pages = 0;          // Allocated pages
+
+// Sparse backing store
+reg [15:0] pool [0:POOL_PAGES * PAGE_WORDS - 1];
+integer    page_map [0:PAGES - 1];  // Pool page per memory page, -1 if unused
+
+integer i;
+initial begin
+    for (i = 0; i < PAGES; i = i + 1)
+        page_map[i] = -1;
+end
+
+function [15:0] mem_read(input [ADDR_BITS-1:0] a);
+    integer slot;
+    begin
+        slot = page_map[a[ADDR_BITS-1:PAGE_BITS]];
+        if (slot < 0)
+            mem_read = 16'hFFFF;
+        else
+            mem_read = pool[slot * PAGE_WORDS + a[PAGE_BITS-1:0]];
+    end
+endfunction
+
+task mem_write(input [ADDR_BITS-1:0] a, input [15:0] data, input mask_hi, input mask_lo);
+    integer slot;
+    integer w;
+    begin
+        slot = page_map[a[ADDR_BITS-1:PAGE_BITS]];
+        if (slot < 0) begin
+            if (stat_pages == POOL_PAGES) begin
+                $display("hyperram_model: out of pages (POOL_PAGES=%0d) at word address %h", POOL_PAGES, a);
+                $finish;
+            end
+            slot = stat_pages;
+            stat_pages = stat_pages + 1;
+            page_map[a[ADDR_BITS-1:PAGE_BITS]] = slot;
+            for (w = 0; w < PAGE_WORDS; w = w + 1)
+                pool[slot * PAGE_WORDS + w] = 16'hFFFF;
+        end
+
+        if (!mask_hi)
+            pool[slot * PAGE_WORDS + a[PAGE_BITS-1:0]][15:8] = data[15:8];
+        if (!mask_lo)
+            pool[slot * PAGE_WORDS + a[PAGE_BITS-1:0]][7:0] = data[7:0];
+    end
+endtask
+
+// CR0 latency code to clock count
+function integer latency_clocks(input [3:0] code);
+    case (code)
+        4'b0000: latency_clocks = 5;
+        4'b0001: latency_clocks = 6;
+        4'b0010: latency_clocks = 7;
+        4'b1110: latency_clocks = 3;
+        4'b1111: latency_clocks = 4;
+        default: latency_clocks = 6;
+    endcase
+endfunction
+
+// CR0 burst length code to 16-bit words
+function integer burst_words(input [1:0] code);
+    case (code)
+        2'b00: burst_words = 64;
+        2'b01: burst_words = 32;
+        2'b10: burst_words = 8;
+        2'b11: burst_words = 16;
+    endcase
+endfunction
+
+// Count a memory access, hit is set on every collision_every-th one
+task refresh_collision(output hit);
+    begin
+        hit = 1'b0;
+        if (collision_every > 0) begin
+            collision_cnt = collision_cnt + 1;
+            if (collision_cnt >= collision_every) begin
+                collision_cnt = 0;
+                hit = 1'b1;
+            end
+        end
+    end
+endtask
+
+reg                 ck_q = 1'b0;
+integer             edge_cnt = 0;   // CK edges since CSNeg fell
+integer             data_edge = 0;  // First data edge of this bus cycle
+reg [47:0]          ca = 48'h0;
+reg [ADDR_BITS-1:0] addr = 0;
+reg                 double_latency = 1'b0;
+reg [15:0]          rdata = 16'h0;
+reg [15:0]          wdata = 16'h0;
+reg                 mask_hi = 1'b0;
+
+wire ca_read   = ca[47];
+wire ca_reg    = ca[46];
+wire ca_linear = ca[45];
+
+task next_addr;
+    integer words;
+    begin
+        if (ca_linear) begin
+            addr = addr + 1;
+        end else begin
+            words = burst_words(cr0[1:0]);
+            addr = (addr & ~(words - 1)) | ((addr + 1) & (words - 1));
+        end
+    end
+endtask
+
+always @(CK or CSNeg or RESETNeg) begin
+    if (!RESETNeg) begin
+        cr0 = CR0_RESET;
+        collision_cnt = 0;
+        stat_reads = 0;
+        stat_writes = 0;
+        stat_reg_reads = 0;
+        stat_reg_writes = 0;
+        stat_words_read = 0;
+        stat_words_written = 0;
+        stat_double_latency = 0;
+        stat_collisions = 0;
+    end
+
+    if (CSNeg || !RESETNeg) begin
+        edge_cnt = 0;
+        dq_oe = 1'b0;
+        rwds_oe = 1'b0;
+    end else if (CK !== ck_q) begin
+        edge_cnt = edge_cnt + 1;
+
+        // Command/Address
+        if (edge_cnt <= 6) begin
+            ca[55 - 8 * edge_cnt -: 8] = DQ;
+
+            if (edge_cnt == 1) begin
+                // Fixed latency always reports a collision, register
+                // accesses (CA[46]) never collide
+                double_latency = cr0[3];
+                if (!cr0[3] && !DQ[6]) begin
+                    refresh_collision(double_latency);
+                    if (double_latency)
+                        stat_collisions = stat_collisions + 1;
+                end
+                rwds_o = double_latency;
+                rwds_oe = 1'b1;
+            end else if (edge_cnt == 5) begin
+                rwds_o = 1'b0;
+                rwds_oe = ca_read;
+            end else if (edge_cnt == 6) begin
+                addr = {ca[16 +: ADDR_BITS - 3], ca[2:0]};
+                if (ca_reg && !ca_read) begin
+                    data_edge = 7;
+                    stat_reg_writes = stat_reg_writes + 1;
+                end else begin
+                    data_edge = 2 * (double_latency ? 2 * latency_clocks(cr0[7:4]) : latency_clocks(cr0[7:4])) + 5;
+                    if (double_latency)
+                        stat_double_latency = stat_double_latency + 1;
+                    if (ca_reg)
+                        stat_reg_reads = stat_reg_reads + 1;
+                    else if (ca_read)
+                        stat_reads = stat_reads + 1;
+                    else
+                        stat_writes = stat_writes + 1;
+                end
+            end
+
+        // Data, upper byte on the rising edge
+        end else if (edge_cnt >= data_edge) begin
+            if (CK) begin
+                if (ca_read) begin
+                    rdata = ca_reg ? cr0 : mem_read(addr);
+                    dq_o = rdata[15:8];
+                    dq_oe = 1'b1;
+                    rwds_o = 1'b1;
+                    if (!ca_reg)
+                        stat_words_read = stat_words_read + 1;
+                end else begin
+                    wdata[15:8] = DQ;
+                    mask_hi = RWDS;
+                end
+            end else begin
+                if (ca_read) begin
+                    dq_o = rdata[7:0];
+                    rwds_o = 1'b0;
+                end else begin
+                    wdata[7:0] = DQ;
+                    if (ca_reg) begin
+                        if (edge_cnt == data_edge + 1)
+                            cr0 = wdata;
+                    end else begin
+                        mem_write(addr, wdata, mask_hi, RWDS);
+                        stat_words_written = stat_words_written + 1;
+                    end
+                end
+                next_addr;
+            end
+        end
+    end
+
+    ck_q = CK;
+end
+
+endmodule
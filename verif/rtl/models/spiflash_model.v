@@ -0,0 +1,103 @@
+//
+// This file is part of frosty-ferret-soc
+//
+// Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+// SPDX-License-Identifier: BSD-2-Clause
+
+// Behavioural SPI NOR flash, pin compatible with the W25Q32JVxxIM vendor model.
+// Only implements the single bit read path used by the SoC (SPI mode 0):
+//   03h Read Data, 0Bh Fast Read, 9Fh JEDEC ID, 05h/35h Read Status, ABh Device ID
+// Everything else is ignored until CSn is released. No timing checks, no
+// program/erase, so it builds under Verilator and runs at full speed.
+
+`default_nettype none
+`timescale 1ns / 1ns
+
+module spiflash_model (CSn, CLK, DIO, DO, WPn, HOLDn, RESETn);
+input CSn, CLK, RESETn;
+inout DIO;
+inout WPn;
+inout HOLDn;
+inout DO;
+
+parameter MEM_SIZE = 4 * 1024 * 1024;
+parameter MANUFACTURER = 8'hEF;
+parameter DEVICE_ID = 8'h15;
+parameter JEDEC_ID_HI = 8'h40;
+parameter JEDEC_ID_LO = 8'h16;
+
+localparam CMD_READ_DATA      = 8'h03;
+localparam CMD_FAST_READ      = 8'h0B;
+localparam CMD_READ_JEDEC_ID  = 8'h9F;
+localparam CMD_READ_STATUS    = 8'h05;
+localparam CMD_READ_STATUS2   = 8'h35;
+localparam CMD_RELEASE_PD_ID  = 8'hAB;
+
+// Same name as the vendor model so SoCTestHarness preloads work with both
+reg [7:0] memory [0:MEM_SIZE - 1];
+
+reg [7:0]  cmd = 8'h00;
+reg [23:0] addr = 24'h000000;
+integer    bit_cnt = 0;     // Rising CLK edges since CSn fell
+reg        do_q = 1'b0;
+
+// First bit count at which the device shifts data out, for the current command
+function integer data_start(input [7:0] c);
+    case (c)
+        CMD_READ_DATA:     data_start = 32;
+        CMD_FAST_READ:     data_start = 40;
+        CMD_READ_JEDEC_ID: data_start = 8;
+        CMD_READ_STATUS:   data_start = 8;
+        CMD_READ_STATUS2:  data_start = 8;
+        CMD_RELEASE_PD_ID: data_start = 32;
+        default:           data_start = 32'h7fffffff;
+    endcase
+endfunction
+
+// n-th byte returned by the current command
+function [7:0] data_byte(input integer n);
+    case (cmd)
+        CMD_READ_DATA, CMD_FAST_READ:
+            data_byte = memory[(addr + n) % MEM_SIZE];
+        CMD_READ_JEDEC_ID:
+            data_byte = (n % 3 == 0) ? MANUFACTURER :
+                        (n % 3 == 1) ? JEDEC_ID_HI : JEDEC_ID_LO;
+        CMD_RELEASE_PD_ID:
+            data_byte = DEVICE_ID;
+        default:
+            data_byte = 8'h00;
+    endcase
+endfunction
+
+wire dout_en = !CSn && (bit_cnt >= data_start(cmd));
+
+assign DO    = dout_en ? do_q : 1'bz;
+assign DIO   = 1'bz;
+assign WPn   = 1'bz;
+assign HOLDn = 1'bz;
+
+// Shift in command and address on the rising edge
+always @(posedge CLK or posedge CSn or negedge RESETn) begin
+    if (CSn || !RESETn) begin
+        bit_cnt = 0;
+    end else begin
+        if (bit_cnt < 8)
+            cmd = {cmd[6:0], DIO};
+        else if (bit_cnt < 32)
+            addr = {addr[22:0], DIO};
+        bit_cnt = bit_cnt + 1;
+    end
+end
+
+// Shift out data on the falling edge, MSB first
+integer out_cnt;
+reg [7:0] out_byte;
+always @(negedge CLK) begin
+    if (dout_en) begin
+        out_cnt = bit_cnt - data_start(cmd);
+        out_byte = data_byte(out_cnt / 8);
+        do_q <= out_byte[7 - (out_cnt % 8)];
+    end
+end
+
+endmodule
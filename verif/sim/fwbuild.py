@@ -0,0 +1,173 @@
+#
+# This file is part of frosty-ferret-soc
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Cached firmware builds for the cocotb harness.
+
+Each firmware under ``verif/fw`` is rebuilt only when the hash of its inputs
+(sources, linker script, Makefile, shared/generated headers and the toolchain
+version) differs from the one stored next to the ``.bin`` of the last build.
+
+Run directly to build every firmware in parallel before a simulation starts::
+
+    python3 fwbuild.py [-j JOBS] [FIRMWARE ...]
+"""
+
+import argparse
+import functools
+import glob
+import hashlib
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+SIM_PATH = os.path.dirname(os.path.abspath(__file__))
+FW_PATH = os.path.normpath(os.path.join(SIM_PATH, "..", "fw"))
+GENERATED_INCLUDE_PATH = os.path.join(SIM_PATH, "build", "software", "include", "generated")
+
+CROSS = "riscv-none-elf-"
+
+# Build products, never part of the input hash
+OUTPUT_SUFFIXES = (".bin", ".elf", ".cde", ".disasm", ".o", ".hex", ".hash")
+
+
+@functools.lru_cache(maxsize=None)
+def toolchain_version() -> bytes:
+    """Version banner of the cross compiler, so a toolchain update invalidates the cache
+
+    Returns:
+        bytes: output of ``gcc --version``, empty if the toolchain is missing
+    """
+    try:
+        return subprocess.run(
+            [f"{CROSS}gcc", "--version"], capture_output=True
+        ).stdout
+    except FileNotFoundError:
+        return b""
+
+
+def firmware_names() -> list:
+    """List every firmware directory that can be built
+
+    Returns:
+        list: firmware names, sorted
+    """
+    return sorted(
+        os.path.basename(os.path.dirname(makefile))
+        for makefile in glob.glob(os.path.join(FW_PATH, "*", "Makefile"))
+    )
+
+
+def firmware_inputs(firmware_name: str) -> list:
+    """Collect the files a firmware build depends on
+
+    Args:
+        firmware_name (str): Firmware name
+
+    Returns:
+        list: absolute file paths, in a stable order
+    """
+    fw_dir = os.path.join(FW_PATH, firmware_name)
+    inputs = sorted(
+        path
+        for path in glob.glob(os.path.join(fw_dir, "*"))
+        if os.path.isfile(path) and not path.endswith(OUTPUT_SUFFIXES)
+    )
+    inputs += sorted(glob.glob(os.path.join(FW_PATH, "*.h")))
+
+    # Firmware that includes LiteX generated headers must follow the SoC
+    with open(os.path.join(fw_dir, "Makefile")) as f:
+        if "build/software/include" in f.read():
+            inputs += sorted(glob.glob(os.path.join(GENERATED_INCLUDE_PATH, "*.h")))
+    return inputs
+
+
+def firmware_hash(firmware_name: str) -> str:
+    """Hash all inputs of a firmware build
+
+    Args:
+        firmware_name (str): Firmware name
+
+    Returns:
+        str: hex digest
+    """
+    h = hashlib.sha256(toolchain_version())
+    for path in firmware_inputs(firmware_name):
+        h.update(os.path.relpath(path, FW_PATH).encode())
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def build(firmware_name: str, force: bool = False) -> bool:
+    """Build a firmware unless the cached ``.bin`` is up to date
+
+    Args:
+        firmware_name (str): Firmware name to build
+        force (bool): Rebuild even if the cache is valid
+
+    Raises:
+        RuntimeError: When make fails
+
+    Returns:
+        bool: True if make was run, False on a cache hit
+    """
+    fw_dir = os.path.join(FW_PATH, firmware_name)
+    bin_filename = os.path.join(fw_dir, f"{firmware_name}.bin")
+    hash_filename = os.path.join(fw_dir, f"{firmware_name}.hash")
+
+    digest = firmware_hash(firmware_name)
+    if not force and os.path.isfile(bin_filename) and os.path.isfile(hash_filename):
+        with open(hash_filename) as f:
+            if f.read().strip() == digest:
+                return False
+
+    result = subprocess.run(["make", "-C", fw_dir, "clean", "all"])
+    if result.returncode != 0:
+        raise RuntimeError(f"Firmware build failed: {firmware_name}")
+
+    with open(hash_filename, "w") as f:
+        f.write(digest + "\n")
+    return True
+
+
+def build_all(firmware: list = None, jobs: int = None, force: bool = False) -> dict:
+    """Build independent firmwares in parallel
+
+    Args:
+        firmware (list): Firmware names, defaults to every firmware in verif/fw
+        jobs (int): Number of parallel builds, defaults to the CPU count
+        force (bool): Rebuild even if the cache is valid
+
+    Returns:
+        dict: firmware name -> True if it was rebuilt
+    """
+    firmware = firmware or firmware_names()
+    with ThreadPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        rebuilt = pool.map(lambda name: build(name, force), firmware)
+        return dict(zip(firmware, rebuilt))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build verif firmware with a content hash cache")
+    parser.add_argument("firmware", nargs="*", help="Firmware to build (default: all).")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Parallel builds (default: CPU count).")
+    parser.add_argument("--force", action="store_true", help="Ignore the cache and rebuild.")
+    args = parser.parse_args()
+
+    try:
+        rebuilt = build_all(args.firmware, args.jobs, args.force)
+    except RuntimeError as e:
+        print(e)
+        return 1
+
+    for name, built in rebuilt.items():
+        print(f"fwbuild: {name}: {'built' if built else 'up to date'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+#
+# This file is part of frosty-ferret-soc
+#
+# Copyright (c) 2023 Greg Davill <greg.davill@gmail.com>
+# SPDX-License-Identifier: BSD-2-Clause
+
+"""Parallel regression runner for the cocotb suite.
+
+The ``@cocotb.test()`` functions in ``tests.py`` are split into shards, each
+shard runs in its own simulator process with its own ``SIM_BUILD`` directory,
+and the per shard JUnit files are merged into a single ``results.xml``.
+
+Gateware and firmware are built once up front, workers reuse them::
+
+    python3 regress.py [-j JOBS] [-k TEST ...] [--results results.xml] [VAR=value ...]
+
+The TCM rows of the memory benchmark need an SoC built with the TCMs::
+
+    python3 regress.py -k test_bench_memory --results results_tcm.xml "SOC_ARGS=--with-itcm --with-dtcm"
+"""
+
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+SIM_PATH = os.path.dirname(os.path.abspath(__file__))
+DUT_FILENAME = os.path.join(SIM_PATH, "build", "gateware", "dut.v")
+
+
+def discover_tests(module: str = "tests") -> list:
+    """Find every ``@cocotb.test()`` coroutine in a test module, in file order
+
+    Args:
+        module (str): Test module name, relative to the sim directory
+
+    Returns:
+        list: test function names
+    """
+    with open(os.path.join(SIM_PATH, f"{module}.py")) as f:
+        tree = ast.parse(f.read())
+
+    def is_cocotb_test(decorator):
+        if isinstance(decorator, ast.Call):
+            decorator = decorator.func
+        return (
+            isinstance(decorator, ast.Attribute)
+            and decorator.attr == "test"
+            and isinstance(decorator.value, ast.Name)
+            and decorator.value.id == "cocotb"
+        )
+
+    return [
+        node.name
+        for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        and any(is_cocotb_test(d) for d in node.decorator_list)
+    ]
+
+
+def make_args(extra: list) -> list:
+    """Build a make command line for the sim Makefile"""
+    return ["make", "-C", SIM_PATH] + extra
+
+
+def prepare(make_vars: list) -> int:
+    """Elaborate the SoC and build all firmware once, before the workers start"""
+    return subprocess.run(make_args(make_vars + ["firmware"])).returncode
+
+
+def run_shard(index: int, tests: list, make_vars: list) -> dict:
+    """Run a group of tests in one simulator instance
+
+    Args:
+        index (int): Shard number, used to name the build directory
+        tests (list): Test names to run
+        make_vars (list): Extra ``VAR=value`` arguments passed to make
+
+    Returns:
+        dict: shard description with ``results`` filename and ``wall_time``
+    """
+    sim_build = os.path.join("sim_build", f"shard{index}")
+    os.makedirs(os.path.join(SIM_PATH, sim_build), exist_ok=True)
+    results = os.path.join(SIM_PATH, sim_build, "results.xml")
+    log = os.path.join(SIM_PATH, sim_build, "sim.log")
+    if os.path.exists(results):
+        os.remove(results)
+
+    cmd = make_args(make_vars + [
+        # Gateware and firmware were built by prepare(), don't race on them
+        "-o", DUT_FILENAME,
+        "-o", "firmware",
+        f"SIM_BUILD={sim_build}",
+        f"TESTCASE={','.join(tests)}",
+        f"COCOTB_RESULTS_FILE={results}",
+    ])
+
+    start = time.monotonic()
+    with open(log, "w") as f:
+        returncode = subprocess.run(cmd, stdout=f, stderr=subprocess.STDOUT).returncode
+    return {
+        "index": index,
+        "tests": tests,
+        "results": results,
+        "log": log,
+        "returncode": returncode,
+        "wall_time": time.monotonic() - start,
+    }
+
+
+def merge_results(shards: list, tests: list, filename: str) -> list:
+    """Merge per shard JUnit reports into a single testsuite
+
+    Tests missing from a shard report (simulator crash, compile error) are
+    reported as errors pointing at the shard log.
+
+    Args:
+        shards (list): Shard descriptions returned by run_shard()
+        tests (list): All test names, in the order they are reported
+        filename (str): Merged JUnit filename
+
+    Returns:
+        list: (test name, shard index, status, wall time) per test
+    """
+    cases = {}
+    for shard in shards:
+        if os.path.exists(shard["results"]):
+            for case in ET.parse(shard["results"]).getroot().iter("testcase"):
+                case.set("shard", str(shard["index"]))
+                cases[case.get("name")] = case
+        for name in shard["tests"]:
+            if name not in cases:
+                case = ET.Element("testcase", name=name, classname="tests", time="0", shard=str(shard["index"]))
+                ET.SubElement(case, "error", message=f"No result, see {shard['log']}")
+                cases[name] = case
+
+    root = ET.Element("testsuites", name="results")
+    suite = ET.SubElement(root, "testsuite", name="all", package="all")
+    properties = ET.SubElement(suite, "properties")
+    for shard in shards:
+        ET.SubElement(properties, "property", name=f"shard{shard['index']}_wall_time", value=f"{shard['wall_time']:.3f}")
+
+    summary = []
+    counts = {"failure": 0, "error": 0, "skipped": 0}
+    total_time = 0.0
+    for name in tests:
+        case = cases[name]
+        suite.append(case)
+        status = "pass"
+        for kind in counts:
+            if case.find(kind) is not None:
+                counts[kind] += 1
+                status = kind
+        wall_time = float(case.get("time", 0))
+        total_time += wall_time
+        summary.append((name, int(case.get("shard")), status, wall_time))
+
+    suite.set("tests", str(len(tests)))
+    suite.set("failures", str(counts["failure"]))
+    suite.set("errors", str(counts["error"]))
+    suite.set("skipped", str(counts["skipped"]))
+    suite.set("time", f"{total_time:.3f}")
+
+    ET.ElementTree(root).write(filename, encoding="UTF-8", xml_declaration=True)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the cocotb suite sharded across worker processes")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of simulator instances (default: CPU count).")
+    parser.add_argument("-k", "--test", action="append", default=None, help="Run only the named test (can be repeated).")
+    parser.add_argument("--results", default=os.path.join(SIM_PATH, "results.xml"), help="Merged JUnit report.")
+    parser.add_argument("make_vars", nargs="*", help="Extra VAR=value arguments passed to make (e.g. SIM=verilator).")
+    args = parser.parse_args()
+
+    tests = discover_tests()
+    if args.test:
+        tests = [t for t in tests if t in args.test]
+    if not tests:
+        print("regress: no tests selected")
+        return 1
+
+    if prepare(args.make_vars) != 0:
+        print("regress: gateware/firmware build failed")
+        return 1
+
+    jobs = max(1, min(args.jobs, len(tests)))
+    groups = [tests[i::jobs] for i in range(jobs)]
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        shards = list(pool.map(lambda g: run_shard(g[0], g[1], args.make_vars), enumerate(groups)))
+    wall_time = time.monotonic() - start
+
+    summary = merge_results(shards, tests, args.results)
+
+    print(f"{'TEST':<40} {'SHARD':>5} {'STATUS':>8} {'TIME (s)':>10}")
+    for name, shard, status, t in summary:
+        print(f"{name:<40} {shard:>5} {status.upper():>8} {t:>10.2f}")
+    print(f"regress: {len(tests)} tests on {jobs} workers in {wall_time:.2f}s, report: {args.results}")
+
+    return 0 if all(status in ("pass", "skipped") for _, _, status, _ in summary) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
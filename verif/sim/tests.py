@@ -6,13 +6,99 @@
 
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import RisingEdge, ClockCycles
+from cocotb.triggers import RisingEdge, ReadOnly, ClockCycles, First
+from cocotb.utils import get_sim_time
 from cocotb.result import SimTimeoutError, SimFailure, TestSuccess
 from cocotb.handle import HierarchyObject
 
 import logging
 import os
+import re
 import csv
+import json
+
+import fwbuild
+
+# Memory models selected by the Makefile, "vendor" or "behavioural"
+MODELS = os.environ.get("MODELS", "vendor")
+
+# VexRiscv variant selected by the Makefile, benchmark baselines are per variant and MODELS
+CPU_VARIANT = os.environ.get("CPU_VARIANT", "min")
+
+# Boot checkpoints (SoCTestHarness.boot), SIM_CHECKPOINTS=0 replays every boot.
+# They hold HyperRAM contents, so only with the behavioural models
+CHECKPOINTS = os.environ.get("SIM_CHECKPOINTS", "1") == "1" and MODELS == "behavioural"
+
+# Checkpoints taken in this simulator process: (SPI flash image, entry) -> state
+BOOT_CHECKPOINTS = dict()
+
+# Counters of verif/rtl/models/hyperram_model.v
+HYPERRAM_STATS = (
+    "stat_reads",
+    "stat_writes",
+    "stat_reg_reads",
+    "stat_reg_writes",
+    "stat_words_read",
+    "stat_words_written",
+    "stat_double_latency",
+    "stat_collisions",
+    "stat_pages",
+)
+
+# Words per page of the hyperram_model.v sparse store, 2**PAGE_BITS
+HYPERRAM_PAGE_WORDS = 1024
+
+# Waveform format selected by the Makefile, "vcd" or "fst"
+TRACE_FORMAT = os.environ.get("TRACE_FORMAT", "vcd")
+
+# Benchmarks reported by verif/fw/bench_memory: marker id -> (name, unit, count).
+# count is in 32-bit words for memory accesses and in instructions for "instructions"
+BENCHMARKS = {
+    0x101: ("sram_seq_read", "words", 32),
+    0x102: ("sram_seq_write", "words", 32),
+    0x103: ("sram_rand_read", "words", 32),
+    0x104: ("sram_rand_write", "words", 32),
+    0x111: ("spiflash_seq_read", "words", 64),
+    0x113: ("spiflash_rand_read", "words", 64),
+    0x121: ("hyperbus0_seq_read", "words", 64),
+    0x122: ("hyperbus0_seq_write", "words", 64),
+    0x123: ("hyperbus0_rand_read", "words", 64),
+    0x124: ("hyperbus0_rand_write", "words", 64),
+    0x131: ("memcpy_hyperbus0_to_hyperbus0", "words", 64),
+    0x132: ("memcpy_sram_to_hyperbus0", "words", 32),
+    0x133: ("memcpy_spiflash_to_sram", "words", 32),
+    0x141: ("exec_sram", "instructions", 514),
+    0x142: ("exec_hyperbus0", "instructions", 514),
+    # SOC_ARGS="--with-itcm --with-dtcm", skipped without them
+    0x143: ("exec_itcm", "instructions", 514),
+    0x151: ("dtcm_seq_read", "words", 32),
+    0x152: ("dtcm_seq_write", "words", 32),
+    0x153: ("dtcm_rand_read", "words", 32),
+    0x154: ("dtcm_rand_write", "words", 32),
+}
+BENCH_BASELINE = "bench_baseline.json"
+BENCH_RESULTS = "bench_results.json"
+
+# Allowed slowdown against the baseline before test_bench_memory fails
+BENCH_THRESHOLD = float(os.environ.get("BENCH_THRESHOLD", "0.05"))
+
+CLK_PERIOD_NS = 10
+
+# Where init_spiflash()/init_sram() images appear in the CPU address space
+SPIFLASH_BASE = 0x20000000
+SRAM_BASE = 0x10000000
+HYPERBUS0_BASE = 0x30000000
+
+# C conversions understood by the SimConsole printf, arguments are 32-bit
+PRINTF_CONVERSION = re.compile(r"%([-+ #0]*[0-9]*)l*([diuxXcs%])")
+
+# trace() scopes, values of the tb.v trace_scope port
+TRACE_SCOPES = {
+    "tb": 0,
+    "dut": 1,
+    "cpu": 2,
+    "memories": 3,
+}
 
 
 class SoCTestHarness:
@@ -24,13 +110,25 @@ class SoCTestHarness:
         """
         self.dut = dut
         self.csrs = dict()
+        self.csr_signals = dict()
+        self.csr_fields = dict()
+        self.csr_strobes = dict()
+        self.sim_signals = dict()
+        self.images = dict()
+        self.console_lines = []
+        self.markers = []
         self.timeout_cycles = 50000
 
-        self._set_test_name()
+        self.test_name = self._set_test_name()
+        self.dut.trace_enable.value = 0
+        self.dut.checkpoint_pc.value = 0
         self._load_csr("build/csr.csv")
+        self._load_csr_signals("build/csr_signals.csv")
 
-        cocotb.start_soon(Clock(dut.clk, 10, "ns").start())
+        cocotb.start_soon(Clock(dut.clk, CLK_PERIOD_NS, "ns").start())
         cocotb.start_soon(self._test_timeout())
+        if "sim_console_printf" in self.csr_strobes:
+            cocotb.start_soon(self._console())
 
     # Harness internal functions
     def _load_csr(self, csr_filename: str):
@@ -46,13 +144,195 @@ class SoCTestHarness:
                 if row[0] == "csr_register":
                     self.csrs[row[1]] = int(row[2], base=0)
 
-    def _set_test_name(self):
-        """Set the testname into a variable visible in gtkwave"""
+    def _load_csr_signals(self, csr_signals_filename: str):
+        """Load the CSR to dut.v signal map written by frostyferret_soc.py --sim
+
+        Args:
+            csr_signals_filename (str): filename of csr signals csv file
+        """
+        with open(csr_signals_filename, newline="") as csr_signals_file:
+            # csr_signal, name, signal, width / csr_field, name, field, offset, size / csr_strobe, name, signal
+            # sim_signal, name, signal
+            for row in csv.reader(csr_signals_file):
+                if row[0] == "csr_signal":
+                    self.csr_signals[row[1]] = row[2]
+                    self.csr_fields[row[1]] = dict()
+                elif row[0] == "csr_field":
+                    self.csr_fields[row[1]][row[2]] = (int(row[3]), int(row[4]))
+                elif row[0] == "csr_strobe":
+                    self.csr_strobes[row[1]] = row[2]
+                elif row[0] == "sim_signal":
+                    self.sim_signals[row[1]] = row[2]
+
+    def _csr_handle(self, name: str) -> HierarchyObject:
+        """Look up the dut.v signal holding a CSR
+
+        Args:
+            name (str): CSR name as in csr.csv, e.g. "hyperbus0_core_mmap_latency_cycles"
+
+        Raises:
+            KeyError: When the CSR has no storage or status signal
+
+        Returns:
+            HierarchyObject: signal handle
+        """
+        if name not in self.csr_signals:
+            raise KeyError(f"No backdoor signal for CSR {name}")
+        return getattr(self.dut.dut, self.csr_signals[name])
+
+    def _sim_signal(self, name: str) -> HierarchyObject:
+        """Look up a sim_signal of csr_signals.csv, e.g. "reset_vector" or "por_count"
+
+        Args:
+            name (str): signal name
+
+        Returns:
+            HierarchyObject: signal handle
+        """
+        return getattr(self.dut.dut, self.sim_signals[name])
+
+    def _read_image(self, address: int) -> int:
+        """Read a byte of a loaded firmware image by its CPU address
+
+        Args:
+            address (int): CPU address
+
+        Raises:
+            KeyError: When no image loaded with init_spiflash()/init_sram() covers the address
+
+        Returns:
+            int: byte value
+        """
+        for base, data in self.images.items():
+            if base <= address < base + len(data):
+                return data[address - base]
+        raise KeyError(f"No firmware image at {address:#010x}")
+
+    def _read_string(self, address: int) -> str:
+        """Read a NUL terminated string from a loaded firmware image"""
+        value = bytearray()
+        while (byte := self._read_image(address + len(value))) != 0:
+            value.append(byte)
+        return value.decode("ascii", errors="replace")
+
+    def _format(self, fmt: str, args: list) -> str:
+        """Apply a C printf format string to 32-bit arguments, %s arguments are string addresses"""
+        args = iter(args)
+
+        def conversion(match):
+            flags, spec = match.groups()
+            if spec == "%":
+                return "%"
+            value = next(args, 0)
+            if spec in "di":
+                value, spec = value - ((value >> 31) << 32), "d"
+            elif spec == "u":
+                spec = "d"
+            elif spec == "c":
+                value = chr(value & 0xFF)
+            elif spec == "s":
+                value = self._read_string(value)
+            return f"%{flags}{spec}" % value
+
+        return PRINTF_CONVERSION.sub(conversion, fmt)
+
+    async def _console(self):
+        """coroutine started by the harness when the SoC has a SimConsole. Decodes its mailbox
+
+        Lines go to console_lines and the log, markers to markers as (cycle, id, args).
+        """
+        strobes = {
+            name: getattr(self.dut.dut, self.csr_strobes[f"sim_console_{name}"])
+            for name in ("arg", "printf", "marker")
+        }
+        args = []
+        line = ""
+        while True:
+            triggers = {RisingEdge(handle): name for name, handle in strobes.items()}
+            name = triggers[await First(*triggers)]
+            # The storage takes the value at the end of the strobe
+            await RisingEdge(self.dut.clk)
+            await ReadOnly()
+            value = self.csr_read(f"sim_console_{name}")
+            if name == "arg":
+                args.append(value)
+                continue
+            if name == "printf":
+                line += self._format(self._read_string(value), args)
+                *lines, line = line.split("\n")
+                for text in lines:
+                    self.dut._log.info(f"fw: {text}")
+                    self.console_lines.append(text)
+            else:
+                self.markers.append((int(get_sim_time("ns")) // CLK_PERIOD_NS, value, args))
+            args = []
+
+    def _set_test_name(self) -> str:
+        """Set the testname into a variable visible in gtkwave
+
+        Returns:
+            str: name of the running test
+        """
         import inspect
 
-        tn = cocotb.binary.BinaryValue(value=None, n_bits=4096)
-        tn.buff = bytes(inspect.stack()[2][3], encoding="ascii")
-        self.dut.test_name.value = tn
+        test_name = inspect.stack()[2][3]
+        self._set_string(self.dut.test_name, test_name)
+        return test_name
+
+    def _set_string(self, handle: HierarchyObject, value: str):
+        """Drive a string onto a packed vector port, right aligned as Verilog expects
+
+        Args:
+            handle (HierarchyObject): DUT port to drive
+            value (str): ASCII string
+        """
+        bv = cocotb.binary.BinaryValue(value=None, n_bits=len(handle))
+        bv.buff = bytes(value, encoding="ascii")
+        handle.value = bv
+
+    def _strobe(self, handle: HierarchyObject):
+        """Toggle a strobe port in tb.v, each edge triggers the associated action
+
+        Args:
+            handle (HierarchyObject): DUT port to toggle
+        """
+        value = handle.value
+        handle.value = 0 if value.is_resolvable and int(value) else 1
+
+    def _firmware_image(self, firmware_name: str) -> bytes:
+        """Read a built firmware image
+
+        Args:
+            firmware_name (str): Firmware name
+
+        Returns:
+            bytes: contents of its .bin
+        """
+        with open(os.path.abspath(f"../fw/{firmware_name}/{firmware_name}.bin"), "rb") as f:
+            return f.read()
+
+    def _write_memh(self, firmware_name: str, target: str, width: int) -> str:
+        """Convert a firmware image into a $readmemh file with one little endian word per line
+
+        Args:
+            firmware_name (str): Firmware name to convert
+            target (str): Memory name, used as part of the output filename
+            width (int): Word width in bytes
+
+        Returns:
+            str: Absolute path of the generated file
+        """
+        fw_path = os.path.abspath(f"../fw/{firmware_name}")
+        data = self._firmware_image(firmware_name)
+        data += bytes(-len(data) % width)
+
+        memh_filename = f"{fw_path}/{firmware_name}.{target}.hex"
+        tmp_filename = f"{memh_filename}.{os.getpid()}"
+        with open(tmp_filename, "w") as f:
+            for i in range(0, len(data), width):
+                f.write(f"{int.from_bytes(data[i:i + width], 'little'):0{width * 2}x}\n")
+        os.replace(tmp_filename, memh_filename)
+        return memh_filename
 
     async def _test_timeout(self):
         """coroutine started by the harness. Will fail a test if self.timeout_cycles elapses.
@@ -63,6 +343,140 @@ class SoCTestHarness:
         await ClockCycles(self.dut.clk, self.timeout_cycles)
         raise SimTimeoutError(f"Timeout after {self.timeout_cycles} cycles")
 
+    async def _wait_for_marker(self, marker_id: int):
+        """Wait until the firmware executes SIM_MARKER(marker_id)
+
+        Args:
+            marker_id (int): marker to wait for
+        """
+        while True:
+            await RisingEdge(self.dut.marker)
+            if int(self.dut.marker_id.value) == marker_id:
+                return
+
+    def _hyperram_pages(self) -> dict:
+        """Read the pages of the behavioural HyperRAM model that have been written
+
+        Returns:
+            dict: page number -> 16-bit words
+        """
+        hyperram = self.dut.hyerram
+        slots = int(hyperram.stat_pages.value)
+        pages = dict()
+        for page in range(len(hyperram.page_map)):
+            if len(pages) == slots:
+                break
+            slot = hyperram.page_map[page].value.signed_integer
+            if slot >= 0:
+                base = slot * HYPERRAM_PAGE_WORDS
+                pages[page] = [int(hyperram.pool[base + i].value) for i in range(HYPERRAM_PAGE_WORDS)]
+        return pages
+
+    def _hyperram_restore(self, pages: dict):
+        """Write pages back into the behavioural HyperRAM model, allocating the missing ones
+
+        Args:
+            pages (dict): page number -> 16-bit words, from _hyperram_pages()
+        """
+        hyperram = self.dut.hyerram
+        # Writes land together at the end of the time step, count allocations here
+        slots = int(hyperram.stat_pages.value)
+        for page, words in pages.items():
+            slot = hyperram.page_map[page].value.signed_integer
+            if slot < 0:
+                slot, slots = slots, slots + 1
+                hyperram.page_map[page].value = slot
+            base = slot * HYPERRAM_PAGE_WORDS
+            for i, word in enumerate(words):
+                hyperram.pool[base + i].value = word
+        hyperram.stat_pages.value = slots
+
+    async def _checkpoint(self) -> dict:
+        """Wait for the instruction at checkpoint_pc to retire, then capture the SoC state
+
+        Returns:
+            dict: state for _restore()
+        """
+        await RisingEdge(self.dut.checkpoint)
+        await ReadOnly()
+        hyperram = self.dut.hyerram
+        regfile = self.dut.dut.VexRiscv.u_rf.regfile
+        checkpoint = {
+            "csrs": {name: self.csr_read(name) for name in self.csr_strobes},
+            "gprs": [regfile[i].value for i in range(32)],
+            "hyperram_cr0": int(hyperram.cr0.value),
+            # A reset keeps the leftovers of earlier tests anyway, only a boot that writes needs them
+            "hyperram_pages": self._hyperram_pages() if int(hyperram.stat_words_written.value) else {},
+        }
+        # Out of the read-only phase, the instruction at checkpoint_pc has now retired
+        await RisingEdge(self.dut.clk)
+        return checkpoint
+
+    async def _restore(self, entry: int, checkpoint: dict):
+        """Reset the SoC straight into entry with the state of a checkpoint
+
+        Args:
+            entry (int): CPU address the checkpoint was taken at
+            checkpoint (dict): state from _checkpoint()
+        """
+        reset_vector = self._sim_signal("reset_vector")
+        boot_vector = reset_vector.value
+        reset_vector.value = entry
+        await self.reset()
+
+        # End the POR countdown, the CPU leaves reset on the next edge with the state restored
+        self._sim_signal("por_count").value = 0
+        for name, value in checkpoint["csrs"].items():
+            self.csr_write(name, value)
+        regfile = self.dut.dut.VexRiscv.u_rf.regfile
+        for i, value in enumerate(checkpoint["gprs"]):
+            regfile[i].value = value
+        self.dut.hyerram.cr0.value = checkpoint["hyperram_cr0"]
+        self._hyperram_restore(checkpoint["hyperram_pages"])
+
+        await RisingEdge(self.dut.clk)
+        reset_vector.value = boot_vector
+
+    async def _trace_window(self, start_cycle, stop_cycle, start_marker, stop_marker):
+        """coroutine started by trace(). Drives trace_enable between the start and stop triggers"""
+
+        async def cycle(n):
+            await ClockCycles(self.dut.clk, n)
+
+        def triggers(n, marker_id):
+            tasks = []
+            if n is not None:
+                tasks.append(cocotb.start_soon(cycle(n)))
+            if marker_id is not None:
+                tasks.append(cocotb.start_soon(self._wait_for_marker(marker_id)))
+            return tasks
+
+        # Both cycle counts are relative to the trace() call
+        start = triggers(start_cycle, start_marker)
+        stop = triggers(stop_cycle, None)
+
+        if start:
+            await First(*start)
+            for task in start:
+                task.kill()
+        self.dut.trace_enable.value = 1
+
+        stop += triggers(None, stop_marker)
+        if stop:
+            await First(*stop)
+            for task in stop:
+                task.kill()
+            self.dut.trace_enable.value = 0
+
+    async def wait_for_wfi(self) -> int:
+        """Wait for a 'wfi' instruction to be executed
+
+        Returns:
+            int: firmware return value (a0)
+        """
+        await RisingEdge(self.dut.wfi)
+        return int(self.dut.a0.value)
+
     async def wfi(self):
         """Wait for a 'wfi' instruction to be executed, then check return value (a0)
 
@@ -72,13 +486,11 @@ class SoCTestHarness:
             TestSuccess: When a0 == 0
             SimFailure: When a0 != 0
         """
-        await RisingEdge(self.dut.wfi)
-        if int(self.dut.a0.value) == 0:
+        a0 = await self.wait_for_wfi()
+        if a0 == 0:
             raise TestSuccess()
         else:
-            self.dut.a0._log.error(
-                f"Non-zero return code: (a0={int(self.dut.a0.value)})"
-            )
+            self.dut.a0._log.error(f"Non-zero return code: (a0={a0})")
             raise SimFailure()
 
     # Harness public functions for tests
@@ -91,29 +503,199 @@ class SoCTestHarness:
         await RisingEdge(self.dut.clk)
         await RisingEdge(self.dut.clk)
 
+    async def boot(self, entry: int) -> int:
+        """Reset the SoC and boot it up to entry, restoring a checkpoint of an earlier boot when there is one
+
+        The first boot of an SPI flash image runs the whole boot: POR countdown, SPI boot and whatever
+        the flash firmware does before it jumps to entry. The SoC is checkpointed as the CPU retires the
+        instruction at entry. Later boots of the same image and entry in the same simulator process reset
+        the SoC straight into entry with the CSR storages, CPU registers and HyperRAM (contents and CR0)
+        of the checkpoint, skipping the boot.
+
+        SRAM is not part of a checkpoint, load it with init_sram() before booting. Neither are the CPU
+        CSRs (mtvec, mie, ...), the firmware at entry has to set up its own traps and interrupts.
+        Only with the behavioural models, SIM_CHECKPOINTS=0 replays every boot.
+
+        Checkpoints are kept in BOOT_CHECKPOINTS, in memory of this simulator process only. regress.py
+        runs every shard in a process of its own, so shards never share checkpoints: the first boot of
+        an image in each shard runs in full.
+
+        Args:
+            entry (int): CPU address the boot jumps to, e.g. SRAM_BASE for jump_to_sram
+
+        Returns:
+            int: cycles skipped, 0 when the boot ran
+        """
+        if not CHECKPOINTS:
+            await self.reset()
+            return 0
+
+        key = (self.images.get(SPIFLASH_BASE), entry)
+        if key in BOOT_CHECKPOINTS:
+            checkpoint = BOOT_CHECKPOINTS[key]
+            await self._restore(entry, checkpoint)
+            self.dut._log.info(f"Restored boot checkpoint at {entry:#010x}, skipped {checkpoint['cycles']} cycles")
+            return checkpoint["cycles"]
+
+        self.dut.checkpoint_pc.value = entry
+        await self.reset()
+        start = get_sim_time("ns")
+        checkpoint = await self._checkpoint()
+        checkpoint["cycles"] = int(get_sim_time("ns") - start) // CLK_PERIOD_NS
+        BOOT_CHECKPOINTS[key] = checkpoint
+        return 0
+
     def build_fw(self, firmware_name: str):
-        """Builds firmware
+        """Builds firmware, skipped when the cached build is up to date
 
         Args:
             firmware_name (str): Firmware name to build
         """
-        os.system(f"make -C ../fw/{firmware_name} clean all")
+        fwbuild.build(firmware_name)
 
     def init_spiflash(self, firmware_name: str):
-        with open(f"../fw/{firmware_name}/{firmware_name}.bin", "rb") as f:
-            for i, b in enumerate(f.read()):
-                self.dut.flash.memory[i].value = b
-    
+        """Load firmware into the SPI flash model with a single $readmemh
+
+        Args:
+            firmware_name (str): Firmware name to load
+        """
+        self._set_string(self.dut.flash_preload_file, self._write_memh(firmware_name, "flash", 1))
+        self.images[SPIFLASH_BASE] = self._firmware_image(firmware_name)
+        self._strobe(self.dut.flash_preload)
+
     def init_sram(self, firmware_name: str):
-        with open(f"../fw/{firmware_name}/{firmware_name}.bin", "rb") as f:
-            ram_arrays = [
-                self.dut.dut.GF180_RAM_512x32.RAM00,
-                self.dut.dut.GF180_RAM_512x32.RAM01,
-                self.dut.dut.GF180_RAM_512x32.RAM02,
-                self.dut.dut.GF180_RAM_512x32.RAM03
-            ]
-            for i, b in enumerate(f.read()):
-                ram_arrays[i % 4].RAM.mem[i // 4].value = b
+        """Load firmware into the GF180 SRAM with a single $readmemh
+
+        Args:
+            firmware_name (str): Firmware name to load
+        """
+        self._set_string(self.dut.sram_preload_file, self._write_memh(firmware_name, "sram", 4))
+        self.images[SRAM_BASE] = self._firmware_image(firmware_name)
+        self._strobe(self.dut.sram_preload)
+
+    def trace(
+        self,
+        scope: str = "tb",
+        depth: int = 0,
+        filename: str = None,
+        start_cycle: int = None,
+        stop_cycle: int = None,
+        start_marker: int = None,
+        stop_marker: int = None,
+    ):
+        """Dump waveforms for this test, nothing is dumped unless a test calls this
+
+        Dumping starts at start_cycle or start_marker, whichever comes first, or straight away
+        when neither is given. It stops the same way, or runs to the end of the test.
+        Cycles count from this call, markers are SIM_MARKER(id) in firmware (frostyferret.h).
+
+        The format comes from TRACE_FORMAT (make TRACE_FORMAT=fst). A simulator process writes
+        a single file, so the first traced test sets the filename and scope, tests traced
+        later in the same run append their windows to it.
+
+        Verilator ignores scope, depth and $dumpoff: it dumps the whole model from the start
+        trigger to the end of the simulation.
+
+        Args:
+            scope (str): "tb", "dut", "cpu" or "memories"
+            depth (int): levels below scope to dump, 0 for all
+            filename (str): output file, defaults to <test name>.vcd/.fst
+            start_cycle (int): cycle to start dumping at
+            stop_cycle (int): cycle to stop dumping at
+            start_marker (int): firmware marker to start dumping at
+            stop_marker (int): firmware marker to stop dumping at
+        """
+        if filename is None:
+            filename = f"{self.test_name}.{TRACE_FORMAT}"
+        self._set_string(self.dut.trace_file, filename)
+        self.dut.trace_scope.value = TRACE_SCOPES[scope]
+        self.dut.trace_depth.value = depth
+        cocotb.start_soon(self._trace_window(start_cycle, stop_cycle, start_marker, stop_marker))
+
+    def hyperram_collision_every(self, accesses: int):
+        """Inject a refresh collision every n-th HyperRAM memory access (behavioural model only)
+
+        Collisions only take effect while CR0 selects variable latency, 0 disables them.
+
+        Args:
+            accesses (int): Accesses between collisions
+        """
+        self.dut.hyerram.collision_every.value = accesses
+
+    def hyperram_stats(self) -> dict:
+        """Read the access counters of the behavioural HyperRAM model
+
+        Returns:
+            dict: counter name (reads, writes, words_read, collisions, ...) -> value
+        """
+        return {
+            name[len("stat_"):]: int(getattr(self.dut.hyerram, name).value)
+            for name in HYPERRAM_STATS
+        }
+
+    def csr_read(self, name: str) -> int:
+        """Read a CSR through the backdoor, in zero time and without a bus access
+
+        Args:
+            name (str): CSR name as in csr.csv
+
+        Returns:
+            int: CSR value
+        """
+        return int(self._csr_handle(name).value)
+
+    def csr_write(self, name: str, value: int):
+        """Write a CSRStorage through the backdoor, in zero time and without a bus access
+
+        The value lands in the storage register, no write strobe is generated. Pulse fields
+        (e.g. hyperbus ctrl start) and logic that acts on a CSR write will not see it.
+
+        Args:
+            name (str): CSR name as in csr.csv
+            value (int): value to write
+        """
+        self._csr_handle(name).value = value
+
+    def csr_read_fields(self, name: str) -> dict:
+        """Read a CSR through the backdoor and decode its fields
+
+        Args:
+            name (str): CSR name as in csr.csv
+
+        Returns:
+            dict: field name -> value
+        """
+        value = self.csr_read(name)
+        return {
+            field: (value >> offset) & ((1 << size) - 1)
+            for field, (offset, size) in self.csr_fields[name].items()
+        }
+
+    def csr_write_fields(self, name: str, **fields: int):
+        """Update fields of a CSRStorage through the backdoor, other fields are kept
+
+        Args:
+            name (str): CSR name as in csr.csv
+            **fields (int): field name -> value
+        """
+        value = self.csr_read(name)
+        for field, field_value in fields.items():
+            offset, size = self.csr_fields[name][field]
+            mask = ((1 << size) - 1) << offset
+            value = (value & ~mask) | ((field_value << offset) & mask)
+        self.csr_write(name, value)
+
+    async def collect_reports(self, reports: dict):
+        """Collect values reported by firmware, started as a coroutine by tests
+
+        Firmware reports a value by writing it to ctrl_scratch, then executing SIM_MARKER(id).
+
+        Args:
+            reports (dict): filled with marker id -> value as reports arrive
+        """
+        while True:
+            await RisingEdge(self.dut.marker)
+            reports[int(self.dut.marker_id.value)] = self.csr_read("ctrl_scratch")
 
     async def clock_cycles(self, cycles: int):
         """Wait for number of DUT clock cycles
@@ -153,8 +735,13 @@ async def test_hyperbus_csr_c(dut):
 
     harness.build_fw("test_hyperbus_csr_c")
     harness.init_sram("test_hyperbus_csr_c")
-    await harness.reset()
-    await harness.wfi()
+    await harness.boot(SRAM_BASE)
+    a0 = await harness.wait_for_wfi()
+    assert a0 == 0, f"Non-zero return code: (a0={a0})"
+
+    # SimConsole output
+    assert harness.console_lines == ["HyperRAM ID0 8f1f"]
+    assert [(marker_id, args) for _, marker_id, args in harness.markers] == [(6, [6]), (5, [5]), (4, [4])]
 
 @cocotb.test()
 async def test_spi_exec_hyperbus(dut):
@@ -162,5 +749,174 @@ async def test_spi_exec_hyperbus(dut):
     harness = SoCTestHarness(dut)
     harness.build_fw("test_spi_exec_hyperbus")
     harness.init_spiflash("test_spi_exec_hyperbus")
+    await harness.boot(HYPERBUS0_BASE)
+    await harness.wfi()
+
+
+@cocotb.test(skip=not CHECKPOINTS)
+async def test_boot_checkpoint(dut):
+    """Test a boot restored from a checkpoint, the boot copies code to HyperRAM at 4 cycle latency"""
+    harness = SoCTestHarness(dut)
+    harness.build_fw("test_spi_exec_hyperbus")
+    harness.init_spiflash("test_spi_exec_hyperbus")
+
+    # Taken here unless test_spi_exec_hyperbus already did
+    ran = await harness.boot(HYPERBUS0_BASE) == 0
+    a0 = await harness.wait_for_wfi()
+    assert a0 == 0, f"Non-zero return code: (a0={a0})"
+    if ran:
+        # The boot sets CR0 and copies the code
+        stats = harness.hyperram_stats()
+        assert stats["reg_writes"] > 0 and stats["words_written"] > 0, stats
+
+    # HyperRAM survives a reset, clobber the copied code and CR0 so only the checkpoint can bring them back
+    harness._hyperram_restore({0: [0] * HYPERRAM_PAGE_WORDS})
+    harness.dut.hyerram.cr0.value = 0x8F1F
+
+    skipped = await harness.boot(HYPERBUS0_BASE)
+    assert skipped > 0
+    assert harness.csr_read("hyperbus0_core_mmap_latency_cycles") == 4
+    assert int(harness.dut.hyerram.cr0.value) == 0x8FFF
+
+    # Nothing of the boot runs: the first instruction to retire is the one at entry, and the
+    # HyperRAM sees neither the CR0 write nor the copy
+    cpu = dut.dut.VexRiscv
+    while True:
+        await RisingEdge(dut.clk)
+        await ReadOnly()
+        if cpu.lastStageIsValid.value:
+            break
+    assert int(cpu.lastStagePc.value) == HYPERBUS0_BASE, f"first retired pc {int(cpu.lastStagePc.value):#010x}"
+    a0 = await harness.wait_for_wfi()
+    assert a0 == 0, f"Non-zero return code: (a0={a0})"
+    stats = harness.hyperram_stats()
+    assert stats["reg_writes"] == 0 and stats["words_written"] == 0, stats
+
+
+@cocotb.test(skip=MODELS != "behavioural")
+async def test_hyperbus_variable_latency(dut):
+    """Test MMAP access with variable latency and injected refresh collisions"""
+    harness = SoCTestHarness(dut)
+    harness.build_fw("jump_to_sram")
+    harness.init_spiflash("jump_to_sram")
+
+    harness.build_fw("test_hyperbus_variable_latency")
+    harness.init_sram("test_hyperbus_variable_latency")
+    harness.hyperram_collision_every(3)
+    harness.trace(scope="memories", start_marker=1, stop_marker=2)
+    await harness.boot(SRAM_BASE)
+    a0 = await harness.wait_for_wfi()
+
+    stats = harness.hyperram_stats()
+    dut._log.info(f"HyperRAM stats: {stats}")
+    assert a0 == 0, f"Non-zero return code: (a0={a0})"
+    assert stats["collisions"] > 0
+    assert stats["double_latency"] < stats["reads"] + stats["writes"]
+    assert stats["pages"] >= 3
+
+
+@cocotb.test()
+async def test_csr_backdoor(dut):
+    """Test backdoor CSR reads, writes and field decode while firmware runs"""
+    harness = SoCTestHarness(dut)
+    harness.build_fw("test_spi_boot_c")
+    harness.init_spiflash("test_spi_boot_c")
     await harness.reset()
-    await harness.wfi()
\ No newline at end of file
+
+    assert harness.csr_read("ctrl_scratch") == 0x12345678
+    assert harness.csr_read_fields("hyperbus0_core_master_hyperbus_cfg")["latency_count"] == 7
+
+    harness.csr_write("ctrl_scratch", 0xCAFEF00D)
+    harness.csr_write_fields("hyperbus0_core_master_hyperbus_cfg", latency_count=5, hyperbus=1)
+    await harness.clock_cycles(1)
+    assert harness.csr_read("ctrl_scratch") == 0xCAFEF00D
+    assert harness.csr_read_fields("hyperbus0_core_master_hyperbus_cfg") == {
+        "hyperbus": 1,
+        "latency_variable": 0,
+        "data_size": 0,
+        "latency_count": 5,
+    }
+
+    await harness.wfi()
+
+
+def bench_metrics(reports: dict) -> dict:
+    """Turn bench_memory cycle counts into per benchmark metrics
+
+    Args:
+        reports (dict): marker id -> cycles, from SoCTestHarness.collect_reports
+
+    Returns:
+        dict: benchmark name -> metrics
+    """
+    metrics = dict()
+    for marker_id, (name, unit, count) in BENCHMARKS.items():
+        if marker_id not in reports:
+            continue
+        cycles = reports[marker_id]
+        if unit == "instructions":
+            metrics[name] = {"cycles": cycles, "instructions": count, "ipc": round(count / cycles, 4)}
+        else:
+            metrics[name] = {
+                "cycles": cycles,
+                "words": count,
+                "cycles_per_word": round(cycles / count, 2),
+                "bytes_per_cycle": round(count * 4 / cycles, 4),
+            }
+    return metrics
+
+
+@cocotb.test()
+async def test_bench_memory(dut):
+    """Benchmark memory bandwidth, latency and execute in place, compared against bench_baseline.json
+
+    Results are written to bench_results.json. Run with BENCH_UPDATE_BASELINE=1 to accept them
+    as the new baseline of the CPU variant and memory models, the memory models change the cycle
+    counts too. Only the rows measured are updated, the TCM rows need SOC_ARGS="--with-itcm
+    --with-dtcm". BENCH_THRESHOLD sets the allowed slowdown (default 0.05).
+    """
+    harness = SoCTestHarness(dut)
+    harness.timeout_cycles = max(harness.timeout_cycles, 200000)
+    harness.build_fw("jump_to_sram")
+    harness.init_spiflash("jump_to_sram")
+
+    harness.build_fw("bench_memory")
+    harness.init_sram("bench_memory")
+
+    reports = dict()
+    cocotb.start_soon(harness.collect_reports(reports))
+    await harness.boot(SRAM_BASE)
+    a0 = await harness.wait_for_wfi()
+    assert a0 == 0, f"Non-zero return code: (a0={a0})"
+
+    metrics = bench_metrics(reports)
+    results = {"models": MODELS, "cpu_variant": CPU_VARIANT, "timer_overhead": reports[0x100], "benchmarks": metrics}
+    with open(BENCH_RESULTS, "w") as f:
+        json.dump(results, f, indent=2)
+
+    with open(BENCH_BASELINE) as f:
+        baselines = json.load(f)
+
+    if os.environ.get("BENCH_UPDATE_BASELINE") == "1":
+        baseline = baselines.setdefault(CPU_VARIANT, dict()).setdefault(MODELS, dict())
+        baseline.update({name: m["cycles"] for name, m in metrics.items()})
+        with open(BENCH_BASELINE, "w") as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        dut._log.info(f"Baseline updated: {BENCH_BASELINE} ({CPU_VARIANT}, {MODELS})")
+        return
+
+    baseline = baselines.get(CPU_VARIANT, {}).get(MODELS, {})
+    if not baseline:
+        dut._log.warning(f"No baseline for {CPU_VARIANT} with {MODELS} models, run with BENCH_UPDATE_BASELINE=1")
+
+    regressions = []
+    for name, m in metrics.items():
+        if name not in baseline:
+            continue
+        change = m["cycles"] / baseline[name] - 1
+        dut._log.info(f"{name:32s} {m['cycles']:8d} cycles ({change:+.1%} vs baseline)")
+        if change > BENCH_THRESHOLD:
+            regressions.append(f"{name}: {baseline[name]} -> {m['cycles']} cycles ({change:+.1%})")
+
+    assert not regressions, "Benchmark regressions:\n" + "\n".join(regressions)
@@ -10,7 +10,19 @@
 module tb (
     input clk,
     input reset,
-    input [4095:0] test_name
+    input [4095:0] test_name,
+    input [4095:0] flash_preload_file,
+    input flash_preload,
+    input [4095:0] sram_preload_file,
+    input sram_preload,
+    input [4095:0] trace_file,
+    input [1:0] trace_scope,
+    input [7:0] trace_depth,
+    input trace_enable,
+    input [31:0] checkpoint_pc,
+    output marker,
+    output [11:0] marker_id,
+    output checkpoint
 );
 
   wire spi0_clk;
@@ -42,6 +54,26 @@ module tb (
       .hyperbus0_rwds(hyperbus0_rwds)
   );
 
+`ifdef BEHAVIOURAL_MODELS
+  spiflash_model flash (
+      .CSn(spi0_cs_n),
+      .CLK(spi0_clk),
+      .DIO(spi0_dq[0]),
+      .DO(spi0_dq[1]),
+      .WPn(spi0_dq[2]),
+      .HOLDn(spi0_dq[3]),
+      .RESETn(~reset)
+  );
+
+  hyperram_model hyerram (
+      .DQ(hyperbus0_dq),
+      .RWDS(hyperbus0_rwds),
+      .CSNeg(hyperbus0_cs_n),
+      .CK(hyperbus0_clk_p),
+      .CKNeg(hyperbus0_clk_n),
+      .RESETNeg(hyperbus0_reset_n)
+  );
+`else
   W25Q32JVxxIM flash (
       .CSn(spi0_cs_n),
       .CLK(spi0_clk),
@@ -67,11 +99,54 @@ s27ks0641 hyerram (
     .CKNeg(hyperbus0_clk_n),
     .RESETNeg(hyperbus0_reset_n)
 );
+`endif
+
+  // Waveform tracing, off until the harness raises trace_enable.
+  // The file and scope are fixed by the first enable, later ones resume dumping.
+  // trace_scope: 0 = tb, 1 = dut, 2 = CPU, 3 = flash and HyperRAM models
+  // Under Verilator everything is dumped from the first enable, $dumpoff is ignored.
+  reg trace_open = 1'b0;
+`ifdef VERILATOR
+  // cocotb only enables tracing for its own whole run dump, $dumpvars needs it too
+  initial $c("Verilated::traceEverOn(true);");
+`endif
+  always @(trace_enable) begin
+    if (trace_enable === 1'b1) begin
+      if (!trace_open) begin
+        trace_open = 1'b1;
+        $dumpfile(trace_file);
+        case (trace_scope)
+          2'd0: $dumpvars(trace_depth, tb);
+          2'd1: $dumpvars(trace_depth, dut);
+          2'd2: $dumpvars(trace_depth, dut.VexRiscv);
+          2'd3: $dumpvars(trace_depth, flash, hyerram);
+        endcase
+      end
+      $dumpon;
+    end else if (trace_open) begin
+      $dumpoff;
+    end
+  end
 
-  // Dump waves
-  initial begin
-    $dumpfile("dump.vcd");
-    $dumpvars(0, tb);
+  // Bulk memory preload, every edge on a strobe loads the named $readmemh file
+  always @(flash_preload) begin
+    $readmemh(flash_preload_file, flash.memory);
+  end
+
+  reg [31:0] sram_image [0:511];
+  integer i;
+  always @(sram_preload) begin
+    for (i = 0; i < 512; i = i + 1)
+      sram_image[i] = 32'hxxxxxxxx;
+    $readmemh(sram_preload_file, sram_image);
+    for (i = 0; i < 512; i = i + 1) begin
+      if (^sram_image[i] !== 1'bx) begin
+        dut.GF180_RAM_512x32.RAM00.RAM.mem[i] = sram_image[i][7:0];
+        dut.GF180_RAM_512x32.RAM01.RAM.mem[i] = sram_image[i][15:8];
+        dut.GF180_RAM_512x32.RAM02.RAM.mem[i] = sram_image[i][23:16];
+        dut.GF180_RAM_512x32.RAM03.RAM.mem[i] = sram_image[i][31:24];
+      end
+    end
   end
 
   // Extract wfi and a0
@@ -79,5 +154,14 @@ s27ks0641 hyerram (
               && (dut.VexRiscv.lastStageIsValid);
   assign a0 = dut.VexRiscv.u_rf.regfile[10];
 
+  // Firmware markers, "slti x0, x0, id" is a HINT and has no architectural effect
+  assign marker =    (dut.VexRiscv.lastStageInstruction[19:0] == 20'h02013)
+                  && (dut.VexRiscv.lastStageIsValid);
+  assign marker_id = dut.VexRiscv.lastStageInstruction[31:20];
+
+  // Boot checkpoints, the instruction at checkpoint_pc retires. Its register write is still pending.
+  assign checkpoint =    (dut.VexRiscv.lastStagePc == checkpoint_pc)
+                      && (dut.VexRiscv.lastStageIsValid);
+
 
 endmodule